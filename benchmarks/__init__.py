@@ -0,0 +1,2 @@
+# 性能基准测试：合成数据生成 (synthetic) 与无界面基准 (run)
+# 用法: python -m benchmarks.run --sizes 10000 100000 --output bench.json
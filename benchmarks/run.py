@@ -0,0 +1,256 @@
+# 无界面基准测试：直接调用各个 worker，记录耗时与峰值内存，结果输出为 JSON
+#
+#   python -m benchmarks.run                              # 默认 10k/100k/1M 条
+#   python -m benchmarks.run --sizes 10000 --only startup search compare
+#   python -m benchmarks.run --output new.json --baseline old.json
+
+import argparse
+import dbm
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main  # noqa: E402
+from benchmarks import synthetic  # noqa: E402
+
+
+class _Flag:
+    # 代替 tk.BooleanVar，无界面时没有 Tk 根窗口
+    def __init__(self, value=False):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+
+class _DiscardQueue:
+    # 丢弃进度消息，避免积压的消息影响内存统计
+    def put(self, item):
+        pass
+
+
+def headless_app(db_path=None):
+    # 不创建界面的 AssetAnalyzerApp，只设置 worker 用到的属性
+    app = main.AssetAnalyzerApp.__new__(main.AssetAnalyzerApp)
+    app.db_file_path = db_path
+    app.analysis_data = None
+    app.logging_enabled = False
+    app.logger = None
+    app.detailed_log_var = _Flag(False)
+    return app
+
+
+def headless_window(window_cls, controller):
+    window = window_cls.__new__(window_cls)
+    window.controller = controller
+    return window
+
+
+def measure(fn, repeat, trace_memory):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    peak = None
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        'seconds_min': min(times),
+        'seconds_mean': sum(times) / len(times),
+        'runs': len(times),
+        'peak_memory_bytes': peak,
+    }
+
+
+def measure_startup(repeat):
+    # 新解释器中导入 main 的耗时，即窗口出现之前的模块加载开销
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import main'], cwd=repo_dir, check=True)
+        times.append(time.perf_counter() - start)
+    return {
+        'name': 'startup',
+        'entries': 0,
+        'seconds_min': min(times),
+        'seconds_mean': sum(times) / len(times),
+        'runs': len(times),
+        'peak_memory_bytes': None,
+    }
+
+
+def build_cases(workdir, size, seed):
+    # 返回 [(名称, 函数)]；数据准备不计时
+    old_entries = synthetic.generate_entries(size, seed=seed)
+    new_entries = synthetic.mutate_entries(old_entries, seed=seed + 1)
+    old_json = synthetic.write_manifest(old_entries, os.path.join(workdir, 'old.json'))
+    new_json = synthetic.write_manifest(new_entries, os.path.join(workdir, 'new.json'))
+    size_columns = main.SizeColumns()
+    main.FacetCube.from_items(((path, size) for path, _, size in old_entries), size_columns)
+    del old_entries, new_entries
+
+    loader = headless_app()
+    old_db = os.path.join(workdir, 'old.dbm')
+    new_db = os.path.join(workdir, 'new.dbm')
+    merge_db = os.path.join(workdir, 'merge.dbm')
+    loader._load_from_json_worker(old_json, old_db)
+    loader._load_from_json_worker(new_json, new_db)
+    loader._load_from_json_worker(old_json, merge_db)
+
+    app = headless_app(old_db)
+    merge_app = headless_app(merge_db)
+    with dbm.open(new_db, 'r') as db:
+        merge_items = [item for item in db.items() if not item[0].startswith(b'__')]
+
+    keyword_path = os.path.join(workdir, 'keywords.txt')
+    with open(keyword_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(f"asset_{i}." for i in range(0, size, max(1, size // 1000))))
+
+    catalog = synthetic.make_addressables_catalog(max(10, size // 50), size, seed=seed)
+    catalog_items = dict(loader._parse_unity_addressables_catalog(catalog))
+    graph = main.DependencyGraph.from_json(catalog_items[main.DependencyGraph.META_KEY])
+    graph_roots = graph.nodes[::10]
+    del catalog_items
+
+    file_count = max(10, size // 100)
+    unity_src = os.path.join(workdir, 'unityfs_src')
+    lua_src = os.path.join(workdir, 'luajit_src')
+    synthetic.write_file_tree(unity_src, file_count, 'unityfs', seed=seed)
+    synthetic.write_file_tree(lua_src, file_count, 'luajit', seed=seed)
+    stripper = headless_window(main.UnityFSStripperWindow, app)
+    decompiler = headless_window(main.LuaJITDecompilerWindow, app)
+    explorer = headless_window(main.DirectoryExplorerWindow, app)
+    indexer = headless_window(main.UnityFSIndexWindow, app)
+    comparer = headless_window(main.CompareDBWindow, app)
+
+    def strip():
+        dest = os.path.join(workdir, 'unityfs_dest')
+        shutil.rmtree(dest, ignore_errors=True)
+        stripper._process_files_worker(unity_src, dest, progress_queue=_DiscardQueue())
+
+    def preprocess():
+        temp_dir = tempfile.mkdtemp(dir=workdir)
+        try:
+            decompiler._preprocess_files(lua_src, temp_dir, _DiscardQueue())
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def lua_strings():
+        dest = os.path.join(workdir, 'luajit_strings')
+        shutil.rmtree(dest, ignore_errors=True)
+        decompiler._extract_strings_worker(lua_src, dest, os.cpu_count() or 4, progress_queue=_DiscardQueue())
+
+    return [
+        ('load', lambda: loader._load_from_json_worker(old_json, os.path.join(workdir, 'load.dbm'))),
+        ('catalog', lambda: loader._parse_unity_addressables_catalog(catalog)),
+        ('dep_closure', lambda: (graph.closure(graph_roots), graph.closure(graph_roots, reverse=True))),
+        ('search', lambda: app._search_assets_worker('asset_1')),
+        ('bulk_search', lambda: app._bulk_search_worker(keyword_path, os.path.join(workdir, 'bulk.csv'))),
+        ('analysis', lambda: app._analyze_categories_worker()),
+        ('size_stats', lambda: main.SizeDistribution.from_columns(size_columns)),
+        ('explorer', lambda: explorer._build_path_map_worker()),
+        ('compare', lambda: comparer._compare_dbs_worker(old_db, new_db, 'changed')),
+        ('duplicates', lambda: app._duplicate_report_worker(os.path.join(workdir, 'dup.csv'))),
+        ('merge', lambda: merge_app._perform_merge_worker(merge_items)),
+        ('export', lambda: app._export_to_json_worker(os.path.join(workdir, 'export.json'))),
+        ('strip', strip),
+        ('unityfs_index', lambda: indexer._index_worker(unity_src, os.cpu_count() or 4, progress_queue=_DiscardQueue())),
+        ('preprocess', preprocess),
+        ('lua_strings', lua_strings),
+    ]
+
+
+def compare_with_baseline(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['name'], r['entries']): r for r in json.load(f)['results']}
+    print(f"\n与基准 {baseline_path} 对比 (耗时比值 <1 表示更快):")
+    for r in results:
+        old = baseline.get((r['name'], r['entries']))
+        if old and old['seconds_min'] > 0:
+            print(f"  {r['name']:<12} {r['entries']:>9}  {r['seconds_min'] / old['seconds_min']:6.2f}x")
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="大眼文件工具基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--only', nargs='+', help="只运行指定的基准")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help="跳过 tracemalloc 峰值内存统计")
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--baseline', help="与之前的 JSON 结果对比")
+    parser.add_argument('--workdir', help="数据目录 (默认临时目录，结束后删除)")
+    args = parser.parse_args(argv)
+
+    results = []
+    if not args.only or 'startup' in args.only:
+        stats = measure_startup(args.repeat)
+        results.append(stats)
+        print(f"  {'startup':<12} {stats['seconds_min']:9.4f}s")
+    for size in args.sizes:
+        workdir = args.workdir or tempfile.mkdtemp(prefix='aether_bench_')
+        workdir = os.path.join(workdir, str(size))
+        os.makedirs(workdir, exist_ok=True)
+        try:
+            print(f"准备 {size} 条数据...")
+            for name, fn in build_cases(workdir, size, args.seed):
+                if args.only and name not in args.only:
+                    continue
+                stats = measure(fn, args.repeat, not args.no_memory)
+                stats.update(name=name, entries=size)
+                results.append(stats)
+                peak = stats['peak_memory_bytes']
+                print(f"  {name:<12} {stats['seconds_min']:9.4f}s"
+                      + (f"  峰值 {main._format_size(peak)}" if peak is not None else ""))
+        finally:
+            if not args.workdir:
+                shutil.rmtree(os.path.dirname(workdir), ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'dbm_backend': _dbm_backend(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存至 {args.output}")
+    if args.baseline:
+        compare_with_baseline(results, args.baseline)
+
+
+def _dbm_backend():
+    for name in dbm._names:
+        try:
+            __import__(name)
+            return name
+        except ImportError:
+            continue
+    return 'unknown'
+
+
+if __name__ == '__main__':
+    main_cli()
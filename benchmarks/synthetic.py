@@ -0,0 +1,217 @@
+# 确定性的合成数据生成器：相同的参数和种子总是生成相同的数据
+
+import base64
+import json
+import lzma
+import os
+import random
+import struct
+
+_EXTENSIONS = ('.ab', '.bundle', '.bytes', '.lua', '.json')
+
+
+def generate_entries(count, depth=3, fanout=8, seed=0, duplicate_rate=0.02):
+    # 返回 [(路径, 哈希, 大小)]；depth 为目录层数，fanout 为每层的分支数
+    rng = random.Random(seed)
+    entries = []
+    hashes = []
+    for i in range(count):
+        parts = [f"cat{rng.randrange(fanout)}"]
+        parts.extend(f"dir{rng.randrange(fanout)}" for _ in range(depth - 1))
+        parts.append(f"asset_{i}{rng.choice(_EXTENSIONS)}")
+        if hashes and rng.random() < duplicate_rate:
+            hash_val = rng.choice(hashes)
+        else:
+            hash_val = f"{rng.getrandbits(128):032x}"
+            hashes.append(hash_val)
+        # 对数分布的大小，模拟大量小文件和少量大包
+        size = int(rng.lognormvariate(10, 2)) + 1
+        entries.append(('/'.join(parts), hash_val, size))
+    return entries
+
+
+def mutate_entries(entries, seed=1, added=0.02, removed=0.02, changed=0.05):
+    # 在旧版本的基础上生成"新版本"：按比例新增、移除和改动哈希
+    rng = random.Random(seed)
+    result = []
+    for path, hash_val, size in entries:
+        roll = rng.random()
+        if roll < removed:
+            continue
+        if roll < removed + changed:
+            hash_val = f"{rng.getrandbits(128):032x}"
+            size = max(1, int(size * rng.uniform(0.5, 2.0)))
+        result.append((path, hash_val, size))
+    for i in range(int(len(entries) * added)):
+        result.append((f"new/dir{rng.randrange(16)}/added_{i}.ab", f"{rng.getrandbits(128):032x}",
+                       int(rng.lognormvariate(10, 2)) + 1))
+    return result
+
+
+def write_manifest(entries, file_path):
+    # 游戏资源目录中 assethash_*.bytes 的格式
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump({"assetHashList": [f"{p}|{h}|{s}" for p, h, s in entries]}, f)
+    return file_path
+
+
+def _cstring(text):
+    return text.encode('utf-8') + b'\x00'
+
+
+def _lzma_unity(data):
+    # Unity 的 LZMA 格式：5字节属性 + 数据流 (去掉 .lzma 文件头中的8字节长度)
+    packed = lzma.compress(data, format=lzma.FORMAT_ALONE)
+    return packed[:5] + packed[13:]
+
+
+def make_unityfs_bundle(rng, padding, node_count=3, data_size=4096, lzma_info=False):
+    # 最小的 UnityFS (格式版本6) 包：目录信息与文件头相连，数据块未压缩
+    data = rng.randbytes(data_size)
+    nodes = b''
+    offset = 0
+    node_size = data_size // node_count
+    for i in range(node_count):
+        size = node_size if i < node_count - 1 else data_size - offset
+        nodes += struct.pack('>qqI', offset, size, 4) + _cstring(f"CAB-{rng.getrandbits(64):016x}" + ('.resS' if i else ''))
+        offset += size
+    blocks_info = (b'\x00' * 16 + struct.pack('>i', 1) + struct.pack('>IIH', data_size, data_size, 0)
+                   + struct.pack('>i', node_count) + nodes)
+    stored_info = _lzma_unity(blocks_info) if lzma_info else blocks_info
+    flags = 0x40 | (1 if lzma_info else 0)
+    header_rest = _cstring('5.x.x') + _cstring('2019.4.40f1')
+    header_len = len(b'UnityFS\x00') + 4 + len(header_rest) + 8 + 12
+    total_size = header_len + len(stored_info) + data_size
+    header = (b'UnityFS\x00' + struct.pack('>I', 6) + header_rest
+              + struct.pack('>qIII', total_size, len(stored_info), len(blocks_info), flags))
+    return padding + header + stored_info + data
+
+
+def _uleb128(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def make_luajit_dump(rng, version=2, strings=8, chunkname='@synthetic.lua'):
+    # 单个原型的 LuaJIT 字节码转储，包含字符串常量、数字常量和行号信息
+    kgc = b''
+    for i in range(strings):
+        text = f"str_{i}_{rng.getrandbits(32):08x}".encode('utf-8')
+        kgc += _uleb128(5 + len(text)) + text
+    kn = b''.join(_uleb128(rng.randrange(1 << 20) << 1) for _ in range(2))
+    numbc = 4
+    bytecode = rng.randbytes(4 * numbc)
+    numline = 8
+    lineinfo = bytes(rng.randrange(numline) for _ in range(numbc))
+    debug = lineinfo + b'\x00'  # 无上值名、无变量名
+    body = (bytes([0, 0, 2, 0]) + _uleb128(strings) + _uleb128(2) + _uleb128(numbc)
+            + _uleb128(len(debug)) + _uleb128(1) + _uleb128(numline)
+            + bytecode + kgc + kn + debug)
+    name = chunkname.encode('utf-8')
+    return (b'\x1bLJ' + bytes([version]) + _uleb128(0) + _uleb128(len(name)) + name
+            + _uleb128(len(body)) + body + b'\x00')
+
+
+def write_file_tree(root, count, kind, seed=0, depth=2, fanout=4):
+    # kind: 'unityfs' 或 'luajit'；文件头前填充随机长度的空字节
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        rel_dir = os.path.join(*[f"d{rng.randrange(fanout)}" for _ in range(depth)])
+        os.makedirs(os.path.join(root, rel_dir), exist_ok=True)
+        padding = b'\x00' * rng.choice((0, 16, 64, 256))
+        if kind == 'unityfs':
+            content = make_unityfs_bundle(rng, padding, lzma_info=rng.random() < 0.5)
+            file_name = f"bundle_{i}.ab"
+        else:
+            content = padding + make_luajit_dump(rng, chunkname=f"@script_{i}.lua") + b'\x00' * rng.randrange(8)
+            file_name = f"script_{i}.lua.bytes"
+        path = os.path.join(root, rel_dir, file_name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+
+def _serialize_ascii(text):
+    raw = text.encode('ascii')
+    return b'\x00' + struct.pack('<i', len(raw)) + raw
+
+
+def _serialize_json_object(class_name, payload):
+    assembly = b'Unity.ResourceManager'
+    cls = class_name.encode('ascii')
+    text = json.dumps(payload).encode('utf-16-le')
+    return (b'\x07' + bytes([len(assembly)]) + assembly + bytes([len(cls)]) + cls
+            + struct.pack('<i', len(text)) + text)
+
+
+def make_addressables_catalog(bundle_count, asset_count, seed=0, max_deps=3):
+    # Addressables catalog.json：资源依赖若干个 AssetBundle，AssetBundle 的额外数据带哈希和大小
+    rng = random.Random(seed)
+    placeholder = "{PlatformUtils.AddressableLoadPath}/"
+    internal_ids = [f"{placeholder}bundles/bundle_{i}.bundle" for i in range(bundle_count)]
+    internal_ids += [f"Assets/Game/asset_{i}.prefab" for i in range(asset_count)]
+
+    keys, buckets = [], []
+
+    def add_key(text, entries):
+        keys.append(_serialize_ascii(text))
+        buckets.append(list(entries))
+        return len(keys) - 1
+
+    extra = bytearray()
+    entries = []
+    for i in range(bundle_count):
+        data_index = len(extra)
+        extra += _serialize_json_object('AssetBundleRequestOptions', {
+            'm_Hash': f"{rng.getrandbits(128):032x}",
+            'm_Crc': rng.getrandbits(32),
+            'm_BundleName': f"bundle_{i}",
+            'm_BundleSize': int(rng.lognormvariate(12, 1.5)) + 1,
+        })
+        primary = add_key(f"bundle_{i}.bundle", [i])
+        entries.append((i, 0, -1, 0, data_index, primary, 0))
+    for i in range(asset_count):
+        location = bundle_count + i
+        deps = rng.sample(range(bundle_count), min(bundle_count, rng.randint(1, max_deps)))
+        dep_key = add_key(f"dep_{i}", deps)
+        primary = add_key(f"Assets/Game/asset_{i}.prefab", [location])
+        entries.append((location, 1, dep_key, 0, -1, primary, 1))
+
+    key_data = bytearray(struct.pack('<i', len(keys)))
+    offsets = []
+    for key in keys:
+        offsets.append(len(key_data))
+        key_data += key
+    bucket_data = bytearray(struct.pack('<i', len(buckets)))
+    for offset, bucket in zip(offsets, buckets):
+        bucket_data += struct.pack(f'<ii{len(bucket)}i', offset, len(bucket), *bucket)
+    entry_data = bytearray(struct.pack('<i', len(entries)))
+    for entry in entries:
+        entry_data += struct.pack('<7i', *entry)
+
+    return {
+        'm_LocatorId': 'AddressablesMainContentCatalog',
+        'm_InternalIdPrefixes': [],
+        'm_InternalIds': internal_ids,
+        'm_ProviderIds': [
+            'UnityEngine.ResourceManagement.ResourceProviders.AssetBundleProvider',
+            'UnityEngine.ResourceManagement.ResourceProviders.BundledAssetProvider',
+        ],
+        'm_resourceTypes': [
+            {'m_AssemblyName': 'Unity.ResourceManager', 'm_ClassName': 'UnityEngine.ResourceManagement.ResourceProviders.IAssetBundleResource'},
+            {'m_AssemblyName': 'UnityEngine.CoreModule', 'm_ClassName': 'UnityEngine.GameObject'},
+        ],
+        'm_KeyDataString': base64.b64encode(key_data).decode('ascii'),
+        'm_BucketDataString': base64.b64encode(bucket_data).decode('ascii'),
+        'm_EntryDataString': base64.b64encode(entry_data).decode('ascii'),
+        'm_ExtraDataString': base64.b64encode(extra).decode('ascii'),
+    }
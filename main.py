@@ -20,24 +20,54 @@ import json
 import dbm
 import os
 import csv
+import fnmatch
+import glob
+import gzip
+import zipfile
+import contextlib
+import re
 import shutil
-from collections import Counter
+from collections import Counter, OrderedDict, deque
 from datetime import datetime
 import traceback
 from pathlib import Path
 import threading
+import multiprocessing
 import queue
 import tempfile
+import heapq
+from bisect import bisect_left, bisect_right
+import hashlib
+import math
+import mmap
+import zlib
+import time
+import tracemalloc
+import cProfile
+import base64
+import lzma
+import struct
+import sys
+from array import array
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
 
 #matplotlib
-try:
-    import matplotlib.pyplot as plt
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-    MATPLOTLIB_AVAILABLE = True
-    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
-    plt.rcParams['axes.unicode_minus'] = False
-except ImportError:
-    MATPLOTLIB_AVAILABLE = False
+# 启动时只用 find_spec 检查是否安装，第一次打开图表窗口时才真正导入（导入要好几秒）
+MATPLOTLIB_AVAILABLE = importlib.util.find_spec('matplotlib') is not None
+_matplotlib_modules = None
+
+def _import_matplotlib():
+    global _matplotlib_modules
+    if _matplotlib_modules is None:
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
+        plt.rcParams['axes.unicode_minus'] = False
+        _matplotlib_modules = (plt, FigureCanvasTkAgg)
+    return _matplotlib_modules
 
 
 '''
@@ -45,11 +75,2454 @@ ljd：https://github.com/AzurLaneTools/ljd/blob/main/setup.py
 碧蓝大眼一家亲（bushi）
 '''
 
-try:
+# 同上，在反编译的后台线程中才导入
+LJD_AVAILABLE = importlib.util.find_spec('ljd') is not None
+
+# numpy 可选：大小分布统计装了它就走向量化分组运算，否则用 array 逐组计算
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+def _import_ljd():
     from ljd.tools import set_luajit_version, process_folder
-    LJD_AVAILABLE = True
-except ImportError:
-    LJD_AVAILABLE = False
+    return set_luajit_version, process_folder
+
+
+def _parse_value(value_str):
+    # 数据库的值格式为 "哈希|大小"，大小无法解析时按0处理
+    hash_val, _, size_str = value_str.partition('|')
+    try:
+        size = int(size_str)
+    except ValueError:
+        size = 0
+    return hash_val, size
+
+def _get_category(path):
+    return path.split('/', 1)[0]
+
+def _format_size(num_bytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(num_bytes) < 1024 or unit == 'GB':
+            return f"{num_bytes:.2f} {unit}" if unit != 'B' else f"{num_bytes} B"
+        num_bytes /= 1024
+
+def _format_delta(num_bytes):
+    return ('+' if num_bytes > 0 else '') + _format_size(num_bytes)
+
+
+class FacetCube:
+    # 一次遍历得到的多维统计：任意深度的目录前缀、扩展名、大小区间，均含数量和字节数
+    # 每个目录前缀一个节点，下钻直接查节点，不重新扫描数据库
+    FACETS = (('dir', "子目录"), ('ext', "扩展名"), ('size', "大小区间"))
+    SIZE_BOUNDS = (1, 4 * 1024, 64 * 1024, 1024 ** 2, 16 * 1024 ** 2, 128 * 1024 ** 2)
+    SIZE_LABELS = ("未知/0", "<4 KB", "4-64 KB", "64 KB-1 MB", "1-16 MB", "16-128 MB", ">=128 MB")
+    FILES_LABEL = "(直接文件)"
+    NO_EXT_LABEL = "(无扩展名)"
+
+    def __init__(self):
+        self.nodes = {}  # 目录前缀 ('' 为根) -> {'count', 'bytes', 'dir': {}, 'ext': {}, 'size': {}}
+        self.sizes = None  # SizeDistribution，由分析任务附上
+
+    @classmethod
+    def from_items(cls, items, columns=None):
+        # items 为 (路径, 大小)；先按 (目录, 扩展名, 大小区间) 聚合，组合数远少于条目数，再汇总到各级上级目录
+        # 传入 SizeColumns 时同一遍顺带收集大小列和分组编码
+        leaf = {}
+        bounds = cls.SIZE_BOUNDS
+        if columns is not None:
+            add_dir, add_ext = columns.codes['dir'].append, columns.codes['ext'].append
+            add_path, add_size = columns.paths.append, columns.sizes.append
+            dir_labels, ext_labels = columns.labels['dir'], columns.labels['ext']
+        for path, size in items:
+            dir_path, _, name = path.rpartition('/')
+            dot = name.rfind('.')
+            ext = name[dot:].lower() if dot > 0 else cls.NO_EXT_LABEL
+            if columns is not None:
+                top = dir_path.partition('/')[0] if dir_path else cls.FILES_LABEL
+                code = dir_labels.get(top)
+                if code is None:
+                    code = dir_labels[top] = len(dir_labels)
+                add_dir(code)
+                code = ext_labels.get(ext)
+                if code is None:
+                    code = ext_labels[ext] = len(ext_labels)
+                add_ext(code)
+                add_path(path)
+                add_size(size if size > 0 else 0)
+            key = (dir_path, ext, bisect_right(bounds, size))
+            acc = leaf.get(key)
+            if acc is None:
+                leaf[key] = [1, size]
+            else:
+                acc[0] += 1
+                acc[1] += size
+        cube = cls()
+        for (dir_path, ext, bucket), (count, nbytes) in leaf.items():
+            cube._add(dir_path, ext, cls.SIZE_LABELS[bucket], count, nbytes)
+        if '' not in cube.nodes:
+            cube._node('')
+        return cube
+
+    def _node(self, prefix):
+        node = self.nodes.get(prefix)
+        if node is None:
+            node = self.nodes[prefix] = {'count': 0, 'bytes': 0, 'dir': {}, 'ext': {}, 'size': {}}
+        return node
+
+    def _add(self, dir_path, ext, size_label, count, nbytes):
+        parts = dir_path.split('/') if dir_path else []
+        prefix = ''
+        for depth in range(len(parts) + 1):
+            node = self._node(prefix)
+            child = parts[depth] if depth < len(parts) else self.FILES_LABEL
+            node['count'] += count
+            node['bytes'] += nbytes
+            for facet, label in (('dir', child), ('ext', ext), ('size', size_label)):
+                acc = node[facet].get(label)
+                if acc is None:
+                    node[facet][label] = [count, nbytes]
+                else:
+                    acc[0] += count
+                    acc[1] += nbytes
+            if depth < len(parts):
+                prefix = f"{prefix}/{child}" if prefix else child
+
+    def total(self, prefix=''):
+        node = self.nodes[prefix]
+        return node['count'], node['bytes']
+
+    def facet(self, facet, prefix='', by='count'):
+        # 返回 [(标签, 数量, 字节数)]；大小区间按区间顺序，其他按数量或字节数降序
+        rows = [(label, c, b) for label, (c, b) in self.nodes[prefix][facet].items()]
+        if facet == 'size':
+            rows.sort(key=lambda row: self.SIZE_LABELS.index(row[0]))
+        else:
+            rows.sort(key=lambda row: row[2] if by == 'bytes' else row[1], reverse=True)
+        return rows
+
+    def child_prefix(self, prefix, label):
+        # 子目录标签对应的前缀；直接文件不能下钻，返回 None
+        if label == self.FILES_LABEL:
+            return None
+        child = f"{prefix}/{label}" if prefix else label
+        return child if child in self.nodes else None
+
+    def rows(self):
+        # 所有节点的所有维度，用于导出
+        for prefix in sorted(self.nodes):
+            for facet, _ in self.FACETS:
+                for label, count, nbytes in self.facet(facet, prefix):
+                    yield prefix, facet, label, count, nbytes
+
+
+class SizeColumns:
+    # 分析遍历时顺带收集的列：路径、大小 (array('Q')) 和各分组标签的编码，之后的统计不再读库
+    def __init__(self):
+        self.paths = []
+        self.sizes = array('Q')
+        self.codes = {key: array('I') for key, _ in SizeDistribution.GROUPINGS}
+        self.labels = {key: {} for key, _ in SizeDistribution.GROUPINGS}  # 标签 -> 编码
+
+    def __len__(self):
+        return len(self.sizes)
+
+
+class SizeDistribution:
+    # 按顶层目录或扩展名分组的大小分布：总和、百分位、按2的幂分桶的直方图和离群值
+    GROUPINGS = (('dir', "顶层目录"), ('ext', "扩展名"))
+    PERCENTILES = (25, 50, 75, 90, 99)
+    OUTLIER_K = 1.5  # 对数空间的 Tukey 上界: log(Q3) + K * (log(Q3) - log(Q1))
+    TOP_OUTLIERS = 20
+
+    def __init__(self, groups, hist_bins, backend):
+        self.groups = groups  # 分组 -> {标签: 统计字典}
+        self.hist_bins = hist_bins  # 第 b 个桶为 [2^(b-1), 2^b)，第0个桶为大小0
+        self.backend = backend
+
+    @classmethod
+    def from_columns(cls, columns):
+        if NUMPY_AVAILABLE:
+            import numpy as np
+            summarize, hist_bins = cls._numpy_summarizer(np, columns)
+        else:
+            summarize, hist_bins = cls._array_summarizer(columns)
+        groups = {}
+        for key, _ in cls.GROUPINGS:
+            names = list(columns.labels[key])
+            groups[key] = dict(zip(names, summarize(columns.codes[key], len(names)))) if names else {}
+        return cls(groups, hist_bins, 'numpy' if NUMPY_AVAILABLE else 'array')
+
+    @classmethod
+    def _fence(cls, q1, q3):
+        return q3 * (max(q3, 1) / max(q1, 1)) ** cls.OUTLIER_K
+
+    @classmethod
+    def _stats(cls, count, total, percentiles, hist, outlier_count, outliers, fence):
+        # percentiles 依次为最小值、PERCENTILES 各项、最大值
+        return {'count': count, 'bytes': total, 'min': percentiles[0], 'max': percentiles[-1],
+                'percentiles': dict(zip(cls.PERCENTILES, percentiles[1:-1])), 'hist': hist,
+                'fence': fence, 'outlier_count': outlier_count, 'outliers': outliers}
+
+    @classmethod
+    def _numpy_summarizer(cls, np, columns):
+        paths, sizes = columns.paths, columns.sizes
+        size_arr = np.frombuffer(sizes, dtype=np.uint64).astype(np.int64)
+        # 按大小排序一次，各分组共用；frexp 的指数即 bit_length，大小0落在第0个桶
+        by_size = np.argsort(size_arr)
+        bins = np.frexp(size_arr.astype(np.float64))[1].astype(np.int64)
+        hist_bins = int(bins.max()) + 1 if len(bins) else 1
+        qs = np.array((0,) + cls.PERCENTILES + (100,), dtype=np.float64) / 100
+        q1_col, q3_col = 1 + cls.PERCENTILES.index(25), 1 + cls.PERCENTILES.index(75)
+
+        def summarize(codes, n_groups):
+            code_arr = np.frombuffer(codes, dtype=np.uint32).astype(np.int64)
+            # 再按分组稳定排序，每组成为连续且按大小有序的一段，百分位直接按下标取
+            # 分组数不超过 65536 时用 uint16 排序，numpy 会走基数排序
+            sort_codes = code_arr[by_size]
+            if n_groups <= 1 << 16:
+                sort_codes = sort_codes.astype(np.uint16)
+            order = by_size[np.argsort(sort_codes, kind='stable')]
+            ordered = size_arr[order]
+            counts = np.bincount(code_arr, minlength=n_groups)
+            ends = np.cumsum(counts)
+            starts = ends - counts
+            sums = np.add.reduceat(ordered, starts)
+            pos = starts[:, None] + qs[None, :] * (counts[:, None] - 1)
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.ceil(pos).astype(np.int64)
+            pct = ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+            hist = np.bincount(code_arr * hist_bins + bins, minlength=n_groups * hist_bins).reshape(n_groups, hist_bins)
+            fences = [cls._fence(q1, q3) for q1, q3 in zip(pct[:, q1_col].tolist(), pct[:, q3_col].tolist())]
+            results = []
+            for g, fence in enumerate(fences):
+                start, end = int(starts[g]), int(ends[g])
+                first = start + int(np.searchsorted(ordered[start:end], fence, side='right'))
+                top = order[max(first, end - cls.TOP_OUTLIERS):end][::-1].tolist()
+                results.append(cls._stats(int(counts[g]), int(sums[g]), pct[g].tolist(), hist[g].tolist(),
+                                          end - first, [(sizes[i], paths[i]) for i in top], fence))
+            return results
+        return summarize, hist_bins
+
+    @classmethod
+    def _array_summarizer(cls, columns):
+        paths, sizes = columns.paths, columns.sizes
+        hist_bins = max(sizes).bit_length() + 1 if sizes else 1
+
+        def summarize(codes, n_groups):
+            members = [array('I') for _ in range(n_groups)]
+            for i, code in enumerate(codes):
+                members[code].append(i)
+            results = []
+            for idx in members:
+                ordered = sorted(map(sizes.__getitem__, idx))
+                n = len(ordered)
+                pct = []
+                for q in (0,) + cls.PERCENTILES + (100,):
+                    pos = q / 100 * (n - 1)
+                    lo = int(pos)
+                    hi = min(lo + 1, n - 1)
+                    pct.append(ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo))
+                hist = [0] * hist_bins
+                for b, count in Counter(map(int.bit_length, ordered)).items():
+                    hist[b] = count
+                fence = cls._fence(pct[1 + cls.PERCENTILES.index(25)], pct[1 + cls.PERCENTILES.index(75)])
+                outlier_count = n - bisect_right(ordered, fence)
+                top = []
+                if outlier_count:
+                    top = heapq.nlargest(min(outlier_count, cls.TOP_OUTLIERS),
+                                         (i for i in idx if sizes[i] > fence), key=sizes.__getitem__)
+                results.append(cls._stats(n, sum(ordered), pct, hist, outlier_count,
+                                          [(sizes[i], paths[i]) for i in top], fence))
+            return results
+        return summarize, hist_bins
+
+    def rows(self, grouping, by='bytes'):
+        # [(标签, 统计)]，按总大小或数量降序
+        key = 'bytes' if by == 'bytes' else 'count'
+        return sorted(self.groups[grouping].items(), key=lambda item: item[1][key], reverse=True)
+
+    @staticmethod
+    def bin_label(b):
+        return "0" if b == 0 else _format_size(1 << (b - 1)).replace('.00', '')
+
+
+class PatchPlan:
+    # 补丁下载量估算：在对比遍历中逐条累加，不需要二次扫描
+    KINDS = ('added', 'changed', 'removed')
+
+    def __init__(self, top_n=20):
+        self.top_n = top_n
+        self.totals = {kind: [0, 0] for kind in self.KINDS}  # [数量, 字节]
+        self.categories = {}
+        self._top_changed = []  # 有界最小堆 (大小, 路径)
+
+    def add(self, kind, path, size):
+        self.totals[kind][0] += 1
+        self.totals[kind][1] += size
+        category = _get_category(path)
+        stats = self.categories.get(category)
+        if stats is None:
+            stats = self.categories[category] = {k: [0, 0] for k in self.KINDS}
+        stats[kind][0] += 1
+        stats[kind][1] += size
+        if kind == 'changed':
+            if len(self._top_changed) < self.top_n:
+                heapq.heappush(self._top_changed, (size, path))
+            elif size > self._top_changed[0][0]:
+                heapq.heappushpop(self._top_changed, (size, path))
+
+    @property
+    def download_bytes(self):
+        return self.totals['added'][1] + self.totals['changed'][1]
+
+    def top_changed(self):
+        return sorted(self._top_changed, reverse=True)
+
+    def format_report(self):
+        names = {'added': "新增", 'changed': "变更", 'removed': "移除"}
+        lines = [f"预计下载量: {_format_size(self.download_bytes)}"]
+        for kind in self.KINDS:
+            count, size = self.totals[kind]
+            lines.append(f"  - {names[kind]}: {count} 个, {_format_size(size)}")
+        lines.append("\n--- 各分类下载量 (按下载量降序) ---")
+        ordered = sorted(self.categories.items(),
+                         key=lambda item: item[1]['added'][1] + item[1]['changed'][1], reverse=True)
+        for category, stats in ordered:
+            lines.append(f"{category:<25} : 新增 {_format_size(stats['added'][1])}, "
+                         f"变更 {_format_size(stats['changed'][1])}, 移除 {_format_size(stats['removed'][1])}")
+        lines.append(f"\n--- 最大的 {self.top_n} 个变更资源 ---")
+        for size, path in self.top_changed():
+            lines.append(f"{_format_size(size):>12}  {path}")
+        return "\n".join(lines)
+
+    def category_rows(self):
+        for category, stats in sorted(self.categories.items()):
+            yield [category] + [value for kind in self.KINDS for value in stats[kind]]
+
+
+class ChangeReport:
+    # 变更项的字节加权统计：新旧大小与变化量、各分类合计、按变化量绝对值的流式 Top-N
+    KINDS = ('hash_only', 'size_only', 'both')
+    NAMES = {'hash_only': "仅哈希变化", 'size_only': "仅大小变化", 'both': "哈希和大小都变化"}
+
+    def __init__(self, top_n=20):
+        self.top_n = top_n
+        self.totals = {kind: [0, 0, 0] for kind in self.KINDS}  # [数量, 旧字节, 新字节]
+        self.categories = {}  # 分类 -> [数量, 旧字节, 新字节]
+        self._top = []  # 有界最小堆 (|变化量|, 路径, 旧大小, 新大小)
+
+    @staticmethod
+    def classify(old_hash, new_hash, old_size, new_size):
+        if old_hash != new_hash:
+            return 'both' if old_size != new_size else 'hash_only'
+        return 'size_only' if old_size != new_size else None
+
+    def add(self, path, kind, old_size, new_size):
+        category = self.categories.get(_get_category(path))
+        if category is None:
+            category = self.categories[_get_category(path)] = [0, 0, 0]
+        for stats in (self.totals[kind], category):
+            stats[0] += 1
+            stats[1] += old_size
+            stats[2] += new_size
+        item = (abs(new_size - old_size), path, old_size, new_size)
+        if len(self._top) < self.top_n:
+            heapq.heappush(self._top, item)
+        elif item[0] > self._top[0][0]:
+            heapq.heappushpop(self._top, item)
+
+    @property
+    def count(self):
+        return sum(stats[0] for stats in self.totals.values())
+
+    @property
+    def delta_bytes(self):
+        return sum(stats[2] - stats[1] for stats in self.totals.values())
+
+    def top(self):
+        return [(path, old, new, new - old) for _, path, old, new in sorted(self._top, reverse=True)]
+
+    def format_report(self):
+        lines = [f"变更 {self.count} 个, 净变化 {_format_delta(self.delta_bytes)}"]
+        for kind in self.KINDS:
+            count, old, new = self.totals[kind]
+            lines.append(f"  - {self.NAMES[kind]}: {count} 个, {_format_size(old)} -> {_format_size(new)} "
+                         f"({_format_delta(new - old)})")
+        lines.append("\n--- 各分类变化量 (按变化量绝对值降序) ---")
+        ordered = sorted(self.categories.items(), key=lambda item: abs(item[1][2] - item[1][1]), reverse=True)
+        for category, (count, old, new) in ordered:
+            lines.append(f"{category:<25} : {count} 个, {_format_size(old)} -> {_format_size(new)} "
+                         f"({_format_delta(new - old)})")
+        lines.append(f"\n--- 变化量最大的 {self.top_n} 个 ---")
+        for path, old, new, delta in self.top():
+            lines.append(f"{_format_delta(delta):>13}  {path}")
+        return "\n".join(lines)
+
+    def category_rows(self):
+        for category, (count, old, new) in sorted(self.categories.items()):
+            yield [category, count, old, new, new - old]
+
+
+def _diff_databases(old_db_path, new_db_path, top_n=20):
+    # 两个库同时打开：流式遍历新库、按键查旧库，再遍历旧库找出移除项
+    # 遍历中直接累加补丁计划和变更统计，不把任何一个库读成字典
+    plan = PatchPlan(top_n)
+    changes = ChangeReport(top_n)
+    added, changed, removed = [], [], []
+    with DatabaseBroker.for_path(old_db_path).read() as old_db, DatabaseBroker.for_path(new_db_path).read() as new_db:
+        new_keys = new_db.keys()
+        old_keys = old_db.keys()
+        _count_processed(records=len(old_keys) + len(new_keys))
+        for k in new_keys:
+            if k.startswith(b'__'): continue
+            new_hash, new_size = _parse_value(new_db[k].decode('utf-8'))
+            old_value = old_db.get(k)
+            path = k.decode('utf-8')
+            if old_value is None:
+                added.append(path)
+                plan.add('added', path, new_size)
+                continue
+            old_hash, old_size = _parse_value(old_value.decode('utf-8'))
+            kind = ChangeReport.classify(old_hash, new_hash, old_size, new_size)
+            if kind is not None:
+                changed.append((path, old_hash, new_hash, old_size, new_size, kind))
+                changes.add(path, kind, old_size, new_size)
+                # 哈希没变的资源不需要重新下载，只计入变更统计
+                if kind != 'size_only':
+                    plan.add('changed', path, new_size)
+
+        for k in old_keys:
+            if k.startswith(b'__') or k in new_db: continue
+            path = k.decode('utf-8')
+            removed.append(path)
+            plan.add('removed', path, _parse_value(old_db[k].decode('utf-8'))[1])
+
+    added.sort()
+    removed.sort()
+    # 按变化量绝对值降序，10 MB 的变化排在 1 KB 之前
+    changed.sort(key=lambda x: (-abs(x[4] - x[3]), x[0]))
+    return {'added': added, 'removed': removed, 'changed': changed, 'plan': plan, 'changes': changes}
+
+
+# Addressables 目录 (catalog.json) 的二进制字段解码
+# 格式见 com.unity.addressables 的 ContentCatalogData / SerializationUtilities
+_ADDRESSABLES_PLACEHOLDER = "{PlatformUtils.AddressableLoadPath}/"
+_INT32 = struct.Struct('<i')
+
+def _int32_array(raw):
+    # 整段字节一次性转为 int32 数组 (小端)
+    values = array('i')
+    values.frombytes(raw[:len(raw) - len(raw) % 4])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+def _read_serialized_object(buf, offset):
+    # SerializationUtilities.ReadObjectFromByteArray
+    obj_type = buf[offset]
+    offset += 1
+    if obj_type == 0:  # AsciiString
+        length = _INT32.unpack_from(buf, offset)[0]
+        return bytes(buf[offset + 4:offset + 4 + length]).decode('ascii', 'replace')
+    if obj_type == 1:  # UnicodeString
+        length = _INT32.unpack_from(buf, offset)[0]
+        return bytes(buf[offset + 4:offset + 4 + length]).decode('utf-16-le', 'replace')
+    if obj_type == 2:  # UInt16
+        return struct.unpack_from('<H', buf, offset)[0]
+    if obj_type == 3:  # UInt32
+        return struct.unpack_from('<I', buf, offset)[0]
+    if obj_type == 4:  # Int32
+        return _INT32.unpack_from(buf, offset)[0]
+    if obj_type in (5, 6):  # Hash128 / Type，1字节长度的ASCII
+        length = buf[offset]
+        return bytes(buf[offset + 1:offset + 1 + length]).decode('ascii', 'replace')
+    if obj_type == 7:  # JsonObject
+        length = buf[offset]
+        offset += 1 + length
+        length = buf[offset]
+        class_name = bytes(buf[offset + 1:offset + 1 + length]).decode('ascii', 'replace')
+        offset += 1 + length
+        length = _INT32.unpack_from(buf, offset)[0]
+        json_text = bytes(buf[offset + 4:offset + 4 + length]).decode('utf-16-le', 'replace')
+        try:
+            return {'class': class_name, 'data': json.loads(json_text)}
+        except ValueError:
+            return {'class': class_name, 'data': json_text}
+    raise ValueError(f"未知的序列化类型: {obj_type}")
+
+def _decode_addressables_catalog(data):
+    # 返回 {'locations': [...], 'keys': [...], 'providers': [...]}
+    # 每个 location: (路径, 提供者序号, 主键, 资源类型, 依赖的location序号列表, 额外数据)
+    prefixes = data.get('m_InternalIdPrefixes') or []
+
+    def expand(internal_id):
+        if prefixes and '#' in internal_id:
+            index, _, rest = internal_id.partition('#')
+            if index.isdigit() and int(index) < len(prefixes):
+                internal_id = prefixes[int(index)] + rest
+        return internal_id.replace(_ADDRESSABLES_PLACEHOLDER, "")
+
+    internal_ids = [expand(i) if isinstance(i, str) else "" for i in data["m_InternalIds"]]
+    providers = list(data.get('m_ProviderIds') or [])
+    resource_types = [t.get('m_ClassName', '') if isinstance(t, dict) else ''
+                      for t in data.get('m_resourceTypes') or []]
+
+    bucket_ints = _int32_array(base64.b64decode(data['m_BucketDataString']))
+    buckets = []  # (key 在 key 数据中的偏移, [location 序号])
+    pos = 1
+    for _ in range(bucket_ints[0] if bucket_ints else 0):
+        data_offset, entry_count = bucket_ints[pos], bucket_ints[pos + 1]
+        buckets.append((data_offset, bucket_ints[pos + 2:pos + 2 + entry_count].tolist()))
+        pos += 2 + entry_count
+
+    key_view = memoryview(base64.b64decode(data['m_KeyDataString']))
+    keys = [str(_read_serialized_object(key_view, offset)) for offset, _ in buckets]
+
+    extra_view = memoryview(base64.b64decode(data.get('m_ExtraDataString') or ''))
+    extra_cache = {}
+
+    # 每个 entry 7 个 int32：internalId, provider, 依赖key, 依赖哈希, 额外数据偏移, 主键, 资源类型
+    entry_ints = _int32_array(base64.b64decode(data['m_EntryDataString']))
+    entry_count = entry_ints[0] if entry_ints else 0
+    columns = [entry_ints[1 + c:1 + entry_count * 7:7] for c in range(7)]
+    locations = []
+    for internal_id, provider, dep_key, _, data_index, primary_key, res_type in zip(*columns):
+        extra = None
+        if data_index >= 0 and extra_view:
+            extra = extra_cache.get(data_index)
+            if extra is None:
+                extra = extra_cache[data_index] = _read_serialized_object(extra_view, data_index)
+        locations.append((
+            internal_ids[internal_id] if 0 <= internal_id < len(internal_ids) else "",
+            provider,
+            keys[primary_key] if 0 <= primary_key < len(keys) else "",
+            resource_types[res_type] if 0 <= res_type < len(resource_types) else "",
+            buckets[dep_key][1] if 0 <= dep_key < len(buckets) else [],
+            extra,
+        ))
+    return {'locations': locations, 'keys': keys, 'providers': providers, 'buckets': buckets}
+
+
+class DependencyGraph:
+    # 资源依赖图，正向/反向都以 CSR (偏移数组 + 目标数组) 保存
+    # 正向: 加载X需要哪些资源；反向: 哪些资源依赖Y
+    META_KEY = '__dep_graph__'
+    CACHE_LIMIT = 100000
+
+    def __init__(self, nodes, fwd_offsets, fwd_targets, rev_offsets=None, rev_targets=None):
+        self.nodes = nodes
+        self.index = {path: i for i, path in enumerate(nodes)}
+        self.fwd_offsets = array('I', fwd_offsets)
+        self.fwd_targets = array('I', fwd_targets)
+        if rev_offsets is None:
+            rev_offsets, rev_targets = self._transpose(len(nodes), self.fwd_offsets, self.fwd_targets)
+        self.rev_offsets = array('I', rev_offsets)
+        self.rev_targets = array('I', rev_targets)
+        self._cache = ({}, {})  # 单个根节点的闭包缓存 (正向, 反向)
+
+    @classmethod
+    def from_adjacency(cls, nodes, adjacency):
+        # adjacency: 每个节点的目标节点序号列表
+        offsets, targets = array('I', [0]), array('I')
+        for children in adjacency:
+            targets.extend(children)
+            offsets.append(len(targets))
+        return cls(nodes, offsets, targets)
+
+    @staticmethod
+    def _transpose(n, offsets, targets):
+        counts = [0] * (n + 1)
+        for t in targets:
+            counts[t + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        rev_offsets = array('I', counts)
+        fill = counts[:n]
+        rev_targets = array('I', bytes(4 * len(targets)))
+        for src in range(n):
+            for j in range(offsets[src], offsets[src + 1]):
+                t = targets[j]
+                rev_targets[fill[t]] = src
+                fill[t] += 1
+        return rev_offsets, rev_targets
+
+    def to_json(self):
+        return json.dumps({
+            'nodes': self.nodes,
+            'fwd': [self.fwd_offsets.tolist(), self.fwd_targets.tolist()],
+            'rev': [self.rev_offsets.tolist(), self.rev_targets.tolist()],
+        }, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls(data['nodes'], *data['fwd'], *data['rev'])
+
+    def merged(self, other):
+        # 两个依赖图的并集 (节点和边)；合并另一份目录时保留数据库中已有的依赖
+        nodes = self.nodes + [path for path in other.nodes if path not in self.index]
+        index = {path: i for i, path in enumerate(nodes)}
+        adjacency = [set() for _ in nodes]
+        for graph in (self, other):
+            remap = [index[path] for path in graph.nodes]
+            offsets, targets = graph.fwd_offsets, graph.fwd_targets
+            for src, dst in enumerate(remap):
+                adjacency[dst].update(remap[t] for t in targets[offsets[src]:offsets[src + 1]])
+        return DependencyGraph.from_adjacency(nodes, [sorted(children) for children in adjacency])
+
+    @classmethod
+    def load(cls, db_path):
+        # 数据库中没有依赖图时返回 None
+        with DatabaseBroker.for_path(db_path).read() as db:
+            raw = db.get(cls.META_KEY.encode('utf-8'))
+        return cls.from_json(raw.decode('utf-8')) if raw else None
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, path):
+        return path in self.index
+
+    @property
+    def edge_count(self):
+        return len(self.fwd_targets)
+
+    def _csr(self, reverse):
+        return (self.rev_offsets, self.rev_targets) if reverse else (self.fwd_offsets, self.fwd_targets)
+
+    def _walk(self, roots, visited, reverse):
+        # 迭代DFS，visited 在多个根之间共享，每个节点最多访问一次
+        offsets, targets = self._csr(reverse)
+        found = []
+        stack = [r for r in roots if not visited[r]]
+        for r in stack:
+            visited[r] = 1
+        while stack:
+            node = stack.pop()
+            found.append(node)
+            for j in range(offsets[node], offsets[node + 1]):
+                t = targets[j]
+                if not visited[t]:
+                    visited[t] = 1
+                    stack.append(t)
+        return found
+
+    def closure(self, paths, reverse=False, include_roots=False):
+        # 一组根节点的并集闭包，总代价 O(V+E)
+        roots = [self.index[p] for p in paths if p in self.index]
+        visited = bytearray(len(self.nodes))
+        found = self._walk(roots, visited, reverse)
+        if not include_roots:
+            root_set = set(roots)
+            found = [n for n in found if n not in root_set]
+        return [self.nodes[n] for n in found]
+
+    def closure_each(self, paths, reverse=False):
+        # 每个根节点各自的闭包（不含自身），结果按节点缓存
+        cache = self._cache[1 if reverse else 0]
+        results = {}
+        for path in paths:
+            node = self.index.get(path)
+            if node is None:
+                continue
+            found = cache.get(node)
+            if found is None:
+                found = tuple(n for n in self._walk([node], bytearray(len(self.nodes)), reverse) if n != node)
+                if len(cache) >= self.CACHE_LIMIT:
+                    cache.clear()
+                cache[node] = found
+            results[path] = [self.nodes[n] for n in found]
+        return results
+
+    def find_cycles(self):
+        # Tarjan 强连通分量 (迭代版)，返回所有环（节点数>1 或自环的分量）
+        n = len(self.nodes)
+        offsets, targets = self.fwd_offsets, self.fwd_targets
+        index_of = [-1] * n
+        lowlink = [0] * n
+        on_stack = bytearray(n)
+        stack, cycles = [], []
+        counter = 0
+        for start in range(n):
+            if index_of[start] != -1:
+                continue
+            work = [(start, offsets[start])]
+            index_of[start] = lowlink[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack[start] = 1
+            while work:
+                node, j = work[-1]
+                if j < offsets[node + 1]:
+                    work[-1] = (node, j + 1)
+                    t = targets[j]
+                    if index_of[t] == -1:
+                        index_of[t] = lowlink[t] = counter
+                        counter += 1
+                        stack.append(t)
+                        on_stack[t] = 1
+                        work.append((t, offsets[t]))
+                    elif on_stack[t]:
+                        lowlink[node] = min(lowlink[node], index_of[t])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index_of[node]:
+                    component = []
+                    while True:
+                        t = stack.pop()
+                        on_stack[t] = 0
+                        component.append(t)
+                        if t == node:
+                            break
+                    self_loop = any(targets[j] == node for j in range(offsets[node], offsets[node + 1]))
+                    if len(component) > 1 or self_loop:
+                        cycles.append([self.nodes[c] for c in component])
+        return cycles
+
+class _Crc32:
+    # 让 zlib.crc32 拥有 hashlib 风格的接口
+    def __init__(self):
+        self._value = 0
+
+    def update(self, data):
+        self._value = zlib.crc32(data, self._value)
+
+    def hexdigest(self):
+        return f"{self._value:08x}"
+
+# 按哈希字符串长度推断算法
+_HASH_FACTORIES = {8: _Crc32, 32: hashlib.md5, 40: hashlib.sha1, 64: hashlib.sha256}
+
+def _hasher_for(hash_str):
+    factory = _HASH_FACTORIES.get(len(hash_str))
+    return factory() if factory else None
+
+def _hash_file_mmap(file_path, hasher, chunk_size=8 * 1024 * 1024):
+    # mmap 读取，分块喂给哈希对象；hashlib 在大块数据上会释放GIL，便于线程并行
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hasher.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                for offset in range(0, len(view), chunk_size):
+                    hasher.update(view[offset:offset + chunk_size])
+            finally:
+                view.release()
+    return hasher.hexdigest()
+
+
+# UnityFS 包头解析
+UNITYFS_SIGNATURE = b'UnityFS'
+_UNITYFS_COMPRESSION = {0: 'None', 1: 'LZMA', 2: 'LZ4', 3: 'LZ4HC', 4: 'LZHAM'}
+
+def _lz4_block_decompress(src, uncompressed_size):
+    # LZ4 块格式解码 (不含帧头)，UnityFS 的 LZ4/LZ4HC 都是这种格式
+    dst = bytearray()
+    i, n = 0, len(src)
+    while i < n:
+        token = src[i]
+        i += 1
+        literal_len = token >> 4
+        if literal_len == 15:
+            while True:
+                b = src[i]
+                i += 1
+                literal_len += b
+                if b != 255: break
+        dst += src[i:i + literal_len]
+        i += literal_len
+        if i >= n:
+            break
+        offset = src[i] | (src[i + 1] << 8)
+        i += 2
+        match_len = token & 15
+        if match_len == 15:
+            while True:
+                b = src[i]
+                i += 1
+                match_len += b
+                if b != 255: break
+        match_len += 4
+        start = len(dst) - offset
+        if offset <= 0 or start < 0:
+            raise ValueError("LZ4 数据损坏")
+        if offset >= match_len:
+            dst += dst[start:start + match_len]
+        else:
+            # 重叠复制等价于重复最后 offset 个字节
+            pattern = dst[start:]
+            repeats, remainder = divmod(match_len, offset)
+            dst += pattern * repeats + pattern[:remainder]
+    if len(dst) != uncompressed_size:
+        raise ValueError(f"LZ4 解压长度不符: {len(dst)} != {uncompressed_size}")
+    return bytes(dst)
+
+def _lzma_decompress_unity(src, uncompressed_size):
+    # Unity 的 LZMA: 5字节属性 + 原始 LZMA1 数据流
+    props = src[0]
+    lc, props = props % 9, props // 9
+    lp, pb = props % 5, props // 5
+    dict_size = struct.unpack_from('<I', src, 1)[0]
+    decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=[
+        {'id': lzma.FILTER_LZMA1, 'dict_size': dict_size, 'lc': lc, 'lp': lp, 'pb': pb}])
+    return decompressor.decompress(bytes(src[5:]), max_length=uncompressed_size)
+
+def _decompress_unity_block(data, compression, uncompressed_size):
+    if compression == 0:
+        return bytes(data)
+    if compression == 1:
+        return _lzma_decompress_unity(data, uncompressed_size)
+    if compression in (2, 3):
+        return _lz4_block_decompress(data, uncompressed_size)
+    raise ValueError(f"不支持的压缩类型: {_UNITYFS_COMPRESSION.get(compression, compression)}")
+
+def _find_unityfs_header(f, limit=None, chunk_size=64 * 1024):
+    # 分块读取定位 UnityFS 头，返回偏移，找不到返回 -1；limit 为最多读取的字节数
+    overlap = len(UNITYFS_SIGNATURE) - 1
+    tail, consumed = b'', 0
+    while limit is None or consumed < limit:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        buf = tail + chunk
+        index = buf.find(UNITYFS_SIGNATURE)
+        if index != -1:
+            return consumed - len(tail) + index
+        consumed += len(chunk)
+        tail = buf[-overlap:]
+    return -1
+
+_FICLONE = 0x40049409  # Linux ioctl: 写时复制克隆 (btrfs/xfs 等)
+
+def _reflink(src, dst):
+    import fcntl  # 仅 POSIX 可用
+    with open(src, 'rb') as f_src, open(dst, 'wb') as f_dst:
+        fcntl.ioctl(f_dst.fileno(), _FICLONE, f_src.fileno())
+
+def _link_or_copy(src, dst, mode):
+    # 输出与输入完全相同时使用；mode: 'copy' / 'hardlink' / 'reflink'，不支持时回退为复制
+    # 返回实际使用的方式
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if mode == 'hardlink':
+        try:
+            os.link(src, dst)
+            return 'hardlink'
+        except OSError:
+            pass
+    elif mode == 'reflink':
+        try:
+            _reflink(src, dst)
+            shutil.copystat(src, dst)
+            return 'reflink'
+        except (OSError, ImportError):
+            if os.path.exists(dst):
+                os.remove(dst)
+    shutil.copy2(src, dst)
+    return 'copy'
+
+class BundleStore:
+    # 按清单哈希寻址的共享输出存储，各版本的输出目录只是指向这里的链接
+    # 布局: <root>/<kind>/<哈希前两位>/<哈希><后缀>，kind 区分处理方式 (unityfs、lua21 等)
+    def __init__(self, root):
+        self.root = root
+        self._objects = {}
+        self._tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+    @staticmethod
+    def valid_hash(hash_val):
+        # 哈希直接用作文件名，只接受字母数字
+        return bool(hash_val) and hash_val.isascii() and hash_val.isalnum()
+
+    def _index(self, kind):
+        # 每种 kind 只扫描一次目录，之后在内存中查找
+        objects = self._objects.get(kind)
+        if objects is None:
+            objects = {}
+            kind_dir = os.path.join(self.root, kind)
+            if os.path.isdir(kind_dir):
+                for shard in os.scandir(kind_dir):
+                    if shard.is_dir():
+                        for entry in os.scandir(shard.path):
+                            objects[entry.name.split('.', 1)[0]] = entry.path
+            self._objects[kind] = objects
+        return objects
+
+    def get(self, kind, hash_val):
+        return self._index(kind).get(hash_val.lower())
+
+    def suffix(self, kind, hash_val):
+        return os.path.basename(self.get(kind, hash_val))[len(hash_val):]
+
+    def temp_path(self):
+        # 临时文件与存储在同一文件系统，put 时只需改名
+        fd, path = tempfile.mkstemp(dir=self._tmp_dir)
+        os.close(fd)
+        return path
+
+    def put(self, kind, hash_val, src, suffix=''):
+        hash_val = hash_val.lower()
+        shard_dir = os.path.join(self.root, kind, hash_val[:2])
+        os.makedirs(shard_dir, exist_ok=True)
+        path = os.path.join(shard_dir, hash_val + suffix)
+        shutil.move(src, path)
+        self._index(kind)[hash_val] = path
+        return path
+
+    def link_out(self, kind, hash_val, dst, mode='hardlink'):
+        return _link_or_copy(self.get(kind, hash_val), dst, mode)
+
+class BloomFilter:
+    # 每个数据库一个布隆过滤器 (<库>.bloom)：跨版本查询时先在内存里排除肯定不含该路径的版本
+    # 文件头记录数据库文件的签名，数据库被修改 (合并、批量修改) 后签名不符，视为过期
+    SUFFIX = '.bloom'
+    MAGIC = b'BLM1'
+    HEADER = struct.Struct('<QIQI')  # 位数, 哈希函数个数, 条目数, 数据库签名 crc32
+    DEFAULT_FP_RATE = 0.01
+
+    def __init__(self, capacity, fp_rate=DEFAULT_FP_RATE, signature=0):
+        capacity = max(1, capacity)
+        fp_rate = min(max(fp_rate, 1e-9), 0.5)
+        self.size = max(64, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self.signature = signature
+        self.bits = bytearray((self.size + 7) // 8)
+
+    @staticmethod
+    def _hash_pair(key):
+        # 双重哈希：一次 blake2b 得到两个 64 位值，第 i 个位置为 h1 + i * h2
+        h = int.from_bytes(hashlib.blake2b(key, digest_size=16).digest(), 'little')
+        return h & 0xFFFFFFFFFFFFFFFF, (h >> 64) | 1
+
+    def add(self, key):
+        h1, h2 = self._hash_pair(key)
+        bits, size = self.bits, self.size
+        for _ in range(self.hashes):
+            pos = h1 % size
+            bits[pos >> 3] |= 1 << (pos & 7)
+            h1 += h2
+        self.count += 1
+
+    def __contains__(self, key):
+        h1, h2 = self._hash_pair(key)
+        bits, size = self.bits, self.size
+        for _ in range(self.hashes):
+            pos = h1 % size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+            h1 += h2
+        return True
+
+    @staticmethod
+    def db_signature(db_path):
+        return zlib.crc32(repr(_db_signature(db_path)).encode('utf-8'))
+
+    @classmethod
+    def build(cls, db_path, fp_rate=DEFAULT_FP_RATE):
+        # 从数据库的全部键建立并保存过滤器
+        with dbm.open(db_path, 'r') as db:
+            keys = [k for k in db.keys() if not k.startswith(b'__')]
+        bloom = cls(len(keys), fp_rate, cls.db_signature(db_path))
+        for key in keys:
+            bloom.add(key)
+        bloom.save(db_path + cls.SUFFIX)
+        return bloom
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.MAGIC + self.HEADER.pack(self.size, self.hashes, self.count, self.signature))
+            f.write(self.bits)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != cls.MAGIC:
+            raise ValueError(f"不是布隆过滤器文件: {path}")
+        bloom = cls.__new__(cls)
+        bloom.size, bloom.hashes, bloom.count, bloom.signature = cls.HEADER.unpack_from(data, 4)
+        bloom.bits = bytearray(data[4 + cls.HEADER.size:])
+        if len(bloom.bits) != (bloom.size + 7) // 8:
+            raise ValueError(f"布隆过滤器文件不完整: {path}")
+        return bloom
+
+    @classmethod
+    def for_db(cls, db_path, fp_rate=DEFAULT_FP_RATE):
+        # 返回 (过滤器, 是否重建)；文件缺失、损坏或与数据库签名不符时重建
+        try:
+            bloom = cls.load(db_path + cls.SUFFIX)
+            if bloom.signature == cls.db_signature(db_path):
+                return bloom, False
+        except (OSError, ValueError, struct.error):
+            pass
+        return cls.build(db_path, fp_rate), True
+
+def _find_databases(directory):
+    # 目录中的 dbm 数据库 (按修改时间排序)；dbm.dumb 的 .dat/.dir 等文件归到同一个库名
+    candidates = set()
+    for name in os.listdir(directory):
+        for suffix in ('.dir', '.dat', '.bak', '.pag', '.db'):
+            if name.endswith(suffix):
+                candidates.add(name[:-len(suffix)])
+        candidates.add(name)
+    found = []
+    for name in candidates:
+        path = os.path.join(directory, name)
+        if not os.path.isdir(path) and dbm.whichdb(path):
+            found.append(path)
+    found.sort(key=lambda path: (max(mtime for _, mtime, _ in _db_signature(path)), path))
+    return found
+
+def _query_versions(db_paths, paths, blooms, fp_rate=BloomFilter.DEFAULT_FP_RATE):
+    # 跨版本查询路径是否存在：先查内存中的过滤器，只打开可能含有这些路径的库确认
+    # blooms 为 {库路径: 过滤器} 缓存，会被更新；返回 ({路径: [(库路径, 哈希, 大小)]}, 统计)
+    keys = [(path, path.encode('utf-8')) for path in paths]
+    hits = {path: [] for path in paths}
+    stats = {'versions': len(db_paths), 'opened': 0, 'false_positives': 0, 'rebuilt': 0}
+    for db_path in db_paths:
+        bloom = blooms.get(db_path)
+        if bloom is None or bloom.signature != BloomFilter.db_signature(db_path):
+            bloom, rebuilt = BloomFilter.for_db(db_path, fp_rate)
+            blooms[db_path] = bloom
+            stats['rebuilt'] += rebuilt
+        candidates = [(path, key) for path, key in keys if key in bloom]
+        if not candidates:
+            continue
+        stats['opened'] += 1
+        with dbm.open(db_path, 'r') as db:
+            for path, key in candidates:
+                value = db.get(key)
+                if value is None:
+                    stats['false_positives'] += 1
+                else:
+                    hits[path].append((db_path,) + _parse_value(value.decode('utf-8')))
+    _count_processed(records=len(db_paths) * len(paths))
+    return hits, stats
+
+class EditJournal:
+    # 批量修改的预写日志：先把解析好的全部新值写入 <库>.journal 并落盘，再一次性写库，写完删除日志
+    # 日志以提交标记结尾；打开库时发现完整的日志就重放 (重复写同一值无副作用)，不完整的日志说明还没动库，直接丢弃
+    SUFFIX = '.journal'
+    COMMIT = '{"commit": true}'
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.path = db_path + self.SUFFIX
+
+    def _write(self, values):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'db': os.path.basename(self.db_path), 'count': len(values)}) + "\n")
+            for key, value in values:
+                f.write(json.dumps([key, value], ensure_ascii=False) + "\n")
+            f.write(self.COMMIT + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _read(self):
+        # 返回 [(路径, 值)]；没有日志或日志不完整时返回 None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+        if len(lines) < 2 or lines[-1] != self.COMMIT:
+            return None
+        return [tuple(json.loads(line)) for line in lines[1:-1]]
+
+    def _clear(self):
+        for path in (self.path, self.path + '.tmp'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def recover(self):
+        # 重放上次未完成的批量修改，返回重放的条数
+        values = self._read()
+        if values:
+            with DatabaseBroker.for_path(self.db_path).write('w') as txn:
+                txn.update((key.encode('utf-8'), value.encode('utf-8')) for key, value in values)
+        self._clear()
+        return len(values) if values else 0
+
+    def apply(self, edits):
+        # edits: [(路径, 哈希, 大小)]，哈希或大小为空表示保留原值；返回 (更新, 新增, 未变)
+        self.recover()
+        updated, added, unchanged = 0, 0, 0
+        with DatabaseBroker.for_path(self.db_path).write() as txn:
+            # 同一路径出现多次时后面的覆盖前面的
+            values, olds = {}, {}
+            for path, hash_val, size in edits:
+                if path in values:
+                    current = values[path]
+                else:
+                    old = txn.get(path.encode('utf-8'))
+                    current = olds[path] = old.decode('utf-8') if old is not None else None
+                old_hash, old_size = current.split('|', 1) if current is not None and '|' in current else ('', '')
+                values[path] = f"{hash_val or old_hash}|{size or old_size}"
+            writes = []
+            for path, value in values.items():
+                old = olds[path]
+                if old is None:
+                    added += 1
+                elif old == value:
+                    unchanged += 1
+                    continue
+                else:
+                    updated += 1
+                writes.append((path, value))
+            if writes:
+                self._write(writes)
+                txn.update((path.encode('utf-8'), value.encode('utf-8')) for path, value in writes)
+        # 关闭 (写回索引) 之后才算提交完成
+        self._clear()
+        _count_processed(records=len(values))
+        return updated, added, unchanged
+
+def _read_patch_csv(csv_path):
+    # 读取 path,hash,size 三列的补丁 CSV (表头可选)，返回 ([(路径, 哈希, 大小)], 错误信息)
+    edits, errors = [], []
+    with open(csv_path, 'r', newline='', encoding='utf-8-sig') as f:
+        for line_no, row in enumerate(csv.reader(f), 1):
+            if not row or not row[0].strip():
+                continue
+            if line_no == 1 and row[0].strip().lower() in ('path', '路径'):
+                continue
+            path = row[0].strip()
+            hash_val = row[1].strip() if len(row) > 1 else ''
+            size = row[2].strip() if len(row) > 2 else ''
+            if not hash_val and not size:
+                errors.append(f"第 {line_no} 行: 哈希和大小都为空")
+                continue
+            edits.append((path, hash_val, size))
+    return edits, errors
+
+def _read_manifest(db_path):
+    # 路径 -> (哈希, 大小)，跳过 __ 开头的元数据
+    manifest = {}
+    with DatabaseBroker.for_path(db_path).read() as db:
+        for k in db.keys():
+            if not k.startswith(b'__'):
+                manifest[k.decode('utf-8')] = _parse_value(db[k].decode('utf-8'))
+    return manifest
+
+# 顶层键 -> 解析策略名，用于在完整解析前判断清单格式
+_MANIFEST_SNIFF_KEYS = {
+    'assetHashList': '_parse_asset_hash_list',
+    'm_InternalIds': '_parse_unity_addressables_catalog',
+    'm_KeyDataString': '_parse_unity_addressables_catalog',
+    'm_LocatorId': '_parse_unity_addressables_catalog',
+}
+_JSON_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]:]')
+
+@contextlib.contextmanager
+def _open_manifest(path):
+    # 按文件头识别 gzip / zip 压缩的清单，返回解压后的二进制流；zip 取第一个非目录成员
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+        f.seek(0)
+        if magic[:2] == b'\x1f\x8b':
+            with gzip.GzipFile(fileobj=f) as gz:
+                yield gz
+        elif magic == b'PK\x03\x04':
+            with zipfile.ZipFile(f) as zf:
+                member = next((i for i in zf.infolist() if not i.is_dir()), None)
+                if member is None:
+                    raise ValueError("压缩包中没有文件。")
+                with zf.open(member) as zf_member:
+                    yield zf_member
+        else:
+            yield f
+
+def _sniff_manifest_strategy(path, limit=64 * 1024):
+    # 只读取 (解压后的) 前 limit 字节，扫描顶层键；无法判断时返回 None
+    with _open_manifest(path) as f:
+        head = f.read(limit)
+    text = head.decode('utf-8-sig', 'ignore')
+    depth, pending_key = 0, None
+    for m in _JSON_TOKEN_RE.finditer(text):
+        token = m.group()
+        if token in '{[':
+            depth += 1
+        elif token in '}]':
+            depth -= 1
+        elif token == ':':
+            if depth == 1 and pending_key in _MANIFEST_SNIFF_KEYS:
+                return _MANIFEST_SNIFF_KEYS[pending_key]
+        if token[0] == '"' and depth == 1:
+            pending_key = token[1:-1]
+        elif token != ':':
+            pending_key = None
+    return None
+
+def _parse_manifest_file(path):
+    # 先嗅探格式，优先尝试对应的策略；返回值同 _parse_manifest_data
+    preferred = _sniff_manifest_strategy(path)
+    with _open_manifest(path) as f:
+        data = json.load(f)
+    return _parse_manifest_data(data, preferred)
+
+def _parse_manifest_data(data, preferred=None):
+    # 依次尝试各解析策略 (preferred 优先)，返回 (条目, 策略名, 失败信息)；都不认识时条目为 None
+    errors = []
+    strategies = [AssetAnalyzerApp._parse_asset_hash_list, AssetAnalyzerApp._parse_unity_addressables_catalog]
+    strategies.sort(key=lambda strategy: strategy.__name__ != preferred)
+    for strategy in strategies:
+        try:
+            items = strategy(data)
+        except Exception as e:
+            errors.append(f"策略 '{strategy.__name__}' 执行失败: {e}")
+            continue
+        if items:
+            return items, strategy.__name__, errors
+    return None, None, errors
+
+def _write_manifest_db(db_path, items, strategy_name, flag='c', fp_rate=BloomFilter.DEFAULT_FP_RATE):
+    # 返回写入的资源条目数 (不含 __ 元数据)；同时在旁边保存该库的布隆过滤器
+    with DatabaseBroker.for_path(db_path).write(flag) as txn:
+        txn.set(b'__parsing_strategy__', strategy_name.encode('utf-8'))
+        txn.update((path.encode('utf-8'), value.encode('utf-8')) for path, value in items)
+        keys = [k for k in txn.keys() if not k.startswith(b'__')]
+    # 签名要在关闭 (写回索引) 之后取
+    bloom = BloomFilter(len(keys), fp_rate, BloomFilter.db_signature(db_path))
+    for key in keys:
+        bloom.add(key)
+    bloom.save(db_path + BloomFilter.SUFFIX)
+    return sum(1 for path, _ in items if not path.startswith('__'))
+
+def _ingest_manifest_file(json_path, db_path):
+    # 进程池任务：解析一个清单写入独立的数据库 (已存在则覆盖)，返回汇总行
+    start = time.perf_counter()
+    items, strategy_name, errors = _parse_manifest_file(json_path)
+    if not items:
+        raise ValueError("不认识这个JSON文件格式。" + (f" ({errors[-1]})" if errors else ""))
+    total = _write_manifest_db(db_path, items, strategy_name, flag='n')
+    total_bytes = sum(_parse_value(value)[1] for path, value in items if not path.startswith('__'))
+    return {'json': json_path, 'db': db_path, 'strategy': strategy_name, 'entries': total,
+            'bytes': total_bytes, 'seconds': time.perf_counter() - start}
+
+def _read_cstring(buf, pos):
+    end = buf.index(b'\x00', pos)
+    return bytes(buf[pos:end]).decode('utf-8', 'replace'), end + 1
+
+def _read_unityfs_index(file_path):
+    # 读取 UnityFS 包头与目录表 (blocks info)，不解压数据块
+    with open(file_path, 'rb') as f:
+        base = _find_unityfs_header(f, limit=1024 * 1024)
+        if base == -1:
+            return None
+        file_size = os.fstat(f.fileno()).st_size
+        f.seek(base)
+        head = f.read(4096)
+        pos = len(UNITYFS_SIGNATURE) + 1
+        version = struct.unpack_from('>I', head, pos)[0]
+        pos += 4
+        unity_version, pos = _read_cstring(head, pos)
+        unity_revision, pos = _read_cstring(head, pos)
+        bundle_size, compressed_size, uncompressed_size, flags = struct.unpack_from('>qIII', head, pos)
+        pos += 20
+        if version >= 7:
+            pos = (pos + 15) & ~15
+        if flags & 0x80:
+            # 目录表位于文件末尾
+            f.seek(file_size - compressed_size)
+        else:
+            f.seek(base + pos)
+        blocks_info = _decompress_unity_block(f.read(compressed_size), flags & 0x3F, uncompressed_size)
+
+    pos = 16  # 跳过未压缩数据的哈希
+    block_count = struct.unpack_from('>i', blocks_info, pos)[0]
+    pos += 4
+    blocks = [list(b) for b in struct.iter_unpack('>IIH', blocks_info[pos:pos + block_count * 10])]
+    pos += block_count * 10
+    node_count = struct.unpack_from('>i', blocks_info, pos)[0]
+    pos += 4
+    entries = []
+    for _ in range(node_count):
+        offset, size, node_flags = struct.unpack_from('>qqI', blocks_info, pos)
+        name, pos = _read_cstring(blocks_info, pos + 20)
+        entries.append([name, offset, size, node_flags])
+    return {
+        'header_offset': base,
+        'version': version,
+        'unity_version': unity_version,
+        'unity_revision': unity_revision,
+        'size': bundle_size,
+        'flags': flags,
+        'info_compression': _UNITYFS_COMPRESSION.get(flags & 0x3F, str(flags & 0x3F)),
+        'data_compression': _UNITYFS_COMPRESSION.get(blocks[0][2] & 0x3F, '?') if blocks else 'None',
+        'blocks': blocks,
+        'entries': entries,
+    }
+
+
+LUAJIT_SIGNATURE = b'\x1bLJ'
+_LJ_FLAG_BE, _LJ_FLAG_STRIP = 0x01, 0x02
+_LJ_KGC_CHILD, _LJ_KGC_TAB, _LJ_KGC_COMPLEX, _LJ_KGC_STR = 0, 1, 4, 5
+_LJ_KTAB_INT, _LJ_KTAB_NUM, _LJ_KTAB_STR = 3, 4, 5
+_LJ_VARNAME_MAX = 7  # 小于此值的是内置变量名 (for 循环计数器等)
+
+def _read_uleb128(buf, pos):
+    value = buf[pos]
+    pos += 1
+    if value >= 0x80:
+        value &= 0x7f
+        shift = 7
+        while True:
+            byte = buf[pos]
+            pos += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+    return value, pos
+
+def _skip_uleb128_33(buf, pos):
+    # 数字常量：首字节最低位表示是否为浮点 (浮点还有一个高32位的 ULEB128)
+    is_num = buf[pos] & 1
+    value = buf[pos] >> 1
+    pos += 1
+    if value >= 0x40:
+        while buf[pos] >= 0x80:
+            pos += 1
+        pos += 1
+    if is_num:
+        _, pos = _read_uleb128(buf, pos)
+    return pos
+
+def _read_luajit_ktab_value(buf, pos, strings):
+    # 常量表的键或值；字符串追加到 strings
+    tp, pos = _read_uleb128(buf, pos)
+    if tp >= _LJ_KTAB_STR:
+        end = pos + tp - _LJ_KTAB_STR
+        strings.append(bytes(buf[pos:end]).decode('utf-8', 'replace'))
+        return end
+    if tp == _LJ_KTAB_INT:
+        return _read_uleb128(buf, pos)[1]
+    if tp == _LJ_KTAB_NUM:
+        return _read_uleb128(buf, _read_uleb128(buf, pos)[1])[1]
+    return pos  # nil/false/true
+
+def _parse_luajit_debug(debug, numbc, numuv, numline, byteorder):
+    # 行号表之后依次是上值名和局部变量名，均以 \0 结尾
+    width = 1 if numline < 256 else 2 if numline < 65536 else 4
+    pos = numbc * width
+    if width == 1:
+        lineinfo = list(debug[:pos])
+    else:
+        lineinfo = [int.from_bytes(debug[i:i + width], byteorder) for i in range(0, pos, width)]
+    names = []
+    for _ in range(numuv):
+        name, pos = _read_cstring(debug, pos)
+        names.append(name)
+    while pos < len(debug) and debug[pos] != 0:
+        if debug[pos] >= _LJ_VARNAME_MAX:
+            name, pos = _read_cstring(debug, pos)
+            names.append(name)
+        else:
+            pos += 1
+        pos = _read_uleb128(debug, _read_uleb128(debug, pos)[1])[1]
+    return lineinfo, names
+
+def _parse_luajit_dump(data):
+    # 解析 LuaJIT 2.0/2.1 字节码转储的文件头与所有函数原型，不反汇编指令
+    # 返回 {'version', 'flags', 'chunkname', 'protos': [...]}，原型按转储顺序 (子函数在前)
+    buf = memoryview(data)
+    if bytes(buf[:3]) != LUAJIT_SIGNATURE:
+        raise ValueError("不是 LuaJIT 字节码")
+    version = buf[3]
+    if version not in (1, 2):
+        raise ValueError(f"不支持的 LuaJIT 字节码版本: {version}")
+    flags, pos = _read_uleb128(buf, 4)
+    stripped = bool(flags & _LJ_FLAG_STRIP)
+    byteorder = 'big' if flags & _LJ_FLAG_BE else 'little'
+    chunkname = ''
+    if not stripped:
+        length, pos = _read_uleb128(buf, pos)
+        chunkname = bytes(buf[pos:pos + length]).decode('utf-8', 'replace')
+        pos += length
+
+    protos, stack = [], []
+    while pos < len(buf):
+        length, pos = _read_uleb128(buf, pos)
+        if length == 0:
+            break
+        end = pos + length
+        if end > len(buf):
+            raise ValueError("字节码被截断")
+        proto_flags, numparams, _framesize, numuv = buf[pos:pos + 4]
+        pos += 4
+        sizekgc, pos = _read_uleb128(buf, pos)
+        sizekn, pos = _read_uleb128(buf, pos)
+        sizebc, pos = _read_uleb128(buf, pos)
+        sizedbg, firstline, numline = 0, 0, 0
+        if not stripped:
+            sizedbg, pos = _read_uleb128(buf, pos)
+            if sizedbg:
+                firstline, pos = _read_uleb128(buf, pos)
+                numline, pos = _read_uleb128(buf, pos)
+        pos += sizebc * 4 + numuv * 2  # 指令与上值描述
+
+        strings, children = [], []
+        for _ in range(sizekgc):
+            tp, pos = _read_uleb128(buf, pos)
+            if tp >= _LJ_KGC_STR:
+                str_end = pos + tp - _LJ_KGC_STR
+                strings.append(bytes(buf[pos:str_end]).decode('utf-8', 'replace'))
+                pos = str_end
+            elif tp == _LJ_KGC_CHILD:
+                children.append(stack.pop())
+            elif tp == _LJ_KGC_TAB:
+                narray, pos = _read_uleb128(buf, pos)
+                nhash, pos = _read_uleb128(buf, pos)
+                for _ in range(narray + nhash * 2):
+                    pos = _read_luajit_ktab_value(buf, pos, strings)
+            else:
+                # 64位整数 (2个 ULEB128) 或复数 (4个)
+                for _ in range(4 if tp == _LJ_KGC_COMPLEX else 2):
+                    pos = _read_uleb128(buf, pos)[1]
+        for _ in range(sizekn):
+            pos = _skip_uleb128_33(buf, pos)
+
+        lineinfo, names = [], []
+        if sizedbg:
+            lineinfo, names = _parse_luajit_debug(bytes(buf[pos:pos + sizedbg]), sizebc, numuv, numline, byteorder)
+        stack.append(len(protos))
+        protos.append({
+            'flags': proto_flags,
+            'params': numparams,
+            'upvalues': numuv,
+            'instructions': sizebc,
+            'firstline': firstline,
+            'numline': numline,
+            'lineinfo': lineinfo,
+            'names': names,
+            'strings': strings,
+            'children': children,
+        })
+        pos = end
+    return {'version': version, 'flags': flags, 'chunkname': chunkname, 'protos': protos}
+
+def _dump_luajit_strings(input_path, output_path):
+    # 进程池任务：提取一个文件的字符串常量，写出 Lua 风格的文本，返回 CSV 行
+    with open(input_path, 'rb') as f:
+        content = f.read()
+    index = content.find(LUAJIT_SIGNATURE)
+    if index == -1:
+        return None
+    dump = _parse_luajit_dump(memoryview(content)[index:])
+    rows = []
+    lines = [f"-- chunk: {dump['chunkname'] or '(stripped)'}  LuaJIT {'2.1' if dump['version'] == 2 else '2.0'}"]
+    for i, proto in enumerate(dump['protos']):
+        lastline = proto['firstline'] + proto['numline']
+        lines.append(f"\n-- function #{i} lines {proto['firstline']}-{lastline} "
+                     f"params {proto['params']} upvalues {proto['upvalues']}")
+        if proto['names']:
+            lines.append(f"-- names: {', '.join(proto['names'])}")
+        for text in proto['strings']:
+            lines.append(json.dumps(text, ensure_ascii=False))
+            rows.append((i, proto['firstline'], lastline, text))
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    return rows
+
+
+class KeywordMatcher:
+    # Aho-Corasick 自动机：所有关键字一起建成字典树加失败指针，一遍扫描文本即可找出全部命中
+    # 扫描代价与文本总长度成正比，与关键字数量无关；匹配不区分大小写，与普通搜索一致
+    def __init__(self, keywords):
+        self.keywords = []
+        self.goto = [{}]   # 节点 -> {字符: 子节点}
+        self.fail = [0]
+        self.out = [()]    # 节点 -> 在此结束的关键字序号 (已合并失败链上的输出)
+        seen = set()
+        for keyword in keywords:
+            keyword = keyword.strip().lower()
+            if not keyword or keyword in seen:
+                continue
+            seen.add(keyword)
+            node = 0
+            for ch in keyword:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = self.goto[node][ch] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                node = nxt
+            self.out[node] = (len(self.keywords),)
+            self.keywords.append(keyword)
+        self._link()
+
+    def _link(self):
+        # 按层 (BFS) 计算失败指针，父节点的失败指针总是先算好
+        goto, fail, out = self.goto, self.fail, self.out
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(ch, 0)
+                fail[child] = target if target != child else 0
+                if out[fail[child]]:
+                    out[child] = out[child] + out[fail[child]]
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def scan(self, texts):
+        # 逐个文本产出 (文本序号, 命中的关键字序号集合)，只产出有命中的文本
+        goto, fail, out = self.goto, self.fail, self.out
+        for i, text in enumerate(texts):
+            found = None
+            state = 0
+            for ch in text.lower():
+                nxt = goto[state].get(ch)
+                while nxt is None and state:
+                    state = fail[state]
+                    nxt = goto[state].get(ch)
+                state = nxt or 0
+                if out[state]:
+                    if found is None:
+                        found = set(out[state])
+                    else:
+                        found.update(out[state])
+            if found is not None:
+                yield i, found
+
+
+def _read_keyword_file(path):
+    # 每行一个关键字；CSV 只取第一列，可以直接用 Bug 单或本地化表导出的文件
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        if path.lower().endswith('.csv'):
+            return [row[0] for row in csv.reader(f) if row]
+        return f.read().splitlines()
+
+
+class TextIndex:
+    # 目录下文本文件 (反编译输出、提取的字符串) 的倒排索引: 词 -> {相对路径: [行号]}
+    # 索引文件保存在目录内，按 mtime/大小判断变化，内容哈希相同的只更新 mtime
+    INDEX_NAME = '.text_index.json'
+    SUFFIXES = ('.lua', '.txt', '.json')
+    _TOKEN_RE = re.compile(r'[0-9a-z_]+|[\u3400-\u9fff\uf900-\ufaff]+')
+
+    def __init__(self, root):
+        self.root = root
+        self.files = {}     # 相对路径 -> [mtime_ns, 大小, sha1, {词: [行号]}]
+        self.postings = {}  # 词 -> {相对路径: [行号]}
+
+    @classmethod
+    def tokenize(cls, text):
+        # 英文按标识符切分；中文没有分隔符，按相邻两字切分
+        tokens = []
+        for match in cls._TOKEN_RE.finditer(text.lower()):
+            token = match.group()
+            if token[0] < '\u3400' or len(token) == 1:
+                tokens.append(token)
+            else:
+                tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+        return tokens
+
+    @classmethod
+    def load(cls, root):
+        index = cls(root)
+        index_path = os.path.join(root, cls.INDEX_NAME)
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    index.files = json.load(f)['files']
+            except (OSError, ValueError, KeyError):
+                index.files = {}  # 索引损坏时全部重建
+        for rel_path, entry in index.files.items():
+            index._add_postings(rel_path, entry[3])
+        return index
+
+    def save(self):
+        with open(os.path.join(self.root, self.INDEX_NAME), 'w', encoding='utf-8') as f:
+            json.dump({'files': self.files}, f, ensure_ascii=False)
+
+    def _add_postings(self, rel_path, tokens):
+        for token, lines in tokens.items():
+            self.postings.setdefault(token, {})[rel_path] = lines
+
+    def _remove_postings(self, rel_path):
+        for token in self.files[rel_path][3]:
+            files = self.postings.get(token)
+            if files is not None:
+                files.pop(rel_path, None)
+                if not files:
+                    del self.postings[token]
+
+    def _scan(self):
+        on_disk = {}
+        stack = [self.root]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif (entry.name.lower().endswith(self.SUFFIXES) and entry.name != self.INDEX_NAME
+                          and entry.is_file()):
+                        rel_path = os.path.relpath(entry.path, self.root).replace(os.sep, '/')
+                        on_disk[rel_path] = entry
+        return on_disk
+
+    def update(self, progress_queue=None):
+        # 返回 (新增或重新索引, 仅更新 mtime, 删除, 未变化) 的文件数
+        on_disk = self._scan()
+        reindexed, touched, unchanged = 0, 0, 0
+        removed = [rel_path for rel_path in self.files if rel_path not in on_disk]
+        for rel_path in removed:
+            self._remove_postings(rel_path)
+            del self.files[rel_path]
+        total = len(on_disk)
+        for i, (rel_path, entry) in enumerate(on_disk.items()):
+            st = entry.stat()
+            old = self.files.get(rel_path)
+            if old and old[0] == st.st_mtime_ns and old[1] == st.st_size:
+                unchanged += 1
+                continue
+            with open(entry.path, 'rb') as f:
+                content = f.read()
+            _count_processed(records=1, nbytes=len(content))
+            digest = hashlib.sha1(content).hexdigest()
+            if old and old[2] == digest:
+                old[0], old[1] = st.st_mtime_ns, st.st_size
+                touched += 1
+                continue
+            tokens = {}
+            for line_no, line in enumerate(content.decode('utf-8', 'replace').splitlines(), 1):
+                for token in set(self.tokenize(line)):
+                    tokens.setdefault(token, []).append(line_no)
+            if old:
+                self._remove_postings(rel_path)
+            self.files[rel_path] = [st.st_mtime_ns, st.st_size, digest, tokens]
+            self._add_postings(rel_path, tokens)
+            reindexed += 1
+            if progress_queue and i % 200 == 0:
+                progress_queue.put(('progress', (i + 1) / total * 100))
+        return reindexed, touched, len(removed), unchanged
+
+    def search(self, query, limit=1000):
+        # 所有词出现在同一行才算命中；返回 [(相对路径, 行号)]
+        tokens = set(self.tokenize(query))
+        if not tokens:
+            return []
+        token_files = sorted((self._token_postings(token) for token in tokens), key=len)
+        hits = []
+        for rel_path, lines in token_files[0].items():
+            common = set(lines)
+            for files in token_files[1:]:
+                other = files.get(rel_path)
+                if other is None:
+                    common = None
+                    break
+                common.intersection_update(other)
+                if not common:
+                    break
+            if common:
+                hits.extend((rel_path, line_no) for line_no in common)
+        hits.sort()
+        return hits[:limit]
+
+    def _token_postings(self, token):
+        # 连续的中文只按两字切分建索引，单个汉字的查询要合并所有包含它的两字词
+        if len(token) != 1 or token < '\u3400':
+            return self.postings.get(token, {})
+        merged = {}
+        for key, files in self.postings.items():
+            if token in key and (len(key) == 1 or key[0] >= '\u3400'):
+                for rel_path, lines in files.items():
+                    merged.setdefault(rel_path, set()).update(lines)
+        return merged
+
+    def read_lines(self, hits):
+        # 为命中结果读取行内容，每个文件只读一次
+        texts = {}
+        by_file = {}
+        for rel_path, line_no in hits:
+            by_file.setdefault(rel_path, []).append(line_no)
+        for rel_path, line_nos in by_file.items():
+            try:
+                with open(os.path.join(self.root, rel_path), 'r', encoding='utf-8', errors='replace') as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                continue
+            for line_no in line_nos:
+                if line_no <= len(lines):
+                    texts[(rel_path, line_no)] = lines[line_no - 1].strip()
+        return texts
+
+
+class TaskMetrics:
+    # 后台任务的性能统计：墙钟时间、线程CPU时间、内存峰值、处理的记录数/字节数
+    _local = threading.local()
+    # tracemalloc 是进程级的：按引用计数启停，最后一个记录内存的任务结束时才停止
+    _tracing_lock = threading.Lock()
+    _tracing_users = 0
+    _tracing_owned = False
+
+    def __init__(self, name, trace_memory=False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.records = 0
+        self.bytes = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_memory = None
+        self.error = None
+
+    @classmethod
+    def current(cls):
+        return getattr(cls._local, 'metrics', None)
+
+    def __enter__(self):
+        if self.trace_memory:
+            # 并发任务时峰值为这段时间内的全局值；只有自己在记录时才重置峰值，不影响其他任务
+            with TaskMetrics._tracing_lock:
+                if TaskMetrics._tracing_users == 0:
+                    if tracemalloc.is_tracing():
+                        tracemalloc.reset_peak()
+                    else:
+                        tracemalloc.start()
+                        TaskMetrics._tracing_owned = True
+                TaskMetrics._tracing_users += 1
+        TaskMetrics._local.metrics = self
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall = time.perf_counter() - self._wall_start
+        self.cpu = time.thread_time() - self._cpu_start
+        TaskMetrics._local.metrics = None
+        if self.trace_memory:
+            with TaskMetrics._tracing_lock:
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+                TaskMetrics._tracing_users -= 1
+                if TaskMetrics._tracing_users == 0 and TaskMetrics._tracing_owned:
+                    tracemalloc.stop()
+                    TaskMetrics._tracing_owned = False
+        if exc is not None:
+            self.error = exc
+        return False
+
+    def format(self):
+        fields = [f"task={json.dumps(self.name, ensure_ascii=False)}",
+                  f"wall_s={self.wall:.3f}", f"cpu_s={self.cpu:.3f}",
+                  f"records={self.records}", f"bytes={self.bytes}"]
+        if self.peak_memory is not None:
+            fields.append(f"peak_mem={self.peak_memory}")
+        if self.records and self.wall > 0:
+            fields.append(f"records_per_s={self.records / self.wall:.0f}")
+        fields.append("status=" + ("error" if self.error else "ok"))
+        return "[perf] " + " ".join(fields)
+
+def _count_processed(records=0, nbytes=0):
+    # worker 中调用，累加到当前线程正在统计的任务上；不在任务中时无作用
+    metrics = TaskMetrics.current()
+    if metrics is not None:
+        metrics.records += records
+        metrics.bytes += nbytes
+
+class AsyncLogWriter:
+    # 日志写入线程：调用方只把记录放进队列，格式化、写文件和 flush 都在后台线程里成批完成
+    # 文件超过 max_bytes 时轮转为 <名>.1 ... <名>.<backup_count>
+    def __init__(self, log_dir="logs", json_lines=False, max_bytes=10 * 1024 * 1024, backup_count=5, flush_interval=0.5):
+        os.makedirs(log_dir, exist_ok=True)
+        ext = '.jsonl' if json_lines else '.txt'
+        self.path = os.path.join(log_dir, f"log_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}")
+        self.json_lines = json_lines
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.SimpleQueue()
+        # 二进制模式自己统计大小；文本模式的 tell() 会触发 flush
+        self._file = open(self.path, 'wb')
+        self._size = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message, level='INFO'):
+        # 热路径：只记下时间和线程名，不做格式化和 I/O
+        if not self._closed:
+            self._queue.put((time.time(), level, threading.current_thread().name, message))
+
+    def write_many(self, messages, level='INFO'):
+        # 大量同类记录 (如详细日志的逐条键名) 只入队一次
+        if not self._closed:
+            self._queue.put((time.time(), level, threading.current_thread().name, messages))
+
+    def _format(self, record):
+        ts, level, thread_name, message = record
+        messages = [message] if isinstance(message, str) else message
+        if self.json_lines:
+            stamp = datetime.fromtimestamp(ts).isoformat(timespec='milliseconds')
+            return "".join(json.dumps({'ts': stamp, 'level': level, 'thread': thread_name, 'msg': m},
+                                      ensure_ascii=False) + "\n" for m in messages)
+        stamp = datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+        prefix = f"[{stamp}] " if level == 'INFO' else f"[{stamp}] [{level}] "
+        return "".join(f"{prefix}{m}\n" for m in messages)
+
+    def _rotate(self):
+        self._file.close()
+        try:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            if self.backup_count > 0:
+                os.replace(self.path, f"{self.path}.1")
+        finally:
+            # 改名失败时接着写原文件，不丢后面的记录
+            self._file = open(self.path, 'ab')
+            self._size = self._file.tell()
+
+    def _run(self):
+        running = True
+        while running:
+            try:
+                records = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            # 取空队列后一次写入、一次 flush
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # 逐条处理错误：一条写不进去 (磁盘满、轮转失败) 不能连带丢掉结束标记，否则 close() 会一直等
+            error = None
+            for record in records:
+                if record is None:
+                    running = False
+                    continue
+                try:
+                    data = self._format(record).encode('utf-8')
+                    self._file.write(data)
+                    self._size += len(data)
+                except Exception as e:
+                    self.dropped += 1
+                    error = e
+                    continue
+                if self.max_bytes and self._size >= self.max_bytes:
+                    try:
+                        self._rotate()
+                    except Exception as e:
+                        error = e
+            try:
+                self._file.flush()
+            except Exception as e:
+                error = e
+            if error is not None:
+                print(f"日志写入失败: {error}")
+        with contextlib.suppress(Exception):
+            self._file.close()
+
+    def close(self, timeout=5.0):
+        # 写完队列中剩余的记录后关闭文件；在界面线程调用，最多等 timeout 秒
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+class ManifestWatcher:
+    # 轮询资源目录中的清单文件，只比较 os.scandir 的 stat (修改时间、大小)，不读内容
+    # 新增或修改的清单在两次轮询间 stat 不变 (已写完) 后入库，并与上一次入库的版本对比
+    STATE_NAME = 'watch_state.json'
+
+    def __init__(self, watch_dir, db_dir, pattern, ingest, on_event, interval=2.0):
+        # ingest(json_path, db_path) -> (db_path, 条目数)；on_event(类型, 内容) 在监视线程中调用
+        self.watch_dir = watch_dir
+        self.db_dir = db_dir
+        self.pattern = pattern
+        self.ingest = ingest
+        self.on_event = on_event
+        self.interval = interval
+        self.state = {'seen': {}, 'last_db': None}  # seen: 文件名 -> [mtime_ns, 大小]
+        self._pending = {}
+        self._stop = threading.Event()
+        self._thread = None
+        state_path = os.path.join(db_dir, self.STATE_NAME)
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self.state.update(json.load(f))
+
+    def _save_state(self):
+        with open(os.path.join(self.db_dir, self.STATE_NAME), 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+
+    def scan(self):
+        found = {}
+        with os.scandir(self.watch_dir) as it:
+            for entry in it:
+                if fnmatch.fnmatch(entry.name, self.pattern) and entry.is_file():
+                    st = entry.stat()
+                    found[entry.name] = [st.st_mtime_ns, st.st_size]
+        return found
+
+    def initialize(self, baseline_db=None):
+        # 第一次监视该目录：已有清单视为已处理；没有基准库时把最新的一个清单入库作为基准
+        if self.state['seen'] or self.state['last_db']:
+            return
+        found = self.scan()
+        newest = max(found, key=lambda name: found[name][0]) if found and not baseline_db else None
+        for name, stat in found.items():
+            if name != newest:
+                self.state['seen'][name] = stat
+        self.state['last_db'] = baseline_db
+        self._save_state()
+
+    def poll(self):
+        # 一次轮询，返回本次入库的清单名
+        found = self.scan()
+        ready = []
+        for name, stat in found.items():
+            if self.state['seen'].get(name) == stat:
+                continue
+            if self._pending.get(name) == stat:
+                ready.append(name)
+            else:
+                self._pending[name] = stat
+        for name in sorted(ready, key=lambda name: found[name][0]):
+            # 停止后不再开始新的入库 (正在入库的那个会做完)
+            if self._stop.is_set():
+                break
+            del self._pending[name]
+            self._process(name, found[name])
+        return ready
+
+    def _process(self, name, stat):
+        json_path = os.path.join(self.watch_dir, name)
+        db_path = os.path.join(self.db_dir, f"{os.path.splitext(name)[0]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.dbm")
+        previous = self.state['last_db']
+        self.on_event('log', f"检测到新清单: {name}，开始入库...")
+        # 无论成功与否都记下 stat，文件再次修改时才重试
+        self.state['seen'][name] = stat
+        metrics = TaskMetrics(f"watch:{name}")
+        try:
+            with metrics:
+                _, total = self.ingest(json_path, db_path)
+                diff, report_path = None, None
+                if previous and dbm.whichdb(previous):
+                    diff = _diff_databases(previous, db_path)
+                    report_path = os.path.splitext(db_path)[0] + '_diff.txt'
+                    with open(report_path, 'w', encoding='utf-8') as f:
+                        f.write(f"旧版: {previous}\n新版: {db_path}\n\n")
+                        f.write(diff['plan'].format_report() + "\n\n" + diff['changes'].format_report() + "\n")
+        except Exception as e:
+            self._save_state()
+            self.on_event('error', f"{name} 入库失败: {e}")
+            return
+        finally:
+            self.on_event('log', metrics.format())
+        self.state['last_db'] = db_path
+        self._save_state()
+        self.on_event('ingested', {'name': name, 'db_path': db_path, 'total': total, 'previous': previous,
+                                   'diff': diff, 'report_path': report_path})
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self.on_event('error', f"轮询失败: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # 只发出停止信号，不等待 (正在入库时可能要很久)；用 is_alive() 判断线程是否已退出
+        self._stop.set()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+def _db_signature(db_path):
+    # 数据库文件的 (名称, mtime_ns, 大小)；不同 dbm 后端的文件名不同，存在的都算上
+    signature = []
+    for suffix in ('', '.db', '.dat', '.dir', '.pag'):
+        try:
+            st = os.stat(db_path + suffix)
+        except OSError:
+            continue
+        signature.append((suffix, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+class _ReadWriteLock:
+    # 读写锁：读者共享，写者独占；有写者等待时新读者排队，避免写者饿死
+    # 同一线程内读锁可重入 (读操作中调用的函数可能再次读取)
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def shared(self):
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            with self._cond:
+                while self._writer or self._waiting_writers:
+                    self._cond.wait()
+                self._readers += 1
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                with self._cond:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+class DatabaseBroker:
+    # 同一数据库文件的所有访问都经过这里 (每个文件一个实例)
+    # 读：主线程 (界面上的查询) 缓存一个只读句柄，数据库被改动 (签名或写入代数变化) 后丢弃重开；
+    # 后台任务和 HTTP 请求的线程用完即关 (这些线程每次都是新建的，缓存不到)
+    # 写：单一写入者；事务内的修改先暂存在内存，提交时写进数据库的影子副本，
+    # 只在换入副本时加独占锁，读者看到的要么是写入前、要么是写入后的完整内容，且不会被整个写入过程挡住
+    SUFFIXES = ('', '.db', '.dat', '.dir', '.pag', '.bak')
+    # sqlite3 后端读时留下的日志文件；副本换入后旧日志不属于新文件，必须删掉
+    SIDE_FILES = ('-wal', '-shm', '-journal')
+    _brokers = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.generation = 0
+        self._rw = _ReadWriteLock()
+        self._write_lock = threading.Lock()
+        self._local = threading.local()  # .entry = (句柄, 代数, 签名)
+
+    @classmethod
+    def for_path(cls, db_path):
+        key = os.path.normcase(os.path.abspath(db_path))
+        with cls._registry_lock:
+            broker = cls._brokers.get(key)
+            if broker is None:
+                broker = cls._brokers[key] = cls(db_path)
+            return broker
+
+    @classmethod
+    def trim(cls, keep=()):
+        # 关闭 keep 之外的数据库的缓存句柄 (dbm.dumb 的句柄持有整个索引，占内存)；只有主线程缓存句柄
+        keep = {os.path.normcase(os.path.abspath(path)) for path in keep if path}
+        with cls._registry_lock:
+            brokers = [broker for key, broker in cls._brokers.items() if key not in keep]
+        for broker in brokers:
+            broker.close_idle()
+
+    def close_idle(self):
+        entry = getattr(self._local, 'entry', None)
+        self._local.entry = None
+        if entry is not None:
+            entry[0].close()
+
+    def _acquire(self):
+        signature = _db_signature(self.db_path)
+        entry = getattr(self._local, 'entry', None)
+        self._local.entry = None
+        if entry is not None:
+            if entry[1] == self.generation and entry[2] == signature:
+                return entry
+            entry[0].close()
+        return dbm.open(self.db_path, 'r'), self.generation, signature
+
+    def _release(self, handle, generation, signature):
+        # gdbm 的只读句柄持有文件锁，会挡住写入者，不缓存
+        if (threading.current_thread() is threading.main_thread()
+                and generation == self.generation and getattr(self._local, 'entry', None) is None
+                and dbm.whichdb(self.db_path) != 'dbm.gnu'):
+            self._local.entry = (handle, generation, signature)
+        else:
+            handle.close()
+
+    @contextlib.contextmanager
+    def read(self):
+        with self._rw.shared():
+            entry = self._acquire()
+            try:
+                yield entry[0]
+            finally:
+                self._release(*entry)
+
+    @contextlib.contextmanager
+    def write(self, flag='c'):
+        # 返回 _WriteTxn；同一时刻只有一个写事务，事务中出现异常时暂存的修改全部放弃
+        with self._write_lock:
+            txn = _WriteTxn(self, flag)
+            yield txn
+            # 影子副本放在同目录的临时子目录里 (os.replace 不能跨文件系统，_find_databases 也不会扫到)
+            directory, name = os.path.split(os.path.abspath(self.db_path))
+            shadow_dir = tempfile.mkdtemp(prefix='.txn-', dir=directory)
+            try:
+                shadow = os.path.join(shadow_dir, name)
+                if flag != 'n':
+                    for suffix in self.SUFFIXES:
+                        if os.path.isfile(self.db_path + suffix):
+                            shutil.copyfile(self.db_path + suffix, shadow + suffix)
+                db = dbm.open(shadow, flag)
+                try:
+                    for key, value in txn.pending.items():
+                        db[key] = value
+                finally:
+                    db.close()
+                self._swap_in(shadow, txn)
+            finally:
+                shutil.rmtree(shadow_dir, ignore_errors=True)
+
+    def _swap_in(self, shadow, txn):
+        # 独占锁内只做改名；改名失败 (如 Windows 上别的线程还开着 sqlite3 文件) 时退回原地写入
+        new_files = [suffix for suffix in self.SUFFIXES if os.path.isfile(shadow + suffix)]
+        with self._rw.exclusive():
+            self.close_idle()
+            try:
+                os.replace(shadow + new_files[0], self.db_path + new_files[0])
+            except OSError:
+                db = dbm.open(self.db_path, txn.flag)
+                try:
+                    for key, value in txn.pending.items():
+                        db[key] = value
+                finally:
+                    db.close()
+                    self.generation += 1
+                return
+            try:
+                for suffix in new_files[1:]:
+                    os.replace(shadow + suffix, self.db_path + suffix)
+                # 副本里没有的旧文件 (如 'n' 换了后端) 一并删掉，免得 whichdb 认错
+                for suffix in self.SUFFIXES + self.SIDE_FILES:
+                    if suffix not in new_files and os.path.isfile(self.db_path + suffix):
+                        os.remove(self.db_path + suffix)
+            finally:
+                self.generation += 1
+
+class _WriteTxn:
+    # 写事务：set / update 只暂存，get / keys 读到的是已提交内容加上暂存的修改
+    def __init__(self, broker, flag):
+        self.broker = broker
+        self.flag = flag
+        self.pending = {}
+
+    def set(self, key, value):
+        self.pending[key] = value
+
+    def update(self, pairs):
+        self.pending.update(pairs)
+
+    def _committed(self):
+        # 'n' 会清空数据库，已提交的内容视为空
+        if self.flag == 'n' or dbm.whichdb(self.broker.db_path) is None:
+            return None
+        return self.broker.read()
+
+    def get(self, key, default=None):
+        if key in self.pending:
+            return self.pending[key]
+        committed = self._committed()
+        if committed is None:
+            return default
+        with committed as db:
+            return db.get(key, default)
+
+    def keys(self):
+        committed = self._committed()
+        if committed is None:
+            return list(self.pending)
+        with committed as db:
+            keys = set(db.keys())
+        keys.update(self.pending)
+        return list(keys)
+
+
+class AssetIndex:
+    # 常驻内存的只读索引：加载时读一遍数据库，之后的查询只查内存，多线程可同时读
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.signature = _db_signature(db_path)
+        self.version = f"{zlib.crc32(repr(self.signature).encode('utf-8')):08x}"
+        self.entries = {}  # 路径 -> (哈希, 大小)
+        with DatabaseBroker.for_path(db_path).read() as db:
+            self.strategy = db.get(b'__parsing_strategy__', b'unknown').decode('utf-8')
+            for k in db.keys():
+                if not k.startswith(b'__'):
+                    self.entries[k.decode('utf-8')] = _parse_value(db[k].decode('utf-8'))
+        self.paths = sorted(self.entries)
+        # 所有路径的小写形式用换行拼成一个字符串，子串搜索用 str.find 在 C 层完成
+        # 偏移按小写后的长度计算 (lower() 可能改变长度，如 'İ')，末尾多一个哨兵便于取下一个路径的开头
+        lowered = [path.lower() for path in self.paths]
+        self._blob = "\n".join(lowered)
+        self._offsets = []
+        offset = 0
+        for path in lowered:
+            self._offsets.append(offset)
+            offset += len(path) + 1
+        self._offsets.append(offset)
+        self.cube = FacetCube.from_items((path, size) for path, (_, size) in self.entries.items())
+
+    def search(self, keyword, limit=1000):
+        # 返回 (匹配总数, 前 limit 个路径)；一个路径只算一次
+        keyword = keyword.lower()
+        if not keyword or '\n' in keyword:
+            return 0, []
+        blob, offsets, paths = self._blob, self._offsets, self.paths
+        found, last, pos = [], -1, blob.find(keyword)
+        while pos != -1:
+            index = bisect_right(offsets, pos) - 1
+            if index != last:
+                found.append(index)
+                last = index
+            # 跳到下一个路径开头继续找
+            pos = blob.find(keyword, offsets[index + 1])
+        return len(found), [paths[i] for i in found[:limit]]
+
+    def details(self, path):
+        value = self.entries.get(path)
+        if value is None:
+            return None
+        return {'path': path, 'hash': value[0], 'size': value[1], 'category': _get_category(path)}
+
+    def listing(self, prefix=''):
+        # 目录的直接子项：子目录 (数量、字节) 和文件；有序列表上二分定位前缀范围
+        prefix = prefix.strip('/')
+        start_key = prefix + '/' if prefix else ''
+        paths = self.paths
+        start = bisect_left(paths, start_key)
+        end = bisect_left(paths, prefix + '0') if prefix else len(paths)  # '0' 是 '/' 之后的字符
+        dirs, files = {}, []
+        for path in paths[start:end]:
+            rest = path[len(start_key):]
+            name, sep, _ = rest.partition('/')
+            if sep:
+                acc = dirs.get(name)
+                if acc is None:
+                    dirs[name] = [1, self.entries[path][1]]
+                else:
+                    acc[0] += 1
+                    acc[1] += self.entries[path][1]
+            else:
+                hash_val, size = self.entries[path]
+                files.append({'name': name, 'hash': hash_val, 'size': size})
+        return {'prefix': prefix,
+                'dirs': [{'name': name, 'count': c, 'bytes': b} for name, (c, b) in dirs.items()],
+                'files': files}
+
+    def stats(self, prefix='', facet='dir', by='count'):
+        prefix = prefix.strip('/')
+        if prefix not in self.cube.nodes or facet not in dict(FacetCube.FACETS):
+            return None
+        count, nbytes = self.cube.total(prefix)
+        return {'prefix': prefix, 'facet': facet, 'count': count, 'bytes': nbytes,
+                'rows': [{'label': label, 'count': c, 'bytes': b} for label, c, b in self.cube.facet(facet, prefix, by)]}
+
+class AssetQueryService:
+    # 内置 HTTP 查询服务 (标准库 ThreadingHTTPServer)：多个客户端共享一个常驻索引
+    # 响应按 (索引版本, 请求) 缓存编码好的 JSON，带 ETag；If-None-Match 命中时返回 304
+    # 缓存按响应体字节数限制 (/diff 的响应可能有几 MB)，单个响应超过上限的 1/8 不缓存
+    CACHE_BYTES = 64 * 1024 * 1024
+    RELOAD_CHECK_INTERVAL = 2.0
+
+    def __init__(self, db_path, host='127.0.0.1', port=8765, on_request=None):
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        self.on_request = on_request  # on_request(消息)，在请求线程中调用
+        self.index = None
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self._diff_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._last_check = 0.0
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        # 先建好索引再开始监听 (耗时，应在后台线程调用)
+        self.index = AssetIndex(self.db_path)
+        self._last_check = time.monotonic()
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _AssetQueryHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.service = self
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="asset-http", daemon=True)
+        self._thread.start()
+        return self.index
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def _current_index(self):
+        # 最多每两秒 stat 一次数据库文件，变化时重建索引；重建期间其他请求继续用旧索引
+        now = time.monotonic()
+        if now - self._last_check >= self.RELOAD_CHECK_INTERVAL and self._reload_lock.acquire(blocking=False):
+            try:
+                self._last_check = now
+                if _db_signature(self.db_path) != self.index.signature:
+                    self.index = AssetIndex(self.db_path)
+                    if self.on_request:
+                        self.on_request(f"数据库已变化，索引已重建 ({len(self.index.entries)} 条)")
+            finally:
+                self._reload_lock.release()
+        return self.index
+
+    def handle(self, route, params):
+        # 返回 (状态码, ETag, 响应体)
+        index = self._current_index()
+        # 对比结果还取决于旧库，旧库变化后缓存也要失效
+        old_signature = _db_signature(self._diff_old_path(index, params.get('old', [''])[-1])) if route == '/diff' else ()
+        key = (index.version, old_signature, route, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        if route != '/diff':
+            return self._respond(index, key, route, params)
+        # 对比要完整遍历两个库，同一时刻只算一个；排队期间同样的请求可能已经算好放进缓存
+        with self._diff_lock:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+            return self._respond(index, key, route, params)
+
+    def _cache_get(self, key):
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+            return cached
+
+    def _respond(self, index, key, route, params):
+        status, payload = self._dispatch(index, route, {k: v[-1] for k, v in params.items()})
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        result = (status, f'"{index.version}-{zlib.crc32(body):08x}"', body)
+        if len(body) > self.CACHE_BYTES // 8:
+            return result
+        with self._lock:
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self._cache_bytes -= len(previous[2])
+            self._cache[key] = result
+            self._cache_bytes += len(body)
+            while self._cache_bytes > self.CACHE_BYTES:
+                _, (_, _, evicted) = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+        return result
+
+    def _dispatch(self, index, route, params):
+        if route == '/search':
+            try:
+                limit = max(1, min(int(params.get('limit', 1000)), 100000))
+            except ValueError:
+                return 400, {'error': "limit 必须是整数"}
+            total, paths = index.search(params.get('q', ''), limit)
+            return 200, {'query': params.get('q', ''), 'total': total, 'paths': paths}
+        if route == '/asset':
+            details = index.details(params.get('path', ''))
+            return (200, details) if details else (404, {'error': "没有这个路径"})
+        if route == '/list':
+            return 200, index.listing(params.get('prefix', ''))
+        if route == '/stats':
+            stats = index.stats(params.get('prefix', ''), params.get('facet', 'dir'), params.get('by', 'count'))
+            return (200, stats) if stats else (404, {'error': "没有这个目录或维度"})
+        if route == '/diff':
+            return self._diff(index, params)
+        if route == '/':
+            return 200, {'db': os.path.basename(index.db_path), 'strategy': index.strategy,
+                         'entries': len(index.entries), 'version': index.version,
+                         'endpoints': ['/search?q=&limit=', '/asset?path=', '/list?prefix=',
+                                       '/stats?prefix=&facet=dir|ext|size&by=count|bytes',
+                                       '/diff?old=<同目录下的数据库文件名>&limit=']}
+        return 404, {'error': f"未知接口 {route}"}
+
+    @staticmethod
+    def _diff_old_path(index, name):
+        # 只允许与当前数据库同目录下的其他数据库对比，不接受任意路径
+        return os.path.join(os.path.dirname(os.path.abspath(index.db_path)), os.path.basename(name))
+
+    def _diff(self, index, params):
+        name = os.path.basename(params.get('old', ''))
+        old_path = self._diff_old_path(index, name)
+        if not name or not dbm.whichdb(old_path):
+            return 404, {'error': f"找不到数据库 {name}"}
+        try:
+            limit = max(1, min(int(params.get('limit', 1000)), 100000))
+        except ValueError:
+            return 400, {'error': "limit 必须是整数"}
+        diff = _diff_databases(old_path, index.db_path)
+        plan, changes = diff['plan'], diff['changes']
+        return 200, {'old': name, 'new': os.path.basename(index.db_path),
+                     'added': len(diff['added']), 'changed': len(diff['changed']), 'removed': len(diff['removed']),
+                     'download_bytes': plan.download_bytes, 'delta_bytes': changes.delta_bytes,
+                     'added_paths': diff['added'][:limit], 'removed_paths': diff['removed'][:limit],
+                     'changed_items': [{'path': p, 'old_hash': oh, 'new_hash': nh, 'old_size': os_, 'new_size': ns, 'kind': kind}
+                                       for p, oh, nh, os_, ns, kind in diff['changed'][:limit]]}
+
+class _AssetQueryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'AssetQuery/1.0'
+
+    def do_GET(self):
+        service = self.server.service
+        url = urlsplit(self.path)
+        try:
+            status, etag, body = service.handle(url.path.rstrip('/') or '/', parse_qs(url.query))
+        except Exception as e:
+            status, etag, body = 500, None, json.dumps({'error': str(e)}, ensure_ascii=False).encode('utf-8')
+        if etag and status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')  # 可缓存，但每次用 ETag 重新验证
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        on_request = self.server.service.on_request
+        if on_request:
+            on_request(f"{self.client_address[0]} {format % args}")
 
 class ProgressWindow(Toplevel):
     #进度条
@@ -115,41 +2588,92 @@ class CheckbuttonList(tk.Frame):
         return [item_tuple for item_tuple, var in self.vars if var.get()]
 
 class PlottingWindow(Toplevel):
-    def __init__(self, parent, analysis_data):
+    def __init__(self, parent, analysis_data, prefix=''):
         super().__init__(parent)
         self.title("图表分析（没啥用）")
+        self.cube = analysis_data
+        self.prefix = prefix
         self.geometry("1000x700")
-        if not MATPLOTLIB_AVAILABLE:
+        try:
+            if not MATPLOTLIB_AVAILABLE: raise ImportError("matplotlib")
+            self.plt, FigureCanvasTkAgg = _import_matplotlib()
+        except ImportError:
             messagebox.showerror("依赖缺失", "Matplotlib库未安装，无法使用此功能。")
             self.destroy()
             return
         main_pane = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
         main_pane.pack(fill=tk.BOTH, expand=True)
         left_frame = ttk.Frame(main_pane, padding=5)
+        # 任意维度、按数量或大小作图；目录前缀沿用主窗口当前的下钻位置
+        facet_frame = ttk.Frame(left_frame)
+        facet_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(facet_frame, text=f"范围: {prefix or '(全部)'}").pack(anchor='w')
+        self.facet_var = tk.StringVar(value=FacetCube.FACETS[0][1])
+        facet_combo = ttk.Combobox(facet_frame, textvariable=self.facet_var, state='readonly', width=10,
+                                   values=[name for _, name in FacetCube.FACETS])
+        facet_combo.pack(side=tk.LEFT)
+        facet_combo.bind('<<ComboboxSelected>>', lambda event: self._rebuild_check_list())
+        self.metric_var = tk.StringVar(value="count")
+        for text, value in [("数量", "count"), ("大小 (MB)", "bytes")]:
+            ttk.Radiobutton(facet_frame, text=text, variable=self.metric_var, value=value,
+                            command=self._rebuild_check_list).pack(side=tk.LEFT, padx=5)
         ttk.Label(left_frame, text="勾选要分析的类别:").pack(anchor='w', pady=(0, 5))
-        self.check_list = CheckbuttonList(left_frame, analysis_data.most_common())
-        self.check_list.pack(fill=tk.BOTH, expand=True)
+        self.check_list_frame = ttk.Frame(left_frame)
+        self.check_list_frame.pack(fill=tk.BOTH, expand=True)
+        self.check_list = None
+        self._rebuild_check_list()
         main_pane.add(left_frame, weight=1)
         right_frame = ttk.Frame(main_pane)
         control_frame = ttk.Frame(right_frame, padding=5)
         control_frame.pack(fill=tk.X)
         ttk.Label(control_frame, text="图表类型:").pack(side=tk.LEFT, padx=5)
         self.plot_type_var = tk.StringVar(value="hbar")
-        plot_types = [("饼状图", "pie"), ("垂直条形图", "bar"), ("水平条形图", "hbar"), ("折线图", "line")]
+        plot_types = [("饼状图", "pie"), ("垂直条形图", "bar"), ("水平条形图", "hbar"), ("折线图", "line"),
+                      ("大小直方图", "hist"), ("大小百分位", "pct")]
         for text, value in plot_types:
             ttk.Radiobutton(control_frame, text=text, variable=self.plot_type_var, value=value).pack(side=tk.LEFT)
         ttk.Button(control_frame, text="生成图表", command=self.create_plot).pack(side=tk.LEFT, padx=10)
         ttk.Button(control_frame, text="保存图表", command=self.save_chart).pack(side=tk.LEFT, padx=5)
-        self.figure = plt.figure()
+        ttk.Button(control_frame, text="大小分布统计...", command=self._show_size_stats).pack(side=tk.LEFT, padx=5)
+        self.figure = self.plt.figure()
         self.canvas = FigureCanvasTkAgg(self.figure, master=right_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         main_pane.add(right_frame, weight=3)
 
+    def _facet_key(self):
+        return next(key for key, name in FacetCube.FACETS if name == self.facet_var.get())
+
+    def _size_groups(self):
+        # 大小分布只按顶层目录和扩展名分组统计过
+        facet = self._facet_key()
+        if self.cube.sizes is None or facet == 'size' or (facet == 'dir' and self.prefix):
+            messagebox.showwarning("提示", "大小分布只支持扩展名，或范围为全部时的子目录 (顶层目录)。", parent=self)
+            return None
+        return self.cube.sizes.groups[facet]
+
+    def _show_size_stats(self):
+        groups = self._size_groups()
+        if groups is not None:
+            SizeStatsWindow(self, self.cube.sizes, self._facet_key(), self.facet_var.get())
+
+    def _rebuild_check_list(self):
+        if self.check_list is not None:
+            self.check_list.destroy()
+        facet = self._facet_key()
+        by_bytes = self.metric_var.get() == "bytes"
+        rows = self.cube.facet(facet, self.prefix, by='bytes' if by_bytes else 'count')
+        items = [(label, round(nbytes / 1024 ** 2, 2) if by_bytes else count) for label, count, nbytes in rows]
+        self.check_list = CheckbuttonList(self.check_list_frame, items)
+        self.check_list.pack(fill=tk.BOTH, expand=True)
+
     def create_plot(self):
         checked_data = self.check_list.get_checked_items()
         if not checked_data:
             messagebox.showwarning("提示", "请至少勾选一个项目。")
             return
+        if self.plot_type_var.get() in ("hist", "pct"):
+            self._plot_distribution(checked_data)
+            return
 
         if len(checked_data) > 9:
             top_items = checked_data[:9]
@@ -169,7 +2693,7 @@ class PlottingWindow(Toplevel):
         else:
             if plot_type == "bar":
                 ax.bar(labels, sizes)
-                plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+                self.plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
             elif plot_type == "hbar":
                 y_pos = range(len(labels))
                 ax.barh(y_pos, sizes)
@@ -179,10 +2703,48 @@ class PlottingWindow(Toplevel):
                     ax.text(v, i, f' {v}', va='center')
             elif plot_type == "line":
                 ax.plot(labels, sizes, marker='o')
-                plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
-            ax.set_ylabel('数量' if plot_type != 'hbar' else '')
-            ax.set_xlabel('数量' if plot_type == 'hbar' else '')
-            ax.set_title('所选类别数量')
+                self.plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+            metric = '数量' if self.metric_var.get() == "count" else '大小 (MB)'
+            ax.set_ylabel(metric if plot_type != 'hbar' else '')
+            ax.set_xlabel(metric if plot_type == 'hbar' else '')
+            ax.set_title(f'所选{self.facet_var.get()}{metric}')
+        self.figure.tight_layout()
+        self.canvas.draw()
+
+    def _plot_distribution(self, checked_data):
+        groups = self._size_groups()
+        if groups is None:
+            return
+        labels = [label for label, _ in checked_data if label in groups][:9]
+        if not labels:
+            messagebox.showwarning("提示", "所选项目没有大小分布数据。", parent=self)
+            return
+        self.figure.clear()
+        ax = self.figure.add_subplot(111)
+        if self.plot_type_var.get() == "hist":
+            # 横轴为按2的幂分的桶，只画有数据的范围
+            used = [b for b in range(self.cube.sizes.hist_bins) if any(groups[label]['hist'][b] for label in labels)]
+            xs = list(range(used[0], used[-1] + 1))
+            for label in labels:
+                ax.plot(xs, groups[label]['hist'][xs[0]:xs[-1] + 1], drawstyle='steps-mid', marker='.', label=label)
+            ax.set_xticks(xs, labels=[SizeDistribution.bin_label(b) for b in xs])
+            self.plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+            ax.set_xlabel("文件大小 (对数分桶，标注为桶下界)")
+            ax.set_ylabel("数量")
+            ax.set_title(f"所选{self.facet_var.get()}的大小分布")
+        else:
+            y_pos = range(len(labels))
+            ax.hlines(y_pos, [max(groups[label]['min'], 1) for label in labels],
+                      [max(groups[label]['max'], 1) for label in labels], colors='lightgray')
+            for pct, marker in zip(SizeDistribution.PERCENTILES, "o^sDv"):
+                ax.scatter([max(groups[label]['percentiles'][pct], 1) for label in labels], y_pos,
+                           marker=marker, label=f"P{pct}", zorder=3)
+            ax.set_xscale('log')
+            ax.set_yticks(y_pos, labels=labels)
+            ax.invert_yaxis()
+            ax.set_xlabel("大小 (字节，对数坐标；灰线为最小到最大)")
+            ax.set_title(f"所选{self.facet_var.get()}的大小百分位")
+        ax.legend(fontsize=8)
         self.figure.tight_layout()
         self.canvas.draw()
 
@@ -199,6 +2761,57 @@ class PlottingWindow(Toplevel):
             except Exception as e:
                 messagebox.showerror("保存失败", f"无法保存图表:\n{e}")
 
+class SizeStatsWindow(Toplevel):
+    # 各分组的大小统计表，选中一行显示该组最大的离群文件
+    COLUMNS = (('count', "数量", 70), ('bytes', "总大小", 90), ('p50', "P50", 80), ('p90', "P90", 80),
+               ('p99', "P99", 80), ('max', "最大", 90), ('outliers', "离群数", 60))
+
+    def __init__(self, parent, dist, grouping, grouping_name):
+        super().__init__(parent)
+        self.title(f"大小分布统计 - {grouping_name}")
+        self.geometry("800x600")
+        self.groups = dist.groups[grouping]
+        main_pane = ttk.PanedWindow(self, orient=tk.VERTICAL)
+        main_pane.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.tree = ttk.Treeview(main_pane, columns=[c[0] for c in self.COLUMNS], show='tree headings')
+        self.tree.heading('#0', text=grouping_name)
+        self.tree.column('#0', width=150, anchor='w')
+        for col, text, width in self.COLUMNS:
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor='e')
+        for label, stats in dist.rows(grouping):
+            pct = stats['percentiles']
+            self.tree.insert('', tk.END, text=label, values=(
+                stats['count'], _format_size(stats['bytes']), _format_size(int(pct[50])), _format_size(int(pct[90])),
+                _format_size(int(pct[99])), _format_size(stats['max']), stats['outlier_count']))
+        self.tree.bind('<<TreeviewSelect>>', self._show_outliers)
+        main_pane.add(self.tree, weight=1)
+
+        outlier_frame = ttk.Frame(main_pane)
+        self.outlier_var = tk.StringVar(value=f"选中一行查看最大的 {SizeDistribution.TOP_OUTLIERS} 个离群文件。")
+        ttk.Label(outlier_frame, textvariable=self.outlier_var).pack(anchor='w')
+        self.outlier_tree = ttk.Treeview(outlier_frame, columns=('size',), show='tree headings')
+        self.outlier_tree.heading('#0', text="路径")
+        self.outlier_tree.column('#0', width=600, anchor='w')
+        self.outlier_tree.heading('size', text="大小")
+        self.outlier_tree.column('size', width=100, anchor='e')
+        self.outlier_tree.pack(fill=tk.BOTH, expand=True)
+        main_pane.add(outlier_frame, weight=1)
+
+    def _show_outliers(self, event=None):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        label = self.tree.item(selection[0], 'text')
+        stats = self.groups[label]
+        self.outlier_tree.delete(*self.outlier_tree.get_children())
+        for size, path in stats['outliers']:
+            self.outlier_tree.insert('', tk.END, text=path, values=(_format_size(size),))
+        self.outlier_var.set(f"{label}: 超过 {_format_size(int(stats['fence']))} 的离群文件共 "
+                             f"{stats['outlier_count']} 个，显示最大的 {len(stats['outliers'])} 个。")
+
+
 class CompareDBWindow(Toplevel):
     def __init__(self, parent, controller):
         super().__init__(parent)
@@ -208,7 +2821,11 @@ class CompareDBWindow(Toplevel):
         self.other_db_path = tk.StringVar()
         self.compare_mode_var = tk.StringVar(value="added")
         self.compare_results = None
+        self.patch_plan = None
+        self.change_report = None
+        self.all_changes = None
         self.current_mode = None
+        self.change_filter_var = tk.StringVar(value="all")
 
         main_frame = ttk.Frame(self, padding=10)
         main_frame.pack(fill='both', expand=True)
@@ -229,11 +2846,20 @@ class CompareDBWindow(Toplevel):
         modes = [
             ("新版新增 (新版有, 旧版无)", "added"),
             ("旧版移除 (旧版有, 新版无)", "removed"),
-            ("哈希变更 (双版皆有, 内容不同)", "changed")
+            ("变更 (双版皆有, 哈希或大小不同)", "changed"),
+            ("下载量估算 (新增+变更)", "patch")
         ]
         for text, mode in modes:
             ttk.Radiobutton(mode_frame, text=text, variable=self.compare_mode_var, value=mode).pack(anchor='w', padx=5, pady=1)
 
+        # 变更模式的筛选，切换时直接用已有结果重新显示
+        filter_frame = ttk.LabelFrame(action_frame, text="变更筛选")
+        filter_frame.pack(side='left', padx=5, pady=5)
+        filters = [("全部", "all")] + [(ChangeReport.NAMES[kind], kind) for kind in ChangeReport.KINDS]
+        for text, kind in filters:
+            ttk.Radiobutton(filter_frame, text=text, variable=self.change_filter_var, value=kind,
+                            command=self._render_changes).pack(anchor='w', padx=5, pady=1)
+
         self.compare_button = ttk.Button(action_frame, text="开始对比", command=self._start_compare_task, state='disabled')
         self.compare_button.pack(side='left', padx=10, expand=True, fill='y')
         self.results_frame = ttk.LabelFrame(main_frame, text="对比结果")
@@ -280,7 +2906,8 @@ class CompareDBWindow(Toplevel):
         title_map = {
             "added": "对比结果 - 新增项",
             "removed": "对比结果 - 移除项",
-            "changed": "对比结果 - 哈希变更项"
+            "changed": "对比结果 - 变更项 (按变化量排序)",
+            "patch": "对比结果 - 补丁下载量"
         }
         new_title = title_map.get(selected_mode, "对比结果")
         self.results_frame.config(text=new_title)
@@ -291,48 +2918,10 @@ class CompareDBWindow(Toplevel):
         )
 
     def _compare_dbs_worker(self, main_db_path, other_db_path, mode):
-        def _read_db(path):
-            data = {}
-            with dbm.open(path, 'r') as db:
-                for k in db.keys():
-                    if not k.startswith(b'__'):
-                        data[k.decode('utf-8')] = db[k].decode('utf-8')
-            return data
-            
-        def _get_hash(value_str):
-            try:
-                return value_str.split('|', 1)[0]
-            except (IndexError, AttributeError):
-                return "N/A"
-
-        old_data = _read_db(main_db_path)
-        new_data = _read_db(other_db_path)
-        
-        old_keys = set(old_data.keys())
-        new_keys = set(new_data.keys())
-
-        if mode == "added":
-            # 存在于新版，但不存在于旧版
-            result_keys = new_keys - old_keys
-            return sorted(list(result_keys))
-        
-        elif mode == "removed":
-            # 存在于旧版，但不存在于新版
-            result_keys = old_keys - new_keys
-            return sorted(list(result_keys))
-
-        elif mode == "changed":
-            # 同时存在，但哈希值不同
-            common_keys = old_keys & new_keys
-            changed_items = []
-            for key in common_keys:
-                old_hash = _get_hash(old_data.get(key))
-                new_hash = _get_hash(new_data.get(key))
-                if old_hash != new_hash:
-                    changed_items.append((key, old_hash, new_hash))
-            return sorted(changed_items, key=lambda x: x[0])
-
-        return []
+        diff = _diff_databases(main_db_path, other_db_path)
+        if mode == "patch":
+            return diff['plan']
+        return diff[mode], diff['plan'], diff['changes']
 
     def _on_compare_done(self, result):
         self.compare_button.config(state='normal')
@@ -343,10 +2932,32 @@ class CompareDBWindow(Toplevel):
             self.controller.status_var.set("对比失败。")
             return
 
-        self.compare_results = result
         self.results_text.config(state='normal')
         self.results_text.delete('1.0', tk.END)
 
+        if self.current_mode == "patch":
+            self.patch_plan = result
+            self.compare_results = None
+            status_msg = f"对比完成，预计下载量 {_format_size(result.download_bytes)}。"
+            self.results_text.insert('1.0', result.format_report())
+            self.save_button.config(state='normal')
+            self.controller.status_var.set(status_msg)
+            self.controller._log(f"数据库对比 (patch) 完成: {status_msg}")
+            self.results_text.config(state='disabled')
+            return
+
+        self.compare_results, self.patch_plan, self.change_report = result
+        download_msg = f"预计下载量 {_format_size(self.patch_plan.download_bytes)}"
+        if self.current_mode == "changed":
+            self.all_changes = self.compare_results
+            self.results_text.config(state='disabled')
+            self._render_changes()
+            status_msg = (f"对比完成，发现 {len(self.all_changes)} 个变更项，"
+                          f"净变化 {_format_delta(self.change_report.delta_bytes)}。")
+            self.controller.status_var.set(f"{status_msg} {download_msg}")
+            self.controller._log(f"数据库对比 (changed) 完成: {status_msg}")
+            return
+
         if not self.compare_results:
             self.results_text.insert('1.0', "对比完成，未发现符合条件的项目。")
             self.controller.status_var.set("对比完成，未发现符合条件的项目。")
@@ -360,21 +2971,34 @@ class CompareDBWindow(Toplevel):
             elif self.current_mode == "removed":
                 status_msg = f"对比完成，发现 {count} 个移除项。"
                 output = f"{status_msg}\n\n" + "\n".join(self.compare_results)
-            elif self.current_mode == "changed":
-                status_msg = f"对比完成，发现 {count} 个哈希变更项。"
-                output = f"{status_msg}\n\n"
-                for path, old_h, new_h in self.compare_results:
-                    output += f"{path}\n  旧哈希: {old_h}\n  新哈希: {new_h}\n\n"
             
             self.results_text.insert('1.0', output)
             self.save_button.config(state='normal')
-            self.controller.status_var.set(status_msg)
+            self.controller.status_var.set(f"{status_msg} {download_msg}")
             self.controller._log(f"数据库对比 ({self.current_mode}) 完成: {status_msg}")
             
         self.results_text.config(state='disabled')
+
+    def _render_changes(self):
+        # 变更模式：统计报告 + 按筛选条件的明细 (已按变化量绝对值降序)
+        if self.current_mode != "changed" or self.all_changes is None:
+            return
+        kind_filter = self.change_filter_var.get()
+        self.compare_results = [c for c in self.all_changes if kind_filter == "all" or c[5] == kind_filter]
+        lines = [self.change_report.format_report(), "\n" + "="*40,
+                 f"明细 ({'全部' if kind_filter == 'all' else ChangeReport.NAMES[kind_filter]}): "
+                 f"{len(self.compare_results)} 个\n"]
+        for path, old_h, new_h, old_size, new_size, kind in self.compare_results:
+            lines.append(f"{path}\n  大小: {_format_size(old_size)} -> {_format_size(new_size)} "
+                         f"({_format_delta(new_size - old_size)})\n  旧哈希: {old_h}\n  新哈希: {new_h}\n")
+        self.results_text.config(state='normal')
+        self.results_text.delete('1.0', tk.END)
+        self.results_text.insert('1.0', "\n".join(lines))
+        self.results_text.config(state='disabled')
+        self.save_button.config(state='normal' if self.compare_results else 'disabled')
     
     def _save_results(self):
-        if not self.compare_results:
+        if not self.compare_results and not (self.current_mode == "patch" and self.patch_plan):
             messagebox.showwarning("提示", "没有可保存的对比结果。")
             return
         
@@ -396,8 +3020,13 @@ class CompareDBWindow(Toplevel):
                         for item in self.compare_results:
                             writer.writerow([item])
                     elif self.current_mode == "changed":
-                        writer.writerow(['path', 'old_hash', 'new_hash'])
-                        writer.writerows(self.compare_results)
+                        writer.writerow(['path', 'old_hash', 'new_hash', 'old_size', 'new_size', 'delta', 'kind'])
+                        for path, old_h, new_h, old_size, new_size, kind in self.compare_results:
+                            writer.writerow([path, old_h, new_h, old_size, new_size, new_size - old_size, kind])
+                    elif self.current_mode == "patch":
+                        writer.writerow(['category'] + [f"{kind}_{field}" for kind in PatchPlan.KINDS
+                                                        for field in ('count', 'bytes')])
+                        writer.writerows(self.patch_plan.category_rows())
                 else: # TXT
                     f.write(self.results_text.get('1.0', tk.END))
 
@@ -449,7 +3078,7 @@ class DirectoryExplorerWindow(Toplevel):
     def _build_path_map_worker(self):
         path_map = {'': []}
         all_paths = []
-        with dbm.open(self.controller.db_file_path, 'r') as db:
+        with DatabaseBroker.for_path(self.controller.db_file_path).read() as db:
             all_paths = [key.decode('utf-8') for key in db.keys() if not key.startswith(b'__')]
 
         all_dirs = set()
@@ -472,6 +3101,7 @@ class DirectoryExplorerWindow(Toplevel):
             if child not in path_map[parent]:
                  path_map[parent].append(child)
         
+        _count_processed(records=len(all_paths))
         return path_map
 
 
@@ -556,6 +3186,8 @@ class UnityFSStripperWindow(Toplevel):
         self.controller = controller
         self.source_dir = tk.StringVar()
         self.dest_dir = tk.StringVar()
+        self.store_dir = tk.StringVar()
+        self.link_mode = tk.StringVar(value="copy")
         
         main_frame = ttk.Frame(self, padding=10)
         main_frame.pack(fill='both', expand=True)
@@ -568,7 +3200,20 @@ class UnityFSStripperWindow(Toplevel):
         self.dest_button = ttk.Button(path_frame, text="选择目标目录", command=self._select_dest)
         self.dest_button.grid(row=1, column=0, padx=5, pady=2, sticky='w')
         ttk.Entry(path_frame, textvariable=self.dest_dir, state='readonly').grid(row=1, column=1, sticky='ew', padx=5)
+        # 可选：跨版本共享的存储目录，清单哈希已处理过的文件直接链接
+        self.store_button = ttk.Button(path_frame, text="共享存储 (可选)", command=self._select_store)
+        self.store_button.grid(row=2, column=0, padx=5, pady=2, sticky='w')
+        ttk.Entry(path_frame, textvariable=self.store_dir, state='readonly').grid(row=2, column=1, sticky='ew', padx=5)
         path_frame.columnconfigure(1, weight=1)
+
+        # 无需修改的文件 (无头或头已在开头) 的输出方式
+        mode_frame = ttk.LabelFrame(main_frame, text="未修改文件的输出方式")
+        mode_frame.pack(fill='x', pady=5)
+        self.mode_buttons = []
+        for text, mode in [("复制", "copy"), ("硬链接", "hardlink"), ("Reflink (写时复制)", "reflink")]:
+            button = ttk.Radiobutton(mode_frame, text=text, variable=self.link_mode, value=mode)
+            button.pack(side='left', padx=5)
+            self.mode_buttons.append(button)
         
         self.start_button = ttk.Button(main_frame, text="开始处理", command=self._start_processing_task)
         self.start_button.pack(pady=10)
@@ -586,6 +3231,8 @@ class UnityFSStripperWindow(Toplevel):
         self.source_dir.set(filedialog.askdirectory(title="选择包含UnityFS文件的源目录"))
     def _select_dest(self):
         self.dest_dir.set(filedialog.askdirectory(title="选择保存处理后文件的目标目录"))
+    def _select_store(self):
+        self.store_dir.set(filedialog.askdirectory(title="选择共享存储目录 (留空则不使用)"))
         
     def _log_message(self, message):
         self.log_text.config(state='normal')
@@ -602,6 +3249,9 @@ class UnityFSStripperWindow(Toplevel):
         self.start_button.config(state=state)
         self.source_button.config(state=state)
         self.dest_button.config(state=state)
+        self.store_button.config(state=state)
+        for button in self.mode_buttons:
+            button.config(state=state)
 
     def _start_processing_task(self):
         source, dest = self.source_dir.get(), self.dest_dir.get()
@@ -611,17 +3261,24 @@ class UnityFSStripperWindow(Toplevel):
         if os.path.abspath(source) == os.path.abspath(dest):
             messagebox.showerror("错误", "源目录和目标目录不能相同。")
             return
+        store_dir = self.store_dir.get() or None
+        if store_dir and not self.controller.db_file_path:
+            messagebox.showerror("错误", "共享存储按清单哈希寻址，请先加载数据库。")
+            return
             
         self._set_ui_state(True)
         self.log_text.config(state='normal')
         self.log_text.delete('1.0', tk.END)
         self.log_text.config(state='disabled')
         self.progress_var.set(0)
+        link_mode = self.link_mode.get()
         self.controller._log("UnityFS 抹除工具：开始处理。")
-        self._log_message(f"源目录: {source}\n目标目录: {dest}\n" + "="*40 + "\n")
+        self._log_message(f"源目录: {source}\n目标目录: {dest}\n输出方式: {link_mode}\n"
+                          + (f"共享存储: {store_dir}\n" if store_dir else "") + "="*40 + "\n")
         self.controller._run_task(
             # fix
-            task=lambda progress_queue: self._process_files_worker(source, dest, progress_queue=progress_queue),
+            task=lambda progress_queue: self._process_files_worker(source, dest, progress_queue=progress_queue,
+                                                                   link_mode=link_mode, store_dir=store_dir),
             on_done=self._on_processing_done,
             on_progress=self._handle_progress
         )
@@ -633,10 +3290,37 @@ class UnityFSStripperWindow(Toplevel):
         elif msg_type == 'progress':
             self._update_progress(payload)
 
-    def _process_files_worker(self, source, dest, progress_queue=None):
+    @staticmethod
+    def _strip_file(input_path, output_path, link_mode):
+        # 返回 (文件头偏移, 输出方式)；偏移为 0 或 -1 时输出与输入相同
+        with open(input_path, 'rb') as f_in:
+            # 分块查找文件头，头在开头时只读第一块
+            index = _find_unityfs_header(f_in)
+            _count_processed(records=1, nbytes=f_in.tell())
+            # 查找通过后移除前面字节
+            if index > 0:
+                f_in.seek(index)
+                if os.path.lexists(output_path):
+                    os.remove(output_path)  # 可能是上次留下的硬链接，不能覆盖写
+                with open(output_path, 'wb') as f_out:
+                    shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+                return index, 'strip'
+        # 输出与输入完全相同，可以链接代替复制
+        return index, _link_or_copy(input_path, output_path, link_mode)
+
+    def _process_files_worker(self, source, dest, progress_queue=None, link_mode='copy', store_dir=None):
         try:
-            processed_count, skipped_count, error_count = 0, 0, 0
-            HEADER = b'UnityFS'
+            processed_count, skipped_count, error_count, linked_count, reused_count = 0, 0, 0, 0, 0
+
+            store, manifest = None, {}
+            if store_dir:
+                progress_queue.put(('log', "读取清单哈希...\n"))
+                store = BundleStore(store_dir)
+                manifest = _read_manifest(self.controller.db_file_path)
+            # 存储中的对象链接到输出目录；选择"复制"时也用硬链接，否则存储节省不了空间
+            store_mode = 'reflink' if link_mode == 'reflink' else 'hardlink'
+            # 源文件可能被游戏更新原地改写，不硬链接进存储
+            ingest_mode = 'reflink' if link_mode == 'reflink' else 'copy'
 
             progress_queue.put(('log', "开始扫描并处理UnityFS文件...\n"))
             
@@ -648,7 +3332,7 @@ class UnityFSStripperWindow(Toplevel):
             total_files = len(all_files_to_process)
             if total_files == 0:
                 progress_queue.put(('log', "源目录中没有文件。\n"))
-                return (0, 0, 0)
+                return (0, 0, 0, 0, 0)
 
             for i, input_path_str in enumerate(all_files_to_process):
                 input_path = Path(input_path_str)
@@ -658,21 +3342,34 @@ class UnityFSStripperWindow(Toplevel):
                 
                 try:
                     progress_queue.put(('log', f"  - 处理: {input_path.name} ... "))
-                    with open(input_path, 'rb') as f_in:
-                        content = f_in.read()
-                    
-                    index = content.find(HEADER)
-                    # 查找通过后移除前面字节。未发现跳过
-                    if index != -1:
-                        cleaned_bytes = content[index:]
-                        with open(output_path, 'wb') as f_out:
-                            f_out.write(cleaned_bytes)
-                        progress_queue.put(('log', "完成 (已抹除前置数据)\n"))
-                        processed_count += 1
+                    hash_val = manifest.get(relative_path.as_posix(), (None,))[0]
+                    if not (store and BundleStore.valid_hash(hash_val)):
+                        hash_val = None
+                    if hash_val and store.get('unityfs', hash_val):
+                        method = store.link_out('unityfs', hash_val, output_path, store_mode)
+                        progress_queue.put(('log', f"复用 (共享存储, {method})\n"))
+                        reused_count += 1
+                        if method != 'copy':
+                            linked_count += 1
                     else:
-                        shutil.copy2(input_path, output_path)
-                        progress_queue.put(('log', "跳过 (未找到'UnityFS'头)\n"))
-                        skipped_count += 1
+                        if hash_val:
+                            temp_path = store.temp_path()
+                            index, method = self._strip_file(input_path, temp_path, ingest_mode)
+                            store.put('unityfs', hash_val, temp_path)
+                            method = store.link_out('unityfs', hash_val, output_path, store_mode)
+                        else:
+                            index, method = self._strip_file(input_path, output_path, link_mode)
+                        if method not in ('copy', 'strip'):
+                            linked_count += 1
+                        if index > 0:
+                            progress_queue.put(('log', "完成 (已抹除前置数据)\n"))
+                            processed_count += 1
+                        elif index == 0:
+                            progress_queue.put(('log', f"完成 (文件头已在开头, {method})\n"))
+                            processed_count += 1
+                        else:
+                            progress_queue.put(('log', f"跳过 (未找到'UnityFS'头, {method})\n"))
+                            skipped_count += 1
                 except Exception as e:
                     progress_queue.put(('log', f"失败 ({e})\n"))
                     self.controller._log(f"UnityFS工具处理'{input_path.name}'失败: {e}")
@@ -684,10 +3381,12 @@ class UnityFSStripperWindow(Toplevel):
             summary_msg = (f"\n处理完成。\n"
                            f"  - 成功处理 (抹除数据): {processed_count}\n"
                            f"  - 跳过 (原样复制): {skipped_count}\n"
-                           f"  - 失败: {error_count}\n")
+                           f"  - 失败: {error_count}\n"
+                           f"  - 链接代替复制: {linked_count}\n"
+                           f"  - 共享存储复用: {reused_count}\n")
             progress_queue.put(('log', summary_msg))
             
-            return (processed_count, skipped_count, error_count)
+            return (processed_count, skipped_count, error_count, linked_count, reused_count)
         except Exception as e:
             # 捕获任何意外的顶层异常
             progress_queue.put(('log', f"\n发生严重错误: {e}\n"))
@@ -702,14 +3401,197 @@ class UnityFSStripperWindow(Toplevel):
             self.controller._log(f"UnityFS工具：处理中断 - {result}")
             return
             
-        processed_count, skipped_count, error_count = result
+        processed_count, skipped_count, error_count, linked_count, reused_count = result
         summary = (f"\n处理完成。\n"
                    f"成功: {processed_count}\n"
                    f"跳过: {skipped_count}\n"
-                   f"失败: {error_count}")
+                   f"失败: {error_count}\n"
+                   f"链接: {linked_count}\n"
+                   f"复用: {reused_count}")
         self._log_message("="*40 + summary)
         self.controller._log(f"UnityFS工具：{summary.strip()}")
 
+class UnityFSIndexWindow(Toplevel):
+    # 并行读取大量 UnityFS 包的包头和目录表，建立可搜索的 CAB 条目索引
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.title("UnityFS 包索引")
+        self.geometry("900x650")
+        self.controller = controller
+        self.source_dir = tk.StringVar()
+        self.thread_count = tk.IntVar(value=os.cpu_count() or 4)
+        self.search_var = tk.StringVar()
+        self.index = None
+        self._search_rows = []
+
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill='both', expand=True)
+
+        path_frame = ttk.Frame(main_frame)
+        path_frame.pack(fill='x', pady=5)
+        self.source_button = ttk.Button(path_frame, text="选择包目录", command=self._select_source)
+        self.source_button.grid(row=0, column=0, padx=5, pady=2, sticky='w')
+        ttk.Entry(path_frame, textvariable=self.source_dir, state='readonly').grid(row=0, column=1, sticky='ew', padx=5)
+        ttk.Label(path_frame, text="线程数:").grid(row=1, column=0, padx=5, pady=5, sticky='w')
+        self.thread_spin = ttk.Spinbox(path_frame, from_=1, to=64, textvariable=self.thread_count, width=5)
+        self.thread_spin.grid(row=1, column=1, padx=5, sticky='w')
+        path_frame.columnconfigure(1, weight=1)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(pady=5)
+        self.start_button = ttk.Button(button_frame, text="建立索引", command=self._start_index_task)
+        self.start_button.pack(side='left', padx=5)
+        self.load_button = ttk.Button(button_frame, text="加载索引...", command=self._load_index)
+        self.load_button.pack(side='left', padx=5)
+        self.save_button = ttk.Button(button_frame, text="保存索引...", command=self._save_index, state='disabled')
+        self.save_button.pack(side='left', padx=5)
+
+        self.progress_var = tk.DoubleVar()
+        ttk.Progressbar(main_frame, variable=self.progress_var, maximum=100).pack(fill='x', pady=5)
+
+        search_frame = ttk.Frame(main_frame)
+        search_frame.pack(fill='x', pady=5)
+        ttk.Label(search_frame, text="条目/包名:").pack(side='left', padx=(0, 5))
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side='left', fill='x', expand=True)
+        search_entry.bind("<Return>", lambda e: self._search())
+        ttk.Button(search_frame, text="搜索", command=self._search).pack(side='left', padx=5)
+
+        columns = ('bundle', 'entry', 'size', 'compression')
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill='both', expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings')
+        for col, text, width in zip(columns, ("包", "条目", "大小", "压缩"), (330, 330, 90, 80)):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor='w')
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+
+        self.summary_var = tk.StringVar(value="尚未建立索引。")
+        ttk.Label(main_frame, textvariable=self.summary_var).pack(anchor='w', pady=(5, 0))
+
+    def _select_source(self):
+        self.source_dir.set(filedialog.askdirectory(title="选择包含UnityFS包的目录"))
+
+    def _set_ui_state(self, is_running):
+        state = 'disabled' if is_running else 'normal'
+        for widget in [self.start_button, self.source_button, self.thread_spin, self.load_button]:
+            widget.config(state=state)
+
+    def _start_index_task(self):
+        source = self.source_dir.get()
+        if not source:
+            messagebox.showerror("错误", "请先选择包目录。")
+            return
+        try:
+            workers = max(1, int(self.thread_count.get()))
+        except (tk.TclError, ValueError):
+            messagebox.showerror("错误", "线程数无效。")
+            return
+        self._set_ui_state(True)
+        self.progress_var.set(0)
+        self.summary_var.set("正在建立索引...")
+        self.controller._log(f"UnityFS 包索引：开始索引 {source}")
+        self.controller._run_task(
+            task=lambda progress_queue: self._index_worker(source, workers, progress_queue=progress_queue),
+            on_done=self._on_index_done,
+            on_progress=self._handle_progress
+        )
+
+    def _handle_progress(self, progress_data):
+        msg_type, payload = progress_data
+        if msg_type == 'progress':
+            self.progress_var.set(payload)
+
+    def _index_worker(self, source, workers, progress_queue=None):
+        all_files = []
+        for root, _, files in os.walk(source):
+            for file in files:
+                all_files.append(os.path.join(root, file))
+        total = len(all_files)
+        bundles, errors, skipped = {}, {}, 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_read_unityfs_index, path): path for path in all_files}
+            for i, future in enumerate(as_completed(futures)):
+                rel_path = os.path.relpath(futures[future], source).replace(os.sep, '/')
+                try:
+                    info = future.result()
+                except Exception as e:
+                    errors[rel_path] = str(e)
+                    continue
+                if info is None:
+                    skipped += 1
+                else:
+                    bundles[rel_path] = info
+                    _count_processed(records=1, nbytes=info['size'])
+                if i % 100 == 0 or i + 1 == total:
+                    progress_queue.put(('progress', (i + 1) / total * 100))
+        return {'root': source, 'bundles': bundles, 'errors': errors, 'skipped': skipped}
+
+    def _on_index_done(self, result):
+        self._set_ui_state(False)
+        self.progress_var.set(100)
+        if isinstance(result, Exception):
+            self.controller._handle_error("建立UnityFS索引失败", result)
+            self.summary_var.set("建立索引失败。")
+            return
+        self._set_index(result)
+        self.controller._log(f"UnityFS 包索引：{self.summary_var.get()}")
+
+    def _set_index(self, index):
+        self.index = index
+        # 预先展开成扁平列表，搜索时只做一次线性扫描
+        self._search_rows = []
+        for bundle, info in index['bundles'].items():
+            for name, _, size, _ in info['entries']:
+                self._search_rows.append((f"{bundle}\n{name}".lower(), bundle, name, size, info['data_compression']))
+        self.save_button.config(state='normal')
+        self.summary_var.set(f"包: {len(index['bundles'])}, 条目: {len(self._search_rows)}, "
+                             f"无UnityFS头: {index.get('skipped', 0)}, 解析失败: {len(index.get('errors', {}))}")
+        self._search()
+
+    def _search(self, limit=5000):
+        if not self.index:
+            return
+        keyword = self.search_var.get().strip().lower()
+        self.tree.delete(*self.tree.get_children())
+        count = 0
+        for text, bundle, name, size, compression in self._search_rows:
+            if keyword in text:
+                if count < limit:
+                    self.tree.insert('', 'end', values=(bundle, name, _format_size(size), compression))
+                count += 1
+        shown = f" (只显示前 {limit} 个)" if count > limit else ""
+        self.controller.status_var.set(f"UnityFS 索引搜索: {count} 个匹配{shown}")
+
+    def _save_index(self):
+        if not self.index:
+            return
+        file_path = filedialog.asksaveasfilename(
+            title="保存UnityFS索引", defaultextension=".json", filetypes=[("JSON files", "*.json")])
+        if not file_path:
+            return
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False)
+            messagebox.showinfo("成功", f"索引已保存至:\n{file_path}")
+        except Exception as e:
+            self.controller._handle_error("保存索引失败", e)
+
+    def _load_index(self):
+        file_path = filedialog.askopenfilename(title="加载UnityFS索引", filetypes=[("JSON files", "*.json")])
+        if not file_path:
+            return
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.source_dir.set(index.get('root', ''))
+            self._set_index(index)
+        except Exception as e:
+            self.controller._handle_error("加载索引失败", e)
+
 class LuaJITDecompilerWindow(Toplevel):
     def __init__(self, parent, controller):
         super().__init__(parent)
@@ -718,13 +3600,14 @@ class LuaJITDecompilerWindow(Toplevel):
         self.controller = controller
 
         if not LJD_AVAILABLE:
-            messagebox.showerror("依赖缺失", "ljd库未安装，无法使用此功能。")
-            self.destroy()
-            return
+            messagebox.showwarning("依赖缺失", "ljd库未安装，只能提取字符串常量，无法完整反编译。")
         
         self.source_dir = tk.StringVar()
         self.dest_dir = tk.StringVar()
+        self.store_dir = tk.StringVar()
         self.luajit_version = tk.StringVar(value="2.1")
+        # decompile: ljd 完整反编译；strings: 内置解析器只提取字符串常量和函数信息
+        self.mode = tk.StringVar(value="decompile" if LJD_AVAILABLE else "strings")
         
         main_frame = ttk.Frame(self, padding=10)
         main_frame.pack(fill='both', expand=True)
@@ -740,11 +3623,28 @@ class LuaJITDecompilerWindow(Toplevel):
         self.dest_button.grid(row=1, column=0, padx=5, pady=2, sticky='w')
         ttk.Entry(path_frame, textvariable=self.dest_dir, state='readonly').grid(row=1, column=1, sticky='ew', padx=5)
         
-        ttk.Label(path_frame, text="LuaJIT 版本:").grid(row=2, column=0, padx=5, pady=5, sticky='w')
+        # 可选：跨版本共享的存储目录，清单哈希已反编译过的文件直接链接
+        self.store_button = ttk.Button(path_frame, text="共享存储 (可选)", command=self._select_store)
+        self.store_button.grid(row=2, column=0, padx=5, pady=2, sticky='w')
+        ttk.Entry(path_frame, textvariable=self.store_dir, state='readonly').grid(row=2, column=1, sticky='ew', padx=5)
+
+        ttk.Label(path_frame, text="LuaJIT 版本:").grid(row=3, column=0, padx=5, pady=5, sticky='w')
         self.version_combo = ttk.Combobox(path_frame, textvariable=self.luajit_version, values=["2.1", "2.0"], state="readonly")
-        self.version_combo.grid(row=2, column=1, padx=5, sticky='w')
+        self.version_combo.grid(row=3, column=1, padx=5, sticky='w')
         path_frame.columnconfigure(1, weight=1)
 
+        mode_frame = ttk.LabelFrame(main_frame, text="处理方式")
+        mode_frame.pack(fill='x', pady=5)
+        self.decompile_radio = ttk.Radiobutton(mode_frame, text="完整反编译 (ljd)", variable=self.mode, value="decompile",
+                                               state='normal' if LJD_AVAILABLE else 'disabled', command=self._update_mode_state)
+        self.decompile_radio.pack(side='left', padx=5)
+        self.strings_radio = ttk.Radiobutton(mode_frame, text="仅提取字符串常量 (快速)", variable=self.mode, value="strings",
+                                             command=self._update_mode_state)
+        self.strings_radio.pack(side='left', padx=5)
+        # 字符串模式按文件头自动识别版本，也不使用共享存储
+        self.mode_hint_var = tk.StringVar()
+        ttk.Label(mode_frame, textvariable=self.mode_hint_var, foreground='gray').pack(side='left', padx=5)
+
         self.start_button = ttk.Button(main_frame, text="开始处理", command=self._start_processing_task)
         self.start_button.pack(pady=10)
         
@@ -756,6 +3656,13 @@ class LuaJITDecompilerWindow(Toplevel):
         log_frame.pack(fill='both', expand=True, pady=(5,0))
         self.log_text = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, state='disabled')
         self.log_text.pack(fill='both', expand=True, padx=2, pady=2)
+        self._update_mode_state()
+
+    def _update_mode_state(self):
+        strings_mode = self.mode.get() == "strings"
+        self.store_button.config(state='disabled' if strings_mode else 'normal')
+        self.version_combo.config(state='disabled' if strings_mode else 'readonly')
+        self.mode_hint_var.set("(版本自动识别，不使用共享存储)" if strings_mode else "")
     
     def _select_source(self):
         self.source_dir.set(filedialog.askdirectory(title="选择包含Lua字节码文件的源目录"))
@@ -763,6 +3670,9 @@ class LuaJITDecompilerWindow(Toplevel):
     def _select_dest(self):
         self.dest_dir.set(filedialog.askdirectory(title="选择保存Lua源码的目标目录"))
 
+    def _select_store(self):
+        self.store_dir.set(filedialog.askdirectory(title="选择共享存储目录 (留空则不使用)"))
+
     def _log_message(self, message):
         self.log_text.config(state='normal')
         self.log_text.insert(tk.END, message)
@@ -775,8 +3685,13 @@ class LuaJITDecompilerWindow(Toplevel):
 
     def _set_ui_state(self, is_running):
         state = 'disabled' if is_running else 'normal'
-        for widget in [self.start_button, self.source_button, self.dest_button, self.version_combo]:
+        for widget in [self.start_button, self.source_button, self.dest_button, self.store_button, self.version_combo,
+                       self.strings_radio]:
             widget.config(state=state)
+        if LJD_AVAILABLE:
+            self.decompile_radio.config(state=state)
+        if not is_running:
+            self._update_mode_state()
 
     def _start_processing_task(self):
         source, dest = self.source_dir.get(), self.dest_dir.get()
@@ -786,6 +3701,11 @@ class LuaJITDecompilerWindow(Toplevel):
         if os.path.abspath(source) == os.path.abspath(dest):
             messagebox.showerror("错误", "源目录和目标目录不能相同。")
             return
+        # 字符串模式不使用共享存储
+        store_dir = (self.store_dir.get() or None) if self.mode.get() == "decompile" else None
+        if store_dir and not self.controller.db_file_path:
+            messagebox.showerror("错误", "共享存储按清单哈希寻址，请先加载数据库。")
+            return
             
         self._set_ui_state(True)
         self.log_text.config(state='normal')
@@ -794,10 +3714,22 @@ class LuaJITDecompilerWindow(Toplevel):
         self.progress_var.set(0)
 
         version_str = self.luajit_version.get()
+        if self.mode.get() == "strings":
+            self.controller._log("LuaJIT 工具：开始提取字符串常量。")
+            self._log_message(f"源目录: {source}\n目标目录: {dest}\n处理方式: 提取字符串常量\n" + "="*40 + "\n")
+            workers = os.cpu_count() or 4
+            self.controller._run_task(
+                task=lambda progress_queue: self._extract_strings_worker(source, dest, workers, progress_queue=progress_queue),
+                on_done=self._on_extract_done,
+                on_progress=self._handle_progress
+            )
+            return
         self.controller._log("LuaJIT 工具：开始处理。")
-        self._log_message(f"源目录: {source}\n目标目录: {dest}\nLuaJIT版本: {version_str}\n" + "="*40 + "\n")
+        self._log_message(f"源目录: {source}\n目标目录: {dest}\nLuaJIT版本: {version_str}\n"
+                          + (f"共享存储: {store_dir}\n" if store_dir else "") + "="*40 + "\n")
         self.controller._run_task(
-            task=lambda progress_queue: self._process_files_worker(source, dest, version_str, progress_queue=progress_queue),
+            task=lambda progress_queue: self._process_files_worker(source, dest, version_str, progress_queue=progress_queue,
+                                                                   store_dir=store_dir),
             on_done=self._on_processing_done,
             on_progress=self._handle_progress
         )
@@ -809,58 +3741,120 @@ class LuaJITDecompilerWindow(Toplevel):
         elif msg_type == 'progress':
             self._update_progress(payload)
 
-    def _process_files_worker(self, source, dest, version_str, progress_queue=None):
+    def _preprocess_files(self, source, temp_dir, progress_queue, exclude=frozenset()):
+        # 截掉LuaJIT头之前的数据和末尾的空字节，写入临时目录；exclude 为跳过的相对路径
+        processed_count, skipped_count, error_count = 0, 0, 0
+        HEADER = b'\x1B\x4C\x4A'
+
+        all_files = []
+        for input_root_str, _, files in os.walk(source):
+            for file in files:
+                input_root = Path(input_root_str)
+                if exclude and (input_root / file).relative_to(source).as_posix() in exclude:
+                    continue
+                all_files.append((input_root, file))
+        
+        total_files = len(all_files)
+
+        for i, (input_root, file) in enumerate(all_files):
+            relative_dir = input_root.relative_to(source)
+            temp_output_root = Path(temp_dir) / relative_dir
+            temp_output_root.mkdir(parents=True, exist_ok=True)
+            input_path = input_root / file
+            
+            try:
+                progress_queue.put(('log', f"  - 预处理: {file} ... "))
+                with open(input_path, 'rb') as f_in:
+                    content = f_in.read()
+                _count_processed(records=1, nbytes=len(content))
+                
+                index = content.find(HEADER)
+                if index != -1:
+                    cleaned_bytes = content[index:].rstrip(b'\x00')
+
+                    temp_path = temp_output_root / file
+                    with open(temp_path, 'wb') as f_out:
+                        f_out.write(cleaned_bytes)
+                    progress_queue.put(('log', "完成\n"))
+                    processed_count += 1
+                else:
+                    progress_queue.put(('log', "跳过 (未找到LuaJIT头)\n"))
+                    skipped_count += 1
+            except Exception as e:
+                progress_queue.put(('log', f"失败 ({e})\n"))
+                self.controller._log(f"LuaJIT工具预处理'{file}'失败: {e}")
+                error_count += 1
+            
+            if total_files > 0:
+                # 预处理占总进度的 50%
+                progress_queue.put(('progress', (i + 1) / total_files * 50))
+        return processed_count, skipped_count, error_count
+
+    def _link_from_store(self, source, dest, store, kind, progress_queue):
+        # 返回 ({(相对目录, 文件名主干): 哈希}, 已复用的相对路径)；文件名主干为第一个 '.' 之前的部分
+        manifest = _read_manifest(self.controller.db_file_path)
+        # 先统计每个目录下的文件名主干：主干相同的文件反编译输出会重名，整组都不使用存储
+        stem_counts = Counter()
+        candidates = []
+        for input_root_str, _, files in os.walk(source):
+            rel_dir = Path(input_root_str).relative_to(source)
+            for file in files:
+                key = (rel_dir.as_posix(), file.split('.', 1)[0])
+                stem_counts[key] += 1
+                candidates.append((rel_dir, file, key))
+        by_stem, reused = {}, set()
+        for rel_dir, file, key in candidates:
+            if stem_counts[key] > 1:
+                continue
+            rel_path = (rel_dir / file).as_posix()
+            hash_val = manifest.get(rel_path, (None,))[0]
+            if not BundleStore.valid_hash(hash_val):
+                continue
+            by_stem[key] = hash_val
+            if store.get(kind, hash_val):
+                out_dir = Path(dest) / rel_dir
+                out_dir.mkdir(parents=True, exist_ok=True)
+                store.link_out(kind, hash_val, out_dir / (key[1] + store.suffix(kind, hash_val)))
+                reused.add(rel_path)
+        progress_queue.put(('log', f"共享存储中已有 {len(reused)} 个文件，直接链接。\n"))
+        return by_stem, reused
+
+    def _ingest_outputs(self, out_dir, dest, store, kind, by_stem):
+        # 反编译输出存入共享存储，再链接到目标目录；无法对应清单哈希的直接移动
+        for out_root_str, _, files in os.walk(out_dir):
+            rel_dir = Path(out_root_str).relative_to(out_dir)
+            target_dir = Path(dest) / rel_dir
+            target_dir.mkdir(parents=True, exist_ok=True)
+            for file in files:
+                stem = file.split('.', 1)[0]
+                hash_val = by_stem.get((rel_dir.as_posix(), stem))
+                if hash_val:
+                    store.put(kind, hash_val, os.path.join(out_root_str, file), file[len(stem):])
+                    store.link_out(kind, hash_val, target_dir / file)
+                else:
+                    shutil.move(os.path.join(out_root_str, file), target_dir / file)
+
+    def _process_files_worker(self, source, dest, version_str, progress_queue=None, store_dir=None):
         #代码来自 https://github.com/unk35h/TextDumpScripts_ag/blob/main/LuaDecode.py
         temp_dir = tempfile.mkdtemp(prefix="ljd_preprocessed_")
+        out_dir = None
         try:
-            processed_count, skipped_count, error_count = 0, 0, 0
-            HEADER = b'\x1B\x4C\x4A'
+            store, by_stem, reused = None, {}, set()
+            # 反编译结果与 LuaJIT 版本有关，不同版本分开存放
+            kind = 'lua' + version_str.replace('.', '')
+            if store_dir:
+                store = BundleStore(store_dir)
+                by_stem, reused = self._link_from_store(source, dest, store, kind, progress_queue)
+                out_dir = tempfile.mkdtemp(prefix="ljd_output_")
 
             progress_queue.put(('log', "步骤 1/2: 预处理Lua字节码文件...\n"))
-            
-            all_files = []
-            for input_root_str, _, files in os.walk(source):
-                for file in files:
-                    all_files.append((Path(input_root_str), file))
-            
-            total_files = len(all_files)
-
-            for i, (input_root, file) in enumerate(all_files):
-                relative_dir = input_root.relative_to(source)
-                temp_output_root = Path(temp_dir) / relative_dir
-                temp_output_root.mkdir(parents=True, exist_ok=True)
-                input_path = input_root / file
-                
-                try:
-                    progress_queue.put(('log', f"  - 预处理: {file} ... "))
-                    with open(input_path, 'rb') as f_in:
-                        content = f_in.read()
-                    
-                    index = content.find(HEADER)
-                    if index != -1:
-                        cleaned_bytes = content[index:].rstrip(b'\x00')
-
-                        temp_path = temp_output_root / file
-                        with open(temp_path, 'wb') as f_out:
-                            f_out.write(cleaned_bytes)
-                        progress_queue.put(('log', "完成\n"))
-                        processed_count += 1
-                    else:
-                        progress_queue.put(('log', "跳过 (未找到LuaJIT头)\n"))
-                        skipped_count += 1
-                except Exception as e:
-                    progress_queue.put(('log', f"失败 ({e})\n"))
-                    self.controller._log(f"LuaJIT工具预处理'{file}'失败: {e}")
-                    error_count += 1
-                
-                if total_files > 0:
-                    # 预处理占总进度的 50%
-                    progress_queue.put(('progress', (i + 1) / total_files * 50))
+            processed_count, skipped_count, error_count = self._preprocess_files(source, temp_dir, progress_queue, exclude=reused)
 
             progress_queue.put(('log', f"\n预处理完成。 " f"处理: {processed_count}, 跳过: {skipped_count}, 失败: {error_count}\n" + "="*40 + "\n"))
             
 
             progress_queue.put(('log', "步骤 2/2: 开始反编译...\n"))
+            set_luajit_version, process_folder = _import_ljd()
             try:
                 version_int = int(version_str.replace('.', ''))
                 set_luajit_version(version_int)
@@ -869,18 +3863,79 @@ class LuaJITDecompilerWindow(Toplevel):
                 raise ValueError(f"无效的LuaJIT版本字符串: {version_str}") from e
 
             progress_queue.put(('log', f"正在从临时目录反编译到: {dest}\n"))
-            decompiled_count, failed_count = process_folder(temp_dir, dest)
+            decompiled_count, failed_count = process_folder(temp_dir, out_dir or dest)
+            if store:
+                self._ingest_outputs(out_dir, dest, store, kind, by_stem)
             
             progress_queue.put(('log', f"反编译完成。成功: {decompiled_count}, 失败: {failed_count}\n"))
             progress_queue.put(('progress', 100)) # 完成所有工作
 
-            return (processed_count, skipped_count, error_count, decompiled_count, failed_count)
+            return (processed_count, skipped_count, error_count, decompiled_count, failed_count, len(reused))
 
         finally:
             # 确保无论成功还是失败，临时目录都会被清理
             shutil.rmtree(temp_dir, ignore_errors=True)
+            if out_dir:
+                shutil.rmtree(out_dir, ignore_errors=True)
             progress_queue.put(('log', "\n临时文件已清理。\n"))
 
+    def _extract_strings_worker(self, source, dest, workers, progress_queue=None):
+        # 不反编译：多进程解析字节码，每个文件输出 <文件名>.strings.lua，汇总写入 luajit_strings.csv
+        jobs = []
+        for input_root_str, _, files in os.walk(source):
+            relative_dir = Path(input_root_str).relative_to(source)
+            for file in files:
+                jobs.append(((relative_dir / file).as_posix(), os.path.join(input_root_str, file),
+                             str(Path(dest) / relative_dir / (file + '.strings.lua'))))
+        total = len(jobs)
+        progress_queue.put(('log', f"共 {total} 个文件，使用 {workers} 个进程解析...\n"))
+
+        extracted_count, skipped_count, error_count, string_count = 0, 0, 0, 0
+        os.makedirs(dest, exist_ok=True)
+        csv_path = os.path.join(dest, 'luajit_strings.csv')
+        with open(csv_path, 'w', newline='', encoding='utf-8-sig') as f_csv, \
+                ProcessPoolExecutor(max_workers=workers) as pool:
+            writer = csv.writer(f_csv)
+            writer.writerow(['file', 'function', 'line_start', 'line_end', 'string'])
+            futures = {pool.submit(_dump_luajit_strings, input_path, output_path): rel_path
+                       for rel_path, input_path, output_path in jobs}
+            for i, future in enumerate(as_completed(futures)):
+                rel_path = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    progress_queue.put(('log', f"  - 失败: {rel_path} ({e})\n"))
+                    error_count += 1
+                    continue
+                if rows is None:
+                    skipped_count += 1
+                else:
+                    extracted_count += 1
+                    string_count += len(rows)
+                    writer.writerows((rel_path,) + row for row in rows)
+                _count_processed(records=1)
+                if i % 50 == 0 or i + 1 == total:
+                    progress_queue.put(('progress', (i + 1) / total * 100))
+
+        progress_queue.put(('log', f"字符串汇总已写入: {csv_path}\n"))
+        return extracted_count, skipped_count, error_count, string_count
+
+    def _on_extract_done(self, result):
+        self._set_ui_state(False)
+        self.progress_var.set(100)
+        if isinstance(result, Exception):
+            self._log_message(f"\n处理中断，发生严重错误: {result}")
+            self.controller._handle_error("提取字符串失败", result)
+            return
+        extracted, skipped, errors, strings = result
+        summary = (f"\n提取完成。\n"
+                   f"  - 成功解析文件: {extracted}\n"
+                   f"  - 跳过 (无头): {skipped}\n"
+                   f"  - 解析失败: {errors}\n"
+                   f"  - 字符串常量: {strings}\n")
+        self._log_message("="*40 + summary)
+        self.controller._log(f"LuaJIT工具：{summary.strip()}")
+
     def _on_processing_done(self, result):
         #ai大哥力作
         self._set_ui_state(False)
@@ -894,9 +3949,10 @@ class LuaJITDecompilerWindow(Toplevel):
             traceback.print_exc()
         else:
             # 解包从 worker 返回的详细结果
-            processed, skipped, pre_errors, decompiled, failed = result
+            processed, skipped, pre_errors, decompiled, failed, reused = result
             
             summary = (
+                f"共享存储复用: {reused}\n"
                 "预处理阶段:\n"
                 f"  - 成功处理文件: {processed}\n"
                 f"  - 跳过 (无头): {skipped}\n"
@@ -912,29 +3968,961 @@ class LuaJITDecompilerWindow(Toplevel):
             self.controller._log(f"LuaJIT工具：处理完成。{summary.replace('\n', ' ')}")
             messagebox.showinfo("处理完成", "所有步骤已完成，请查看日志获取详细报告。")
 
-class AssetAnalyzerApp:
-    def __init__(self, master):
-        self.master = master
-        master.title("大眼文件工具")
-        master.geometry("1200x800")
-        
-        self.db_file_path = None
-        self.analysis_data = None
-        self.logging_enabled = False
-        self.log_file = None
-        self.detailed_log_var = tk.BooleanVar(value=False)
-        self.current_selected_path = None
-        self.task_queue = queue.Queue()
-        self.progress_window = None
-        
-        self._setup_ui()
-        self._update_ui_state()
-        self._process_queue()
-        self._log("应用程序启动。")
+class AssetVerifyWindow(Toplevel):
+    # 本地资源目录校验：先比大小，再并行哈希
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.title("资源目录校验")
+        self.geometry("700x550")
+        self.controller = controller
+        self.asset_dir = tk.StringVar()
+        self.thread_count = tk.IntVar(value=os.cpu_count() or 4)
+        self.verify_results = None
 
-    def _setup_ui(self):
-        self.status_var = tk.StringVar(value="欢迎使用！请先加载文件。")
-        ttk.Label(self.master, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W).pack(side=tk.BOTTOM, fill=tk.X)
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill='both', expand=True)
+
+        path_frame = ttk.Frame(main_frame)
+        path_frame.pack(fill='x', pady=5)
+        self.source_button = ttk.Button(path_frame, text="选择资源目录", command=self._select_source)
+        self.source_button.grid(row=0, column=0, padx=5, pady=2, sticky='w')
+        ttk.Entry(path_frame, textvariable=self.asset_dir, state='readonly').grid(row=0, column=1, sticky='ew', padx=5)
+        ttk.Label(path_frame, text="哈希线程数:").grid(row=1, column=0, padx=5, pady=5, sticky='w')
+        self.thread_spin = ttk.Spinbox(path_frame, from_=1, to=64, textvariable=self.thread_count, width=5)
+        self.thread_spin.grid(row=1, column=1, padx=5, sticky='w')
+        path_frame.columnconfigure(1, weight=1)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(pady=10)
+        self.start_button = ttk.Button(button_frame, text="开始校验", command=self._start_verify_task)
+        self.start_button.pack(side='left', padx=5)
+        self.save_button = ttk.Button(button_frame, text="保存校验结果", command=self._save_results, state='disabled')
+        self.save_button.pack(side='left', padx=5)
+
+        self.progress_var = tk.DoubleVar()
+        self.progressbar = ttk.Progressbar(main_frame, variable=self.progress_var, maximum=100)
+        self.progressbar.pack(fill='x', pady=5)
+
+        log_frame = ttk.LabelFrame(main_frame, text="校验日志")
+        log_frame.pack(fill='both', expand=True, pady=(5,0))
+        self.log_text = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, state='disabled')
+        self.log_text.pack(fill='both', expand=True, padx=2, pady=2)
+
+    def _select_source(self):
+        self.asset_dir.set(filedialog.askdirectory(title="选择已安装客户端的资源目录"))
+
+    def _log_message(self, message):
+        self.log_text.config(state='normal')
+        self.log_text.insert(tk.END, message)
+        self.log_text.see(tk.END)
+        self.log_text.config(state='disabled')
+        self.update_idletasks()
+
+    def _set_ui_state(self, is_running):
+        state = 'disabled' if is_running else 'normal'
+        for widget in [self.start_button, self.source_button, self.thread_spin]:
+            widget.config(state=state)
+
+    def _start_verify_task(self):
+        asset_dir = self.asset_dir.get()
+        db_path = self.controller.db_file_path
+        if not asset_dir or not db_path:
+            messagebox.showerror("错误", "请先加载数据库并选择资源目录。")
+            return
+        try:
+            workers = max(1, int(self.thread_count.get()))
+        except (tk.TclError, ValueError):
+            messagebox.showerror("错误", "线程数无效。")
+            return
+
+        self._set_ui_state(True)
+        self.save_button.config(state='disabled')
+        self.log_text.config(state='normal')
+        self.log_text.delete('1.0', tk.END)
+        self.log_text.config(state='disabled')
+        self.progress_var.set(0)
+        self.controller._log(f"资源校验：开始校验 {asset_dir}")
+        self._log_message(f"资源目录: {asset_dir}\n线程数: {workers}\n" + "="*40 + "\n")
+        self.controller._run_task(
+            task=lambda progress_queue: self._verify_worker(db_path, asset_dir, workers, progress_queue=progress_queue),
+            on_done=self._on_verify_done,
+            on_progress=self._handle_progress
+        )
+
+    def _handle_progress(self, progress_data):
+        msg_type, payload = progress_data
+        if msg_type == 'log':
+            self._log_message(payload)
+        elif msg_type == 'progress':
+            self.progress_var.set(payload)
+
+    @staticmethod
+    def _scan_directory(asset_dir):
+        # os.scandir 自带 stat 缓存，比 os.walk + os.stat 少一次系统调用
+        on_disk = {}
+        stack = [asset_dir]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        rel_path = os.path.relpath(entry.path, asset_dir).replace(os.sep, '/')
+                        on_disk[rel_path] = (entry.path, st.st_size, st.st_mtime_ns)
+        return on_disk
+
+    def _verify_worker(self, db_path, asset_dir, workers, progress_queue=None):
+        progress_queue.put(('log', "读取清单...\n"))
+        manifest = _read_manifest(db_path)
+
+        # 缓存: 绝对路径 -> [大小, mtime_ns, 摘要]
+        cache_path = db_path + '.verify_cache.json'
+        cache = {}
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except (OSError, ValueError) as e:
+                progress_queue.put(('log', f"校验缓存无法读取，将全部重新计算 ({e})\n"))
+
+        progress_queue.put(('log', "扫描资源目录...\n"))
+        on_disk = self._scan_directory(asset_dir)
+
+        results = {'missing': [], 'extra': [], 'size_mismatch': [], 'hash_mismatch': []}
+        candidates = []
+        cached_hits, unverifiable = 0, 0
+        for path, (hash_val, size) in manifest.items():
+            info = on_disk.pop(path, None)
+            if info is None:
+                results['missing'].append((path, hash_val, ''))
+                continue
+            abs_path, disk_size, mtime_ns = info
+            # 大小为0视为未知，只做哈希校验
+            if size > 0 and disk_size != size:
+                results['size_mismatch'].append((path, size, disk_size))
+                continue
+            if _hasher_for(hash_val) is None:
+                unverifiable += 1
+                continue
+            cached = cache.get(abs_path)
+            if cached and cached[0] == disk_size and cached[1] == mtime_ns:
+                cached_hits += 1
+                if cached[2].lower() != hash_val.lower():
+                    results['hash_mismatch'].append((path, hash_val, cached[2]))
+                continue
+            candidates.append((path, hash_val, abs_path, disk_size, mtime_ns))
+        results['extra'] = [(path, '', info[1]) for path, info in sorted(on_disk.items())]
+
+        total = len(candidates)
+        progress_queue.put(('log', f"大小检查完成，需要哈希 {total} 个文件 (缓存命中 {cached_hits})。\n"))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_hash_file_mmap, c[2], _hasher_for(c[1])): c for c in candidates}
+            for i, future in enumerate(as_completed(futures)):
+                path, hash_val, abs_path, disk_size, mtime_ns = futures[future]
+                try:
+                    digest = future.result()
+                except OSError as e:
+                    progress_queue.put(('log', f"  - 读取失败: {path} ({e})\n"))
+                    continue
+                cache[abs_path] = [disk_size, mtime_ns, digest]
+                _count_processed(records=1, nbytes=disk_size)
+                if digest.lower() != hash_val.lower():
+                    results['hash_mismatch'].append((path, hash_val, digest))
+                if i % 200 == 0 or i + 1 == total:
+                    progress_queue.put(('progress', (i + 1) / total * 100))
+
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        for items in results.values():
+            items.sort()
+        return results, cached_hits, unverifiable
+
+    def _on_verify_done(self, result):
+        self._set_ui_state(False)
+        self.progress_var.set(100)
+        if isinstance(result, Exception):
+            self.controller._handle_error("资源校验失败", result)
+            return
+
+        self.verify_results, cached_hits, unverifiable = result
+        names = {'missing': "缺失", 'extra': "多余", 'size_mismatch': "大小不符", 'hash_mismatch': "哈希不符"}
+        lines = []
+        for kind, items in self.verify_results.items():
+            lines.append(f"\n[{names[kind]}] {len(items)} 个")
+            lines.extend(f"  {item[0]}" for item in items[:200])
+            if len(items) > 200:
+                lines.append(f"  ... 其余 {len(items) - 200} 个请保存结果查看")
+        summary = ", ".join(f"{names[k]}: {len(v)}" for k, v in self.verify_results.items())
+        lines.append("\n" + "="*40 + f"\n校验完成。{summary}\n缓存命中: {cached_hits}, 无法识别哈希格式: {unverifiable}\n")
+        self._log_message("\n".join(lines))
+        self.save_button.config(state='normal')
+        self.controller._log(f"资源校验：完成。{summary}")
+
+    def _save_results(self):
+        if not self.verify_results:
+            messagebox.showwarning("提示", "没有可保存的校验结果。")
+            return
+        file_path = filedialog.asksaveasfilename(
+            title="保存校验结果", defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if not file_path:
+            return
+        try:
+            with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(['status', 'path', 'expected', 'actual'])
+                for kind, items in self.verify_results.items():
+                    for path, expected, actual in items:
+                        writer.writerow([kind, path, expected, actual])
+            messagebox.showinfo("成功", f"结果已保存至:\n{file_path}")
+            self.controller._log(f"校验结果已保存至: {file_path}")
+        except Exception as e:
+            self.controller._handle_error("保存结果失败", e)
+
+class ManifestWatchWindow(Toplevel):
+    # 监视资源目录：游戏更新写入新的 assethash 清单后自动入库、对比上一版并估算下载量
+    _closed_watchers = []  # 窗口关闭时还没退出的监视器，退出前不允许在新窗口里开始监视
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.title("监视资源目录")
+        self.geometry("700x550")
+        self.controller = controller
+        self.watcher = None
+        self.watch_dir = tk.StringVar()
+        self.db_dir = tk.StringVar(value=os.path.abspath("versions"))
+        self.pattern = tk.StringVar(value="assethash_*.bytes")
+        self.interval = tk.DoubleVar(value=2.0)
+        self.auto_load_var = tk.BooleanVar(value=True)
+
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill='both', expand=True)
+
+        path_frame = ttk.Frame(main_frame)
+        path_frame.pack(fill='x', pady=5)
+        self.watch_button = ttk.Button(path_frame, text="选择资源目录", command=self._select_watch_dir)
+        self.watch_button.grid(row=0, column=0, padx=5, pady=2, sticky='w')
+        ttk.Entry(path_frame, textvariable=self.watch_dir, state='readonly').grid(row=0, column=1, sticky='ew', padx=5)
+        self.db_button = ttk.Button(path_frame, text="数据库保存目录", command=self._select_db_dir)
+        self.db_button.grid(row=1, column=0, padx=5, pady=2, sticky='w')
+        ttk.Entry(path_frame, textvariable=self.db_dir, state='readonly').grid(row=1, column=1, sticky='ew', padx=5)
+        ttk.Label(path_frame, text="文件名匹配:").grid(row=2, column=0, padx=5, pady=2, sticky='w')
+        self.pattern_entry = ttk.Entry(path_frame, textvariable=self.pattern)
+        self.pattern_entry.grid(row=2, column=1, sticky='ew', padx=5)
+        ttk.Label(path_frame, text="轮询间隔 (秒):").grid(row=3, column=0, padx=5, pady=2, sticky='w')
+        self.interval_spin = ttk.Spinbox(path_frame, from_=0.5, to=600, increment=0.5, textvariable=self.interval, width=6)
+        self.interval_spin.grid(row=3, column=1, padx=5, sticky='w')
+        path_frame.columnconfigure(1, weight=1)
+
+        ttk.Checkbutton(main_frame, text="新版本入库后加载到主窗口", variable=self.auto_load_var).pack(anchor='w', padx=5)
+        self.start_button = ttk.Button(main_frame, text="开始监视", command=self._toggle_watch)
+        self.start_button.pack(pady=10)
+
+        log_frame = ttk.LabelFrame(main_frame, text="监视日志")
+        log_frame.pack(fill='both', expand=True, pady=(5,0))
+        self.log_text = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, state='disabled')
+        self.log_text.pack(fill='both', expand=True, padx=2, pady=2)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _select_watch_dir(self):
+        self.watch_dir.set(filedialog.askdirectory(title="选择游戏资源目录 (清单所在目录)"))
+
+    def _select_db_dir(self):
+        path = filedialog.askdirectory(title="选择保存各版本数据库的目录")
+        if path:
+            self.db_dir.set(path)
+
+    def _log_message(self, message):
+        self.log_text.config(state='normal')
+        self.log_text.insert(tk.END, f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
+        self.log_text.see(tk.END)
+        self.log_text.config(state='disabled')
+
+    def _set_ui_state(self, is_running):
+        state = 'disabled' if is_running else 'normal'
+        for widget in [self.watch_button, self.db_button, self.pattern_entry, self.interval_spin]:
+            widget.config(state=state)
+        self.start_button.config(text="停止监视" if is_running else "开始监视")
+
+    def _toggle_watch(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.start_button.config(text="正在停止...", state='disabled')
+            self._wait_stopped()
+            return
+        watch_dir, db_dir = self.watch_dir.get(), self.db_dir.get()
+        if not watch_dir or not os.path.isdir(watch_dir):
+            messagebox.showerror("错误", "请先选择资源目录。")
+            return
+        ManifestWatchWindow._closed_watchers = [w for w in self._closed_watchers if w.is_alive()]
+        if self._closed_watchers:
+            messagebox.showwarning("请稍候", "上一次的监视还在入库，完成后才能重新开始。", parent=self)
+            return
+        try:
+            interval = max(0.5, float(self.interval.get()))
+            os.makedirs(db_dir, exist_ok=True)
+            # 监视线程的事件经主任务队列回到界面线程
+            on_event = lambda kind, payload: self.controller.task_queue.put(('progress', self._handle_event, (kind, payload)))
+            self.watcher = ManifestWatcher(watch_dir, db_dir, self.pattern.get() or "*", self.controller._load_from_json_worker,
+                                           on_event, interval=interval)
+            self.watcher.initialize(baseline_db=self.controller.db_file_path)
+        except (tk.TclError, ValueError, OSError) as e:
+            self.watcher = None
+            messagebox.showerror("错误", f"无法开始监视: {e}")
+            return
+        baseline = self.watcher.state['last_db']
+        self._log_message(f"开始监视 {watch_dir} ({self.watcher.pattern})，每 {interval} 秒轮询一次。")
+        self._log_message(f"对比基准: {baseline or '无 (将以目录中最新的清单为基准)'}")
+        self.controller._log(f"监视资源目录：开始 {watch_dir}")
+        self._set_ui_state(True)
+        self.watcher.start()
+
+    def _wait_stopped(self):
+        # 旧的监视线程可能还在入库；等它退出后才允许重新开始，免得两个监视器同时写状态文件
+        if not self.winfo_exists():
+            return
+        if self.watcher.is_alive():
+            self.after(200, self._wait_stopped)
+            return
+        self.watcher = None
+        self.start_button.config(state='normal')
+        self._set_ui_state(False)
+        self._log_message("已停止监视。")
+        self.controller._log("监视资源目录：停止。")
+
+    def _handle_event(self, event):
+        # 窗口关闭后仍在进行的入库会继续发事件，这时控件已销毁
+        if not self.winfo_exists():
+            return
+        kind, payload = event
+        if kind == 'log':
+            self._log_message(payload)
+        elif kind == 'error':
+            self._log_message(f"错误: {payload}")
+            self.controller._log(f"监视资源目录：{payload}")
+        elif kind == 'ingested':
+            self._on_ingested(payload)
+
+    def _on_ingested(self, info):
+        message = f"{info['name']} 已入库: {os.path.basename(info['db_path'])} ({info['total']} 条)"
+        diff = info['diff']
+        if diff is not None:
+            plan, changes = diff['plan'], diff['changes']
+            message += (f"\n  对比 {os.path.basename(info['previous'])}: 新增 {len(diff['added'])}, "
+                        f"变更 {len(diff['changed'])}, 移除 {len(diff['removed'])}, "
+                        f"预计下载量 {_format_size(plan.download_bytes)}, 净变化 {_format_delta(changes.delta_bytes)}"
+                        f"\n  报告: {info['report_path']}")
+        self._log_message(message)
+        self.controller._log(f"监视资源目录：{message}")
+        self.controller.status_var.set(f"新版本已入库: {info['name']}" + (
+            f"，预计下载量 {_format_size(diff['plan'].download_bytes)}" if diff is not None else ""))
+        if self.auto_load_var.get():
+            controller = self.controller
+            controller.db_file_path = info['db_path']
+            controller.analysis_data = None
+            controller.dependency_graph = None
+            controller._update_ui_state()
+            controller._run_task(task=controller._analyze_categories_worker, on_done=controller._on_analyze_done)
+
+    def _on_close(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            if self.watcher.is_alive():
+                ManifestWatchWindow._closed_watchers.append(self.watcher)
+            self.controller._log("监视资源目录：窗口关闭，停止监视。")
+        self.destroy()
+
+class BatchIngestWindow(Toplevel):
+    # 批量入库：多进程并行解析目录中的大量历史清单，每个清单写入独立的数据库
+    COLUMNS = (('entries', "条目数", 80), ('bytes', "总大小", 90), ('strategy', "解析策略", 190),
+               ('seconds', "耗时", 70), ('status', "状态", 150))
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.title("批量入库")
+        self.geometry("900x600")
+        self.controller = controller
+        self.source_dir = tk.StringVar()
+        self.db_dir = tk.StringVar(value=os.path.abspath("versions"))
+        self.pattern = tk.StringVar(value="**/assethash_*.bytes")
+        self.process_count = tk.IntVar(value=os.cpu_count() or 4)
+        self.rows = []
+
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill='both', expand=True)
+
+        path_frame = ttk.Frame(main_frame)
+        path_frame.pack(fill='x', pady=5)
+        self.source_button = ttk.Button(path_frame, text="选择清单目录", command=self._select_source)
+        self.source_button.grid(row=0, column=0, padx=5, pady=2, sticky='w')
+        ttk.Entry(path_frame, textvariable=self.source_dir, state='readonly').grid(row=0, column=1, sticky='ew', padx=5)
+        self.db_button = ttk.Button(path_frame, text="数据库保存目录", command=self._select_db_dir)
+        self.db_button.grid(row=1, column=0, padx=5, pady=2, sticky='w')
+        ttk.Entry(path_frame, textvariable=self.db_dir, state='readonly').grid(row=1, column=1, sticky='ew', padx=5)
+        ttk.Label(path_frame, text="文件名匹配 (glob):").grid(row=2, column=0, padx=5, pady=2, sticky='w')
+        self.pattern_entry = ttk.Entry(path_frame, textvariable=self.pattern)
+        self.pattern_entry.grid(row=2, column=1, sticky='ew', padx=5)
+        ttk.Label(path_frame, text="进程数:").grid(row=3, column=0, padx=5, pady=2, sticky='w')
+        self.process_spin = ttk.Spinbox(path_frame, from_=1, to=64, textvariable=self.process_count, width=5)
+        self.process_spin.grid(row=3, column=1, padx=5, sticky='w')
+        path_frame.columnconfigure(1, weight=1)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(pady=5)
+        self.start_button = ttk.Button(button_frame, text="开始入库", command=self._start_batch_task)
+        self.start_button.pack(side='left', padx=5)
+        self.load_button = ttk.Button(button_frame, text="加载选中的数据库", command=self._load_selected, state='disabled')
+        self.load_button.pack(side='left', padx=5)
+        self.save_button = ttk.Button(button_frame, text="保存汇总表...", command=self._save_summary, state='disabled')
+        self.save_button.pack(side='left', padx=5)
+
+        self.progress_var = tk.DoubleVar()
+        ttk.Progressbar(main_frame, variable=self.progress_var, maximum=100).pack(fill='x', pady=5)
+
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill='both', expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=[c[0] for c in self.COLUMNS], show='tree headings')
+        self.tree.heading('#0', text="清单")
+        self.tree.column('#0', width=280, anchor='w')
+        for col, text, width in self.COLUMNS:
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor='w')
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.tree.bind("<Double-1>", lambda e: self._load_selected())
+
+        self.summary_var = tk.StringVar(value="选择清单目录后开始入库。")
+        ttk.Label(main_frame, textvariable=self.summary_var).pack(anchor='w', pady=(5, 0))
+
+    def _select_source(self):
+        self.source_dir.set(filedialog.askdirectory(title="选择存放历史清单的目录"))
+
+    def _select_db_dir(self):
+        path = filedialog.askdirectory(title="选择保存各版本数据库的目录")
+        if path:
+            self.db_dir.set(path)
+
+    def _set_ui_state(self, is_running):
+        state = 'disabled' if is_running else 'normal'
+        for widget in [self.start_button, self.source_button, self.db_button, self.pattern_entry, self.process_spin]:
+            widget.config(state=state)
+
+    @staticmethod
+    def _plan_jobs(source, pattern, db_dir):
+        # 返回 [(相对路径, 清单路径, 数据库路径)]；数据库名由相对路径得出，重复入库会覆盖同名数据库
+        # 不同清单得出同一个名字时 (如 a/b_c.bytes 与 a_b/c.bytes，或只差扩展名) 各自加上相对路径的短哈希
+        planned = []
+        for json_path in sorted(glob.glob(os.path.join(source, pattern), recursive=True)):
+            if not os.path.isfile(json_path):
+                continue
+            rel_path = os.path.relpath(json_path, source).replace(os.sep, '/')
+            planned.append((rel_path, json_path, os.path.splitext(rel_path)[0].replace('/', '_')))
+        counts = Counter(os.path.normcase(stem) for _, _, stem in planned)
+        jobs = []
+        for rel_path, json_path, stem in planned:
+            if counts[os.path.normcase(stem)] > 1:
+                stem += '_' + hashlib.sha1(rel_path.encode('utf-8')).hexdigest()[:8]
+            jobs.append((rel_path, json_path, os.path.join(db_dir, stem + '.dbm')))
+        return jobs
+
+    def _start_batch_task(self):
+        source, db_dir = self.source_dir.get(), self.db_dir.get()
+        if not source or not os.path.isdir(source):
+            messagebox.showerror("错误", "请先选择清单目录。")
+            return
+        try:
+            workers = max(1, int(self.process_count.get()))
+        except (tk.TclError, ValueError):
+            messagebox.showerror("错误", "进程数无效。")
+            return
+        jobs = self._plan_jobs(source, self.pattern.get() or "*", db_dir)
+        if not jobs:
+            messagebox.showinfo("提示", "没有找到匹配的清单文件。")
+            return
+        try:
+            os.makedirs(db_dir, exist_ok=True)
+        except OSError as e:
+            messagebox.showerror("错误", f"无法创建数据库目录: {e}")
+            return
+
+        self._set_ui_state(True)
+        self.load_button.config(state='disabled')
+        self.save_button.config(state='disabled')
+        self.tree.delete(*self.tree.get_children())
+        self.rows = []
+        self.progress_var.set(0)
+        self.summary_var.set(f"共 {len(jobs)} 个清单，使用 {min(workers, len(jobs))} 个进程解析...")
+        self.controller._log(f"批量入库：开始处理 {source} 中的 {len(jobs)} 个清单")
+        self.controller._run_task(
+            task=lambda progress_queue: self._batch_worker(jobs, workers, progress_queue=progress_queue),
+            on_done=self._on_batch_done,
+            on_progress=self._handle_progress
+        )
+
+    def _handle_progress(self, progress_data):
+        msg_type, payload = progress_data
+        if msg_type == 'row':
+            self._insert_row(payload)
+        elif msg_type == 'progress':
+            self.progress_var.set(payload)
+
+    def _batch_worker(self, jobs, workers, progress_queue=None):
+        # JSON 解析受 GIL 限制，用进程池；每完成一个清单就把汇总行发回界面
+        total = len(jobs)
+        rows = []
+        with ProcessPoolExecutor(max_workers=min(workers, total)) as pool:
+            futures = {pool.submit(_ingest_manifest_file, json_path, db_path): (rel_path, json_path, db_path)
+                       for rel_path, json_path, db_path in jobs}
+            for i, future in enumerate(as_completed(futures)):
+                rel_path, json_path, db_path = futures[future]
+                try:
+                    row = future.result()
+                    row['status'] = 'ok'
+                    _count_processed(records=row['entries'], nbytes=os.path.getsize(json_path))
+                except Exception as e:
+                    row = {'json': json_path, 'db': db_path, 'strategy': '', 'entries': 0,
+                           'bytes': 0, 'seconds': 0.0, 'status': f"失败: {e}"}
+                row['name'] = rel_path
+                rows.append(row)
+                progress_queue.put(('row', row))
+                progress_queue.put(('progress', (i + 1) / total * 100))
+        rows.sort(key=lambda r: r['name'])
+        return rows
+
+    def _insert_row(self, row):
+        ok = row['status'] == 'ok'
+        values = (row['entries'], _format_size(row['bytes']) if ok else '', row['strategy'],
+                  f"{row['seconds']:.2f}s" if ok else '', "完成" if ok else row['status'])
+        self.tree.insert('', 'end', iid=row['db'], text=row['name'], values=values)
+
+    def _on_batch_done(self, result):
+        self._set_ui_state(False)
+        self.progress_var.set(100)
+        if isinstance(result, Exception):
+            self.controller._handle_error("批量入库失败", result)
+            self.summary_var.set("批量入库失败。")
+            return
+        self.rows = result
+        # 按清单名重新排列，完成顺序与提交顺序无关
+        for index, row in enumerate(result):
+            self.tree.move(row['db'], '', index)
+        done = [r for r in result if r['status'] == 'ok']
+        summary = (f"完成 {len(done)}/{len(result)} 个清单，共 {sum(r['entries'] for r in done)} 条，"
+                   f"累计解析耗时 {sum(r['seconds'] for r in done):.1f}s")
+        self.summary_var.set(summary)
+        self.controller._log(f"批量入库：{summary}")
+        self.save_button.config(state='normal')
+        if done:
+            self.load_button.config(state='normal')
+
+    def _load_selected(self):
+        selection = self.tree.selection()
+        row = next((r for r in self.rows if selection and r['db'] == selection[0]), None)
+        if row is None or row['status'] != 'ok':
+            return
+        controller = self.controller
+        controller.db_file_path = row['db']
+        controller.analysis_data = None
+        controller.dependency_graph = None
+        controller._update_ui_state()
+        controller._log(f"批量入库：加载数据库 {row['db']}")
+        controller._run_task(task=controller._analyze_categories_worker, on_done=controller._on_analyze_done)
+
+    def _save_summary(self):
+        if not self.rows:
+            return
+        file_path = filedialog.asksaveasfilename(
+            title="保存批量入库汇总", defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if not file_path:
+            return
+        try:
+            with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(['manifest', 'db', 'entries', 'bytes', 'strategy', 'seconds', 'status'])
+                for r in self.rows:
+                    writer.writerow([r['name'], r['db'], r['entries'], r['bytes'], r['strategy'],
+                                     f"{r['seconds']:.3f}", r['status']])
+            messagebox.showinfo("成功", f"汇总表已保存至:\n{file_path}")
+            self.controller._log(f"批量入库汇总已保存至: {file_path}")
+        except Exception as e:
+            self.controller._handle_error("保存汇总表失败", e)
+
+class BatchEditWindow(Toplevel):
+    # 批量修改：暂存详情面板中的修改或从 CSV 导入补丁，带预写日志一次性写入数据库
+    DISPLAY_LIMIT = 5000
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.title("批量修改")
+        self.geometry("800x550")
+        self.controller = controller
+
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill='both', expand=True)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill='x', pady=5)
+        self.import_button = ttk.Button(button_frame, text="导入CSV...", command=self._import_csv)
+        self.import_button.pack(side='left', padx=5)
+        self.remove_button = ttk.Button(button_frame, text="移除选中", command=self._remove_selected)
+        self.remove_button.pack(side='left', padx=5)
+        self.clear_button = ttk.Button(button_frame, text="清空", command=self._clear)
+        self.clear_button.pack(side='left', padx=5)
+        self.apply_button = ttk.Button(button_frame, text="应用修改", command=self._apply)
+        self.apply_button.pack(side='right', padx=5)
+        ttk.Label(main_frame, text="CSV 列: path,hash,size (表头可选)；哈希或大小留空表示保留原值。").pack(anchor='w', padx=5)
+
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill='both', expand=True, pady=5)
+        self.tree = ttk.Treeview(tree_frame, columns=('hash', 'size'), show='tree headings')
+        self.tree.heading('#0', text="路径")
+        self.tree.column('#0', width=420, anchor='w')
+        for col, text, width in (('hash', "新哈希", 240), ('size', "新大小/ID", 100)):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor='w')
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+
+        self.summary_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.summary_var).pack(anchor='w')
+        self.refresh()
+
+    def refresh(self):
+        staged = self.controller.staged_edits
+        self.tree.delete(*self.tree.get_children())
+        for i, (path, (hash_val, size)) in enumerate(staged.items()):
+            if i >= self.DISPLAY_LIMIT:
+                break
+            self.tree.insert('', 'end', iid=path, text=path, values=(hash_val, size))
+        shown = f" (只显示前 {self.DISPLAY_LIMIT} 条)" if len(staged) > self.DISPLAY_LIMIT else ""
+        owner = self.controller.staged_db_path
+        target = f"，属于 {os.path.basename(owner)}" if staged and owner else ""
+        self.summary_var.set(f"已暂存 {len(staged)} 条修改{target}{shown}")
+        self.controller._update_batch_edit_button()
+
+    def _set_ui_state(self, is_running):
+        state = 'disabled' if is_running else 'normal'
+        for widget in [self.import_button, self.remove_button, self.clear_button, self.apply_button]:
+            widget.config(state=state)
+
+    def _import_csv(self):
+        csv_path = filedialog.askopenfilename(title="选择补丁CSV", filetypes=[("CSV files", "*.csv"), ("All Files", "*.*")], parent=self)
+        if not csv_path:
+            return
+        self._set_ui_state(True)
+        self.summary_var.set("正在读取CSV...")
+        self.controller._run_task(task=lambda: _read_patch_csv(csv_path), on_done=self._on_import_done)
+
+    def _on_import_done(self, result):
+        self._set_ui_state(False)
+        if isinstance(result, Exception):
+            self.controller._handle_error("读取补丁CSV失败", result)
+            self.refresh()
+            return
+        edits, errors = result
+        if not self.controller._staged_for_current_db(parent=self):
+            self.refresh()
+            return
+        for path, hash_val, size in edits:
+            self.controller.staged_edits[path] = (hash_val, size)
+        self.controller._log(f"批量修改：从CSV导入 {len(edits)} 条，跳过 {len(errors)} 行。")
+        for message in errors[:50]:
+            self.controller._log(f"  {message}")
+        self.refresh()
+        if errors:
+            more = f"\n... 其余 {len(errors) - 10} 行见日志" if len(errors) > 10 else ""
+            messagebox.showwarning("部分行被跳过", "\n".join(errors[:10]) + more, parent=self)
+
+    def _remove_selected(self):
+        for path in self.tree.selection():
+            self.controller.staged_edits.pop(path, None)
+        self.refresh()
+
+    def _clear(self):
+        self.controller.staged_edits.clear()
+        self.refresh()
+
+    def _apply(self):
+        controller = self.controller
+        edits = [(path, hash_val, size) for path, (hash_val, size) in controller.staged_edits.items()]
+        if not edits or not controller.db_file_path:
+            return
+        # 加载了别的数据库后，不能把为原数据库暂存的修改写进去
+        if not controller._staged_for_current_db(parent=self):
+            return
+        if not controller.staged_edits:
+            self.refresh()
+            return
+        if not messagebox.askyesno("确认", f"将 {len(edits)} 条修改写入数据库 {os.path.basename(controller.db_file_path)}？", parent=self):
+            return
+        self._set_ui_state(True)
+        journal = EditJournal(controller.db_file_path)
+        controller._log(f"批量修改：开始写入 {len(edits)} 条。")
+        controller._start_long_task(
+            task_worker=lambda: journal.apply(edits),
+            on_done_callback=self._on_apply_done,
+            progress_title="正在批量写入修改..."
+        )
+
+    def _on_apply_done(self, result):
+        controller = self.controller
+        if self.winfo_exists():
+            self._set_ui_state(False)
+        if isinstance(result, Exception):
+            controller._handle_error("批量修改失败，暂存的修改已保留", result)
+            return
+        updated, added, unchanged = result
+        message = f"批量修改完成。更新 {updated} 条, 新增 {added} 条, 未变 {unchanged} 条。"
+        controller._log(message)
+        controller.status_var.set(message)
+        controller.staged_edits.clear()
+        if self.winfo_exists():
+            self.refresh()
+        if controller.current_selected_path:
+            controller.display_asset_details(controller.current_selected_path)
+        controller._start_long_task(
+            task_worker=controller._analyze_categories_worker,
+            on_done_callback=controller._on_analyze_done,
+            progress_title="正在分析分类数据..."
+        )
+
+class QueryServerWindow(Toplevel):
+    # HTTP 查询服务：把当前数据库建成常驻索引，供局域网内其他人用浏览器或脚本查询
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.title("HTTP 查询服务")
+        self.geometry("650x450")
+        self.controller = controller
+        self.service = None
+        self.host = tk.StringVar(value="127.0.0.1")
+        self.port = tk.IntVar(value=8765)
+        self.url_var = tk.StringVar(value="未启动")
+
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill='both', expand=True)
+
+        form_frame = ttk.Frame(main_frame)
+        form_frame.pack(fill='x', pady=5)
+        ttk.Label(form_frame, text="数据库:").grid(row=0, column=0, padx=5, pady=2, sticky='w')
+        ttk.Label(form_frame, text=controller.db_file_path or "").grid(row=0, column=1, padx=5, sticky='w')
+        ttk.Label(form_frame, text="监听地址:").grid(row=1, column=0, padx=5, pady=2, sticky='w')
+        self.host_entry = ttk.Entry(form_frame, textvariable=self.host, width=20)
+        self.host_entry.grid(row=1, column=1, padx=5, sticky='w')
+        ttk.Label(form_frame, text="端口:").grid(row=2, column=0, padx=5, pady=2, sticky='w')
+        self.port_spin = ttk.Spinbox(form_frame, from_=0, to=65535, textvariable=self.port, width=7)
+        self.port_spin.grid(row=2, column=1, padx=5, sticky='w')
+        ttk.Label(form_frame, text="地址:").grid(row=3, column=0, padx=5, pady=2, sticky='w')
+        ttk.Entry(form_frame, textvariable=self.url_var, state='readonly').grid(row=3, column=1, padx=5, sticky='ew')
+        form_frame.columnconfigure(1, weight=1)
+        ttk.Label(main_frame, text="监听 0.0.0.0 时局域网内都能访问；数据库文件变化后自动重建索引。").pack(anchor='w', padx=5)
+
+        self.start_button = ttk.Button(main_frame, text="启动服务", command=self._toggle_service)
+        self.start_button.pack(pady=10)
+
+        log_frame = ttk.LabelFrame(main_frame, text="请求日志")
+        log_frame.pack(fill='both', expand=True, pady=(5,0))
+        self.log_text = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, state='disabled')
+        self.log_text.pack(fill='both', expand=True, padx=2, pady=2)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _log_message(self, message):
+        self.log_text.config(state='normal')
+        self.log_text.insert(tk.END, f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
+        # 只保留最近的 2000 行
+        if int(self.log_text.index('end-1c').split('.')[0]) > 2000:
+            self.log_text.delete('1.0', '2.0')
+        self.log_text.see(tk.END)
+        self.log_text.config(state='disabled')
+
+    def _set_ui_state(self, state):
+        # state: 'stopped' / 'starting' / 'running'
+        editable = 'normal' if state == 'stopped' else 'disabled'
+        self.host_entry.config(state=editable)
+        self.port_spin.config(state=editable)
+        self.start_button.config(text="停止服务" if state == 'running' else "启动服务",
+                                 state='disabled' if state == 'starting' else 'normal')
+
+    def _toggle_service(self):
+        if self.service is not None:
+            self.service.stop()
+            self.service = None
+            self.url_var.set("未启动")
+            self._set_ui_state('stopped')
+            self._log_message("服务已停止。")
+            self.controller._log("HTTP 查询服务：停止。")
+            return
+        try:
+            port = int(self.port.get())
+        except (tk.TclError, ValueError):
+            messagebox.showerror("错误", "端口无效。", parent=self)
+            return
+        # 请求线程的日志经主任务队列回到界面线程
+        on_request = lambda message: self.controller.task_queue.put(('progress', self._log_message, message))
+        service = AssetQueryService(self.controller.db_file_path, self.host.get().strip() or "127.0.0.1", port, on_request)
+        self._set_ui_state('starting')
+        self._log_message("正在建立索引...")
+        self.controller._run_task(task=service.start, on_done=lambda result: self._on_started(service, result),
+                                  name="http_service_start")
+
+    def _on_started(self, service, result):
+        if isinstance(result, Exception):
+            self._set_ui_state('stopped')
+            self.controller._handle_error("启动HTTP查询服务失败", result)
+            return
+        if not self.winfo_exists():
+            service.stop()
+            return
+        self.service = service
+        host = "127.0.0.1" if service.host == "0.0.0.0" else service.host
+        self.url_var.set(f"http://{host}:{service.port}/")
+        self._set_ui_state('running')
+        message = f"服务已启动: {self.url_var.get()} ({len(result.entries)} 条，索引版本 {result.version})"
+        self._log_message(message)
+        self.controller._log(f"HTTP 查询服务：{message}")
+
+    def _on_close(self):
+        if self.service is not None:
+            self.service.stop()
+            self.controller._log("HTTP 查询服务：窗口关闭，停止服务。")
+        self.destroy()
+
+class VersionQueryWindow(Toplevel):
+    # 跨版本路径查询：某个路径在哪些版本的数据库中出现过、各版本的哈希和大小
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.title("跨版本路径查询")
+        self.geometry("850x600")
+        self.controller = controller
+        default_dir = os.path.dirname(os.path.abspath(controller.db_file_path)) if controller.db_file_path else os.path.abspath("versions")
+        self.db_dir = tk.StringVar(value=default_dir)
+        self.fp_rate = tk.DoubleVar(value=BloomFilter.DEFAULT_FP_RATE)
+        self.blooms = {}  # 库路径 -> BloomFilter，窗口打开期间复用
+
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill='both', expand=True)
+
+        path_frame = ttk.Frame(main_frame)
+        path_frame.pack(fill='x', pady=5)
+        self.dir_button = ttk.Button(path_frame, text="版本数据库目录", command=self._select_dir)
+        self.dir_button.grid(row=0, column=0, padx=5, pady=2, sticky='w')
+        ttk.Entry(path_frame, textvariable=self.db_dir, state='readonly').grid(row=0, column=1, sticky='ew', padx=5)
+        ttk.Label(path_frame, text="过滤器误判率:").grid(row=1, column=0, padx=5, pady=2, sticky='w')
+        self.fp_spin = ttk.Spinbox(path_frame, from_=0.0001, to=0.2, increment=0.005, textvariable=self.fp_rate, width=8)
+        self.fp_spin.grid(row=1, column=1, padx=5, sticky='w')
+        path_frame.columnconfigure(1, weight=1)
+
+        ttk.Label(main_frame, text="要查询的路径 (每行一个):").pack(anchor='w', padx=5)
+        self.paths_text = scrolledtext.ScrolledText(main_frame, height=5, wrap=tk.NONE)
+        self.paths_text.pack(fill='x', padx=5)
+        if controller.current_selected_path:
+            self.paths_text.insert('1.0', controller.current_selected_path)
+
+        self.query_button = ttk.Button(main_frame, text="查询", command=self._start_query)
+        self.query_button.pack(pady=5)
+
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill='both', expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=('hash', 'size'), show='tree headings')
+        self.tree.heading('#0', text="路径 / 版本")
+        self.tree.column('#0', width=450, anchor='w')
+        for col, text, width in (('hash', "哈希", 250), ('size', "大小", 100)):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor='w')
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+
+        self.summary_var = tk.StringVar(value="每个版本数据库旁边的 .bloom 过滤器缺失或过期时会自动重建。")
+        ttk.Label(main_frame, textvariable=self.summary_var).pack(anchor='w', pady=(5, 0))
+
+    def _select_dir(self):
+        path = filedialog.askdirectory(title="选择存放各版本数据库的目录", parent=self)
+        if path:
+            self.db_dir.set(path)
+            self.blooms.clear()
+
+    def _set_ui_state(self, is_running):
+        state = 'disabled' if is_running else 'normal'
+        for widget in [self.query_button, self.dir_button, self.fp_spin]:
+            widget.config(state=state)
+
+    def _start_query(self):
+        paths = list(dict.fromkeys(line.strip() for line in self.paths_text.get('1.0', tk.END).splitlines() if line.strip()))
+        db_dir = self.db_dir.get()
+        if not paths or not os.path.isdir(db_dir):
+            messagebox.showerror("错误", "请选择版本数据库目录并输入要查询的路径。", parent=self)
+            return
+        try:
+            fp_rate = float(self.fp_rate.get())
+        except (tk.TclError, ValueError):
+            messagebox.showerror("错误", "误判率无效。", parent=self)
+            return
+        self._set_ui_state(True)
+        self.summary_var.set("正在查询...")
+        blooms = self.blooms
+
+        def worker():
+            db_paths = _find_databases(db_dir)
+            return db_paths, _query_versions(db_paths, paths, blooms, fp_rate)
+
+        self.controller._run_task(task=worker, on_done=self._on_query_done, name="version_query")
+
+    def _on_query_done(self, result):
+        self._set_ui_state(False)
+        if isinstance(result, Exception):
+            self.controller._handle_error("跨版本查询失败", result)
+            self.summary_var.set("查询失败。")
+            return
+        db_paths, (hits, stats) = result
+        self.tree.delete(*self.tree.get_children())
+        for path, versions in hits.items():
+            parent = self.tree.insert('', 'end', text=path, open=True,
+                                      values=("", f"{len(versions)}/{len(db_paths)} 个版本"))
+            for db_path, hash_val, size in versions:
+                self.tree.insert(parent, 'end', text=os.path.basename(db_path), values=(hash_val, _format_size(size)))
+        summary = (f"共 {stats['versions']} 个版本，实际打开 {stats['opened']} 个数据库，"
+                   f"过滤器误判 {stats['false_positives']} 次，重建过滤器 {stats['rebuilt']} 个")
+        self.summary_var.set(summary)
+        self.controller._log(f"跨版本查询：{len(hits)} 个路径。{summary}")
+
+class AssetAnalyzerApp:
+    def __init__(self, master):
+        self.master = master
+        master.title("大眼文件工具")
+        master.geometry("1200x800")
+        
+        self.db_file_path = None
+        self.analysis_data = None
+        self.logging_enabled = False
+        self.logger = None
+        self.detailed_log_var = tk.BooleanVar(value=False)
+        self.json_log_var = tk.BooleanVar(value=False)
+        self.trace_memory_var = tk.BooleanVar(value=False)
+        self.profile_next_var = tk.BooleanVar(value=False)
+        self.current_selected_path = None
+        self.staged_edits = {}  # 路径 -> (哈希, 大小)，批量修改暂存区
+        self.staged_db_path = None  # 暂存的修改属于哪个数据库，只能写回这个库
+        self.batch_edit_window = None
+        self.analysis_prefix = ''  # 分类统计当前下钻到的目录前缀
+        self.dependency_graph = None
+        self.text_index = None
+        self.text_hits = None  # 搜索结果列表显示全文搜索命中时为 [(相对路径, 行号)]
+        self.task_queue = queue.Queue()
+        self.progress_window = None
+        
+        self._setup_ui()
+        self._update_ui_state()
+        self._process_queue()
+        self._log("应用程序启动。")
+
+    def _setup_ui(self):
+        self.status_var = tk.StringVar(value="欢迎使用！请先加载文件。")
+        ttk.Label(self.master, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W).pack(side=tk.BOTTOM, fill=tk.X)
         self._setup_menu()
         main_frame = ttk.Frame(self.master, padding="10")
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -944,8 +4932,12 @@ class AssetAnalyzerApp:
         log_frame.pack(side=tk.RIGHT)
         self.log_button = ttk.Button(log_frame, text="开启日志", command=self.toggle_logging)
         self.log_button.pack(side=tk.LEFT)
+        self.json_log_check = ttk.Checkbutton(log_frame, text="JSON行格式", variable=self.json_log_var)
+        self.json_log_check.pack(side=tk.LEFT, padx=5)
         self.detailed_log_check = ttk.Checkbutton(log_frame, text="详细日志", variable=self.detailed_log_var)
         self.detailed_log_check.pack(side=tk.LEFT, padx=5)
+        self.trace_memory_check = ttk.Checkbutton(log_frame, text="记录内存峰值", variable=self.trace_memory_var)
+        self.trace_memory_check.pack(side=tk.LEFT, padx=5)
         
         search_frame_container = ttk.Frame(main_frame)
         search_frame_container.pack(fill=tk.X, pady=10)
@@ -957,6 +4949,19 @@ class AssetAnalyzerApp:
         self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
         self.search_button = ttk.Button(search_frame, text="搜索", command=self.search_assets)
         self.search_button.pack(side=tk.LEFT, padx=5)
+        self.bulk_search_button = ttk.Button(search_frame, text="批量搜索...", command=self.bulk_search_assets)
+        self.bulk_search_button.pack(side=tk.LEFT)
+        # 脚本全文搜索：索引反编译输出或提取的字符串目录，命中结果同样放进搜索结果列表
+        text_search_frame = ttk.LabelFrame(search_frame_container, text="脚本全文搜索", padding="10")
+        text_search_frame.pack(fill=tk.X, expand=True, side=tk.LEFT, padx=(10, 0))
+        self.text_index_button = ttk.Button(text_search_frame, text="索引目录...", command=self.build_text_index)
+        self.text_index_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.text_search_var = tk.StringVar()
+        self.text_search_entry = ttk.Entry(text_search_frame, textvariable=self.text_search_var, width=30)
+        self.text_search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.text_search_entry.bind('<Return>', lambda event: self.search_text())
+        self.text_search_button = ttk.Button(text_search_frame, text="搜索", command=self.search_text)
+        self.text_search_button.pack(side=tk.LEFT, padx=5)
         self.save_search_button = ttk.Button(search_frame_container, text="保存搜索结果", command=self.save_search_results)
         self.save_search_button.pack(side=tk.RIGHT, padx=5, anchor='e')
         
@@ -995,8 +5000,29 @@ class AssetAnalyzerApp:
         self.size_entry = ttk.Entry(size_frame, textvariable=self.detail_size_var)
         self.size_entry.pack(fill='x', expand=True)
         
-        self.save_mod_button = ttk.Button(detail_label_frame, text="保存修改", command=self.save_modification)
-        self.save_mod_button.pack(pady=10)
+        mod_button_frame = ttk.Frame(detail_label_frame)
+        mod_button_frame.pack(pady=10)
+        self.save_mod_button = ttk.Button(mod_button_frame, text="保存修改", command=self.save_modification)
+        self.save_mod_button.pack(side='left', padx=5)
+        self.stage_edit_button = ttk.Button(mod_button_frame, text="加入批量修改", command=self.stage_modification)
+        self.stage_edit_button.pack(side='left', padx=5)
+        self.batch_edit_button = ttk.Button(mod_button_frame, text="批量修改...", command=self.show_batch_edit_window)
+        self.batch_edit_button.pack(side='left', padx=5)
+
+        # 依赖信息 (仅 Addressables 目录导入的数据库有依赖图)
+        self.detail_deps_var = tk.StringVar()
+        deps_frame = ttk.Frame(detail_label_frame, padding=5)
+        deps_frame.pack(fill='x')
+        ttk.Label(deps_frame, text="依赖:", width=10).pack(side='left')
+        ttk.Label(deps_frame, textvariable=self.detail_deps_var).pack(side='left', fill='x', expand=True)
+        deps_button_frame = ttk.Frame(detail_label_frame)
+        deps_button_frame.pack()
+        self.list_deps_button = ttk.Button(deps_button_frame, text="列出依赖", command=lambda: self.list_dependencies(False))
+        self.list_deps_button.pack(side='left', padx=5)
+        self.list_users_button = ttk.Button(deps_button_frame, text="列出被依赖", command=lambda: self.list_dependencies(True))
+        self.list_users_button.pack(side='left', padx=5)
+        self.find_cycles_button = ttk.Button(deps_button_frame, text="检查循环依赖", command=self.find_dependency_cycles)
+        self.find_cycles_button.pack(side='left', padx=5)
 
         results_frame.add(detail_container, weight=2)
         
@@ -1004,8 +5030,31 @@ class AssetAnalyzerApp:
         analysis_frame_container.pack(fill=tk.BOTH, expand=True, pady=10)
         analysis_frame = ttk.LabelFrame(analysis_frame_container, text="分类统计结果", padding="10")
         analysis_frame.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
-        self.analysis_text = scrolledtext.ScrolledText(analysis_frame, wrap=tk.WORD, state='disabled')
-        self.analysis_text.pack(fill=tk.BOTH, expand=True)
+        # 维度切换与下钻：双击子目录进入，统计全部来自内存中的 FacetCube
+        facet_bar = ttk.Frame(analysis_frame)
+        facet_bar.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(facet_bar, text="维度:").pack(side=tk.LEFT)
+        self.analysis_facet_var = tk.StringVar(value=FacetCube.FACETS[0][1])
+        self.facet_combo = ttk.Combobox(facet_bar, textvariable=self.analysis_facet_var, state='readonly', width=10,
+                                        values=[name for _, name in FacetCube.FACETS])
+        self.facet_combo.pack(side=tk.LEFT, padx=5)
+        self.facet_combo.bind('<<ComboboxSelected>>', lambda event: self._show_facet())
+        self.facet_up_button = ttk.Button(facet_bar, text="上一级", command=self._facet_up)
+        self.facet_up_button.pack(side=tk.LEFT, padx=5)
+        self.analysis_prefix_var = tk.StringVar()
+        ttk.Label(facet_bar, textvariable=self.analysis_prefix_var).pack(side=tk.LEFT, padx=5)
+        self.analysis_tree = ttk.Treeview(analysis_frame, columns=('count', 'bytes', 'share'), height=8)
+        self.analysis_tree.heading('#0', text="名称")
+        self.analysis_tree.heading('count', text="数量")
+        self.analysis_tree.heading('bytes', text="大小")
+        self.analysis_tree.heading('share', text="数量占比")
+        for column in ('count', 'bytes', 'share'):
+            self.analysis_tree.column(column, width=120, anchor='e')
+        analysis_scroll = ttk.Scrollbar(analysis_frame, orient='vertical', command=self.analysis_tree.yview)
+        self.analysis_tree.configure(yscrollcommand=analysis_scroll.set)
+        analysis_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.analysis_tree.pack(fill=tk.BOTH, expand=True)
+        self.analysis_tree.bind('<Double-1>', self._facet_drill_down)
         self.save_analysis_button = ttk.Button(analysis_frame_container, text="保存统计结果", command=self.save_analysis_results)
         self.save_analysis_button.pack(side=tk.RIGHT, padx=5, anchor='ne')
 
@@ -1027,22 +5076,50 @@ class AssetAnalyzerApp:
         self.menubar.add_cascade(label="分析", menu=self.analysis_menu)
         self.analysis_menu.add_command(label="目录浏览器", command=self.show_explorer_window)
         self.analysis_menu.add_command(label="可视化分析", command=self.show_visualization_window)
+        self.analysis_menu.add_command(label="重复内容报告...", command=self.export_duplicate_report)
         
         self.tools_menu = Menu(self.menubar, tearoff=0)
         self.menubar.add_cascade(label="工具", menu=self.tools_menu)
         self.tools_menu.add_command(label="UnityFS 抹除工具...", command=self.show_stripper_tool)
+        self.tools_menu.add_command(label="UnityFS 包索引...", command=self.show_unityfs_index_window)
         self.tools_menu.add_command(label="LuaJIT 工具...", command=self.show_luajit_decompiler_window)
         self.tools_menu.add_command(label="对比数据库...", command=self.show_compare_db_window)
-
-    def _run_task(self, task, on_done, on_progress=None):
+        self.tools_menu.add_command(label="校验资源目录...", command=self.show_verify_window)
+        self.tools_menu.add_command(label="监视资源目录...", command=self.show_watch_window)
+        self.tools_menu.add_command(label="批量入库...", command=self.show_batch_ingest_window)
+        self.tools_menu.add_command(label="HTTP 查询服务...", command=self.show_query_server_window)
+        self.tools_menu.add_command(label="跨版本路径查询...", command=self.show_version_query_window)
+        self.tools_menu.add_separator()
+        self.tools_menu.add_checkbutton(label="性能分析下一个任务 (cProfile)", variable=self.profile_next_var)
+
+    def _run_task(self, task, on_done, on_progress=None, name=None):
         progress_queue = queue.Queue() if on_progress else None
+        task_name = name or getattr(on_done, '__name__', 'task').strip('_')
+        trace_memory = self.trace_memory_var.get()
+        profile_path = None
+        if self.profile_next_var.get():
+            # 只分析下一个任务
+            self.profile_next_var.set(False)
+            safe_name = "".join(c if c.isalnum() else '_' for c in task_name)[:40]
+            profile_path = os.path.join("logs", f"profile_{safe_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof")
         
         def task_wrapper():
+            metrics = TaskMetrics(task_name, trace_memory=trace_memory)
+            profiler = cProfile.Profile() if profile_path else None
             try:
-                result = task() if not on_progress else task(progress_queue=progress_queue)
+                with metrics:
+                    if profiler: profiler.enable()
+                    try:
+                        result = task() if not on_progress else task(progress_queue=progress_queue)
+                    finally:
+                        if profiler: profiler.disable()
                 self.task_queue.put(('done', on_done, result))
             except Exception as e:
                 self.task_queue.put(('done', on_done, e))
+            finally:
+                self._log(metrics.format())
+                if profiler:
+                    self._save_profile(profiler, profile_path)
 
         if on_progress:
             def progress_checker():
@@ -1059,6 +5136,15 @@ class AssetAnalyzerApp:
         thread.daemon = True
         thread.start()
 
+    def _save_profile(self, profiler, profile_path):
+        try:
+            os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+            profiler.dump_stats(profile_path)
+            self._log(f"[perf] profile={json.dumps(profile_path, ensure_ascii=False)}")
+            self.task_queue.put(('progress', self.status_var.set, f"性能分析结果已保存: {profile_path}"))
+        except Exception as e:
+            self._log(f"保存性能分析结果失败: {e}")
+
     def _process_queue(self):
         try:
             while not self.task_queue.empty():
@@ -1070,32 +5156,26 @@ class AssetAnalyzerApp:
         finally:
             self.master.after(100, self._process_queue)
 
-    def _log(self, message):
-        if self.logging_enabled and self.log_file and not self.log_file.closed:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            try:
-                self.log_file.write(f"[{timestamp}] {message}\n")
-                self.log_file.flush()
-            except Exception as e:
-                print(f"日志写入失败: {e}")
+    def _log(self, message, level='INFO'):
+        # 任意线程可调用；只入队，由 AsyncLogWriter 的后台线程写文件
+        logger = self.logger
+        if self.logging_enabled and logger is not None:
+            logger.write(message, level)
 
     def toggle_logging(self):
         try:
             if self.logging_enabled:
                 self._log("日志记录已停止。")
-                if self.log_file: self.log_file.close()
-                self.log_file = None
                 self.logging_enabled = False
+                if self.logger: self.logger.close()
+                self.logger = None
                 self.log_button.config(text="开启日志")
                 self.status_var.set("日志功能已关闭。")
             else:
-                log_dir = "logs"
-                if not os.path.exists(log_dir): os.makedirs(log_dir)
-                filename = os.path.join(log_dir, f"log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
-                self.log_file = open(filename, 'w', encoding='utf-8')
+                self.logger = AsyncLogWriter("logs", json_lines=self.json_log_var.get())
                 self.logging_enabled = True
                 self.log_button.config(text="关闭日志")
-                self.status_var.set(f"日志已开启: {os.path.basename(filename)}")
+                self.status_var.set(f"日志已开启: {os.path.basename(self.logger.path)}")
                 self._log("日志记录已启动。")
         except Exception as e:
             self._handle_error(f"无法切换日志状态: {e}")
@@ -1113,17 +5193,31 @@ class AssetAnalyzerApp:
             
             self.analysis_menu.entryconfig("目录浏览器", state='normal' if db_loaded else 'disabled')
             self.analysis_menu.entryconfig("可视化分析", state='normal' if db_loaded and analysis_done and MATPLOTLIB_AVAILABLE else 'disabled')
+            self.analysis_menu.entryconfig("重复内容报告...", state='normal' if db_loaded else 'disabled')
             
             self.tools_menu.entryconfig("对比数据库...", state='normal' if db_loaded else 'disabled')
-            self.tools_menu.entryconfig("LuaJIT 工具...", state='normal' if LJD_AVAILABLE else 'disabled')
+            self.tools_menu.entryconfig("校验资源目录...", state='normal' if db_loaded else 'disabled')
+            self.tools_menu.entryconfig("HTTP 查询服务...", state='normal' if db_loaded else 'disabled')
 
             self.detailed_log_check.config(state='normal' if self.logging_enabled else 'disabled')
+            self.json_log_check.config(state='disabled' if self.logging_enabled else 'normal')
+            DatabaseBroker.trim(keep=[self.db_file_path])
+            self.trace_memory_check.config(state='normal' if self.logging_enabled else 'disabled')
             
+            graph_state = 'normal' if db_loaded and self.dependency_graph is not None else 'disabled'
+            self.list_deps_button.config(state=graph_state)
+            self.list_users_button.config(state=graph_state)
+            self.find_cycles_button.config(state=graph_state)
+
             widget_state = 'normal' if db_loaded else 'disabled'
-            for widget in [self.search_entry, self.search_button, self.save_search_button, 
+            for widget in [self.search_entry, self.search_button, self.bulk_search_button,
                            self.save_analysis_button, self.hash_entry, self.size_entry, 
-                           self.save_mod_button]:
+                           self.save_mod_button, self.stage_edit_button, self.batch_edit_button]:
                 widget.config(state=widget_state)
+            text_state = 'normal' if self.text_index is not None else 'disabled'
+            self.text_search_entry.config(state=text_state)
+            self.text_search_button.config(state=text_state)
+            self.save_search_button.config(state='normal' if db_loaded or self.text_index is not None else 'disabled')
 
         except (tk.TclError, IndexError) as e:
             print(f"更新UI状态时捕获到错误 (通常在关闭时发生): {e}")
@@ -1132,8 +5226,12 @@ class AssetAnalyzerApp:
 
     def _handle_error(self, message, e=None):
         full_message = f"{message}\n\n详细信息: {e}" if e else message
-        self._log(f"错误: {full_message}")
-        if e: traceback.print_exc(file=self.log_file if self.logging_enabled and self.log_file else None)
+        self._log(f"错误: {full_message}", level='ERROR')
+        if isinstance(e, BaseException):
+            if self.logging_enabled:
+                self._log("".join(traceback.format_exception(e)).rstrip(), level='ERROR')
+            else:
+                traceback.print_exception(e)
         messagebox.showerror("错误", message)
 
     def _set_menus_state(self, state='normal'):
@@ -1159,11 +5257,11 @@ class AssetAnalyzerApp:
             # 调用原始的回调函数处理任务结果
             on_done_callback(result)
 
-        self._run_task(task=task_worker, on_done=final_on_done_callback)
+        self._run_task(task=task_worker, on_done=final_on_done_callback, name=progress_title)
 
     def load_from_json(self):
         json_path = filedialog.askopenfilename(
-            title="选择JSON资源文件", filetypes=[("JSON/Text", "*.json;*.txt"), ("All Files", "*.*")])
+            title="选择JSON资源文件", filetypes=[("JSON/Text", "*.json;*.txt;*.bytes;*.gz;*.zip"), ("All Files", "*.*")])
         if not json_path: return
         
         db_path = filedialog.asksaveasfilename(
@@ -1178,30 +5276,16 @@ class AssetAnalyzerApp:
         )
 
     def _load_from_json_worker(self, json_path, db_path):
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        parsing_strategies = [self._parse_asset_hash_list, self._parse_unity_addressables_catalog]
-        asset_items, strategy_name = None, None
-        for strategy in parsing_strategies:
-            try:
-                result = strategy(data)
-                if result:
-                    asset_items, strategy_name = result, strategy.__name__
-                    self._log(f"成功使用 '{strategy.__name__}' 策略解析了JSON文件。")
-                    break
-            except Exception as e:
-                self._log(f"策略 '{strategy.__name__}' 执行失败: {e}")
-                continue
+        asset_items, strategy_name, errors = _parse_manifest_file(json_path)
+        for message in errors:
+            self._log(message)
         if not asset_items:
             raise ValueError("加载失败：不认识这个JSON文件格式。")
+        self._log(f"成功使用 '{strategy_name}' 策略解析了JSON文件。")
 
         self._log(f"从JSON '{os.path.basename(json_path)}' 创建DB '{os.path.basename(db_path)}'")
-        with dbm.open(db_path, 'c') as db:
-            db['__parsing_strategy__'] = strategy_name.encode('utf-8')
-            for path, value in asset_items:
-                db[path.encode('utf-8')] = value.encode('utf-8')
-            total = len(asset_items)
+        total = _write_manifest_db(db_path, asset_items, strategy_name)
+        _count_processed(records=total, nbytes=os.path.getsize(json_path))
         return db_path, total
 
     def _on_load_done(self, result):
@@ -1213,6 +5297,7 @@ class AssetAnalyzerApp:
             db_path, total = result
             self.db_file_path = db_path
             self.analysis_data = None
+            self.dependency_graph = None
             self.status_var.set(f"DB创建成功: {os.path.basename(db_path)} ({total}条记录)")
             self._log(f"DB创建成功, 共写入 {total} 条记录。")
             
@@ -1224,7 +5309,8 @@ class AssetAnalyzerApp:
             )
         self._update_ui_state()
         
-    def _parse_asset_hash_list(self, data):
+    @staticmethod
+    def _parse_asset_hash_list(data):
         if "assetHashList" in data and isinstance(data["assetHashList"], list):
             items = []
             for asset_string in data["assetHashList"]:
@@ -1238,17 +5324,66 @@ class AssetAnalyzerApp:
             return items if items else None
         return None
 
-    def _parse_unity_addressables_catalog(self, data):
+    @staticmethod
+    def _parse_unity_addressables_catalog(data):
         if "m_InternalIds" in data and isinstance(data["m_InternalIds"], list):
-            items, placeholder = [], "{PlatformUtils.AddressableLoadPath}/"
-            for internal_id in data["m_InternalIds"]:
-                try:
-                    if not isinstance(internal_id, str): continue
-                    path = internal_id.replace(placeholder, "")
-                    value = "N/A|0" 
-                    items.append((path, value))
-                except TypeError: continue
-            return items if items else None
+            if not all(k in data for k in ('m_KeyDataString', 'm_BucketDataString', 'm_EntryDataString')):
+                # 缺少二进制字段时只能得到路径
+                items = []
+                for internal_id in data["m_InternalIds"]:
+                    try:
+                        if not isinstance(internal_id, str): continue
+                        path = internal_id.replace(_ADDRESSABLES_PLACEHOLDER, "")
+                        value = "N/A|0" 
+                        items.append((path, value))
+                    except TypeError: continue
+                return items if items else None
+
+            catalog = _decode_addressables_catalog(data)
+            location_paths = [loc[0] for loc in catalog['locations']]
+            # 一个 location 可能被多个 key (地址、GUID、标签) 引用
+            location_keys = {}
+            for key, (_, entries) in zip(catalog['keys'], catalog['buckets']):
+                for index in entries:
+                    location_keys.setdefault(index, []).append(key)
+
+            values, entries = {}, {}
+            for index, (path, provider, primary_key, res_type, deps, extra) in enumerate(catalog['locations']):
+                if not path: continue
+                entry = entries.get(path)
+                if entry is None:
+                    # AssetBundle 的额外数据里带有哈希和大小
+                    options = extra.get('data') if isinstance(extra, dict) else None
+                    if isinstance(options, dict):
+                        values[path] = f"{options.get('m_Hash') or 'N/A'}|{options.get('m_BundleSize', 0)}"
+                    else:
+                        values[path] = "N/A|0"
+                    entries[path] = {'p': provider, 'k': primary_key, 't': res_type,
+                                     'd': list(deps), 'keys': location_keys.get(index, [])}
+                else:
+                    # 同一路径的多个 location (子资源) 合并依赖和 key
+                    entry['d'] = list(dict.fromkeys(entry['d'] + deps))
+                    entry['keys'] = list(dict.fromkeys(entry['keys'] + location_keys.get(index, [])))
+
+            # 导入时就建好依赖图，查询时不用再解析每条 __addr_entry__
+            nodes = list(entries)
+            node_index = {path: i for i, path in enumerate(nodes)}
+            adjacency = []
+            for path, entry in entries.items():
+                children = {node_index.get(location_paths[d]) for d in entry['d'] if 0 <= d < len(location_paths)}
+                children.discard(None)
+                children.discard(node_index[path])
+                adjacency.append(sorted(children))
+            graph = DependencyGraph.from_adjacency(nodes, adjacency)
+
+            items = list(values.items())
+            items.append((DependencyGraph.META_KEY, graph.to_json()))
+            items.append(('__addr_locations__', json.dumps(location_paths, ensure_ascii=False)))
+            items.append(('__addr_providers__', json.dumps(catalog['providers'], ensure_ascii=False)))
+            items.append(('__addr_keys__', json.dumps(catalog['keys'], ensure_ascii=False)))
+            items.extend((f"__addr_entry__/{path}", json.dumps(entry, ensure_ascii=False))
+                         for path, entry in entries.items())
+            return items if values else None
         return None
 
     def load_from_db(self):
@@ -1258,7 +5393,10 @@ class AssetAnalyzerApp:
 
         def combined_worker():
             # 1. 加载DB信息
-            with dbm.open(db_path, 'r') as db:
+            recovered = EditJournal(db_path).recover()
+            if recovered:
+                self._log(f"发现未完成的批量修改，已重放 {recovered} 条。")
+            with DatabaseBroker.for_path(db_path).read() as db:
                 count = sum(1 for k in db.keys() if not k.startswith(b'__'))
             # 2. 分析数据
             analysis_result = self._analyze_categories_worker(db_path_override=db_path)
@@ -1272,6 +5410,7 @@ class AssetAnalyzerApp:
             else:
                 db_path_res, count, analysis_res = result
                 self.db_file_path = db_path_res
+                self.dependency_graph = None
                 self._log(f"DB加载成功, 包含 {count} 条记录。")
                 self.status_var.set(f"DB加载成功: {os.path.basename(db_path_res)} ({count}条记录)")
                 # 直接处理分析结果
@@ -1285,40 +5424,59 @@ class AssetAnalyzerApp:
         )
 
     def _merge_from_json(self):
-        json_path = filedialog.askopenfilename(title="选择要合并的JSON文件", filetypes=[("JSON/Text", "*.json;*.txt"), ("All Files", "*.*")])
+        json_path = filedialog.askopenfilename(title="选择要合并的JSON文件", filetypes=[("JSON/Text", "*.json;*.txt;*.bytes;*.gz;*.zip"), ("All Files", "*.*")])
         if not json_path: return
         
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            parsing_strategies = [self._parse_asset_hash_list, self._parse_unity_addressables_catalog]
-            asset_items, new_strategy_name = None, None
-            for strategy in parsing_strategies:
-                result = strategy(data)
-                if result:
-                    asset_items, new_strategy_name = result, strategy.__name__
-                    break
-            if not asset_items:
-                self._handle_error("合并失败：不认识这个JSON文件格式。")
-                return
-
-            with dbm.open(self.db_file_path, 'r') as db:
+            with DatabaseBroker.for_path(self.db_file_path).read() as db:
                 original_strategy = db.get(b'__parsing_strategy__', b'unknown').decode('utf-8')
-            
-            if original_strategy != 'unknown' and original_strategy != new_strategy_name:
-                proceed = messagebox.askyesno("策略不匹配警告",
-                    f"当前数据库使用 '{original_strategy}' 策略创建。\n"
-                    f"您要合并的JSON文件似乎是 '{new_strategy_name}' 格式。\n\n"
-                    "这两种格式不兼容，合并可能导致数据不一致。\n确定要继续合并吗？")
-                if not proceed:
-                    self._log("用户因策略不匹配取消了合并操作。")
-                    return
-            byte_items = [(p.encode('utf-8'), v.encode('utf-8')) for p, v in asset_items]
-            self._log(f"开始从JSON '{os.path.basename(json_path)}' 合并数据")
-            self._perform_merge(byte_items)
+            # 只读文件开头判断格式，在完整解析之前确认策略是否匹配
+            new_strategy_name = _sniff_manifest_strategy(json_path)
+            if not self._confirm_merge_strategy(original_strategy, new_strategy_name):
+                return
         except Exception as e:
             self._handle_error(f"合并JSON时出错", e)
+            return
+        confirmed = new_strategy_name is not None
+        self._start_long_task(
+            task_worker=lambda: self._merge_from_json_worker(json_path, original_strategy, confirmed),
+            on_done_callback=self._on_merge_from_json_done,
+            progress_title="正在解析并合并JSON..."
+        )
+
+    def _confirm_merge_strategy(self, original_strategy, new_strategy_name):
+        if original_strategy == 'unknown' or new_strategy_name is None or original_strategy == new_strategy_name:
+            return True
+        proceed = messagebox.askyesno("策略不匹配警告",
+            f"当前数据库使用 '{original_strategy}' 策略创建。\n"
+            f"您要合并的JSON文件似乎是 '{new_strategy_name}' 格式。\n\n"
+            "这两种格式不兼容，合并可能导致数据不一致。\n确定要继续合并吗？")
+        if not proceed:
+            self._log("用户因策略不匹配取消了合并操作。")
+        return proceed
+
+    def _merge_from_json_worker(self, json_path, original_strategy, confirmed):
+        asset_items, new_strategy_name, errors = _parse_manifest_file(json_path)
+        for message in errors:
+            self._log(message)
+        if not asset_items:
+            raise ValueError("合并失败：不认识这个JSON文件格式。")
+        byte_items = [(p.encode('utf-8'), v.encode('utf-8')) for p, v in asset_items]
+        if not confirmed and original_strategy not in ('unknown', new_strategy_name):
+            # 文件开头看不出格式，解析后才发现不匹配：交回界面线程确认
+            return 'confirm', (original_strategy, new_strategy_name, byte_items)
+        self._log(f"开始从JSON '{os.path.basename(json_path)}' 合并数据")
+        return 'merged', self._perform_merge_worker(byte_items)
+
+    def _on_merge_from_json_done(self, result):
+        if isinstance(result, Exception):
+            self._on_merge_done(result)
+        elif result[0] == 'confirm':
+            original_strategy, new_strategy_name, byte_items = result[1]
+            if self._confirm_merge_strategy(original_strategy, new_strategy_name):
+                self._perform_merge(byte_items)
+        else:
+            self._on_merge_done(result[1])
 
     def _merge_from_dbm(self):
         db_path = filedialog.askopenfilename(title="选择要合并的DBM数据库", filetypes=[("DBM Database", "*.dbm;*.db"), ("All Files", "*.*")])
@@ -1328,7 +5486,7 @@ class AssetAnalyzerApp:
             return
         
         try:
-            with dbm.open(db_path, 'r') as source_db:
+            with DatabaseBroker.for_path(db_path).read() as source_db:
                 items = [item for item in source_db.items() if not item[0].startswith(b'__')]
             self._log(f"开始从DBM '{os.path.basename(db_path)}' 合并数据")
             self._perform_merge(items)
@@ -1343,15 +5501,28 @@ class AssetAnalyzerApp:
         )
     
     def _perform_merge_worker(self, items_iterable):
-        with dbm.open(self.db_file_path, 'c') as db:
-            count_before = len([k for k in db.keys() if not k.startswith(b'__')])
+        # 经单一写入者提交，合并期间其他线程的查询读到的是合并前的内容
+        with DatabaseBroker.for_path(self.db_file_path).write() as txn:
+            count_before = len([k for k in txn.keys() if not k.startswith(b'__')])
             items_list = list(items_iterable)
-            for key, value in items_list:
-                if self.detailed_log_var.get(): self._log(f"  合并/更新: {key.decode('utf-8')}")
-                db[key] = value
-            count_after = len([k for k in db.keys() if not k.startswith(b'__')])
+            # 合并另一份 Addressables 目录时，依赖图与库中已有的取并集，而不是整个替换
+            graph_key = DependencyGraph.META_KEY.encode('utf-8')
+            for i, (key, value) in enumerate(items_list):
+                if key == graph_key:
+                    stored = txn.get(graph_key)
+                    if stored:
+                        graph = DependencyGraph.from_json(stored.decode('utf-8'))
+                        graph = graph.merged(DependencyGraph.from_json(value.decode('utf-8')))
+                        items_list[i] = (key, graph.to_json().encode('utf-8'))
+            # Tk 变量只在循环外读一次；逐条键名合成一条队列记录交给日志线程
+            logger = self.logger if self.logging_enabled and self.detailed_log_var.get() else None
+            txn.update(items_list)
+            if logger is not None:
+                logger.write_many([f"  合并/更新: {key.decode('utf-8')}" for key, _ in items_list])
+            count_after = len([k for k in txn.keys() if not k.startswith(b'__')])
         added = count_after - count_before
-        updated = len(items_list) - added
+        updated = sum(1 for key, _ in items_list if not key.startswith(b'__')) - added
+        _count_processed(records=len(items_list))
         return added, updated
 
     def _on_merge_done(self, result):
@@ -1386,8 +5557,10 @@ class AssetAnalyzerApp:
         )
 
     def _search_assets_worker(self, keyword):
-        with dbm.open(self.db_file_path, 'r') as db:
-            return sorted([k.decode('utf-8') for k in db.keys() 
+        with DatabaseBroker.for_path(self.db_file_path).read() as db:
+            keys = db.keys()
+            _count_processed(records=len(keys))
+            return sorted([k.decode('utf-8') for k in keys 
                            if not k.startswith(b'__') and keyword in k.decode('utf-8').lower()])
 
     def _on_search_done(self, result):
@@ -1398,22 +5571,142 @@ class AssetAnalyzerApp:
             return
         
         found = result
+        self.text_hits = None
         self.listbox.delete(0, tk.END)
         for path in found:
             self.listbox.insert(tk.END, path)
         self.status_var.set(f"搜索完成，找到 {len(found)} 个匹配项。")
         self._log(f"搜索找到 {len(found)} 个结果。")
 
+    def bulk_search_assets(self):
+        keyword_path = filedialog.askopenfilename(
+            title="选择关键字文件 (每行一个，CSV 取第一列)", filetypes=[("Text/CSV", "*.txt *.csv"), ("All Files", "*.*")])
+        if not keyword_path: return
+        output_path = filedialog.asksaveasfilename(
+            title="保存批量搜索结果", defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if not output_path: return
+        self._log(f"批量搜索: 关键字文件 {keyword_path}")
+        self._start_long_task(
+            task_worker=lambda: self._bulk_search_worker(keyword_path, output_path),
+            on_done_callback=self._on_bulk_search_done,
+            progress_title="正在批量搜索..."
+        )
+
+    def _bulk_search_worker(self, keyword_path, output_path):
+        # 所有关键字建成一个自动机，只扫描一遍路径；结果按 关键字,命中数,路径 逐行写出
+        matcher = KeywordMatcher(_read_keyword_file(keyword_path))
+        if not len(matcher):
+            raise ValueError("关键字文件中没有关键字。")
+        with DatabaseBroker.for_path(self.db_file_path).read() as db:
+            paths = sorted(k.decode('utf-8') for k in db.keys() if not k.startswith(b'__'))
+        _count_processed(records=len(paths), nbytes=sum(map(len, paths)))
+        hits = [array('I') for _ in range(len(matcher))]
+        matched = array('I')
+        for i, found in matcher.scan(paths):
+            matched.append(i)
+            for k in found:
+                hits[k].append(i)
+
+        def rows():
+            for keyword, indices in zip(matcher.keywords, hits):
+                if not indices:
+                    yield keyword, 0, ''
+                for i in indices:
+                    yield keyword, len(indices), paths[i]
+        with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['keyword', 'match_count', 'path'])
+            writer.writerows(rows())
+        unmatched = [keyword for keyword, indices in zip(matcher.keywords, hits) if not indices]
+        return output_path, len(matcher), unmatched, [paths[i] for i in matched]
+
+    def _on_bulk_search_done(self, result):
+        if isinstance(result, Exception):
+            self._handle_error("批量搜索失败", result)
+            self.status_var.set("批量搜索失败。")
+            return
+        output_path, keyword_count, unmatched, found = result
+        self.text_hits = None
+        self.listbox.delete(0, tk.END)
+        for path in found:
+            self.listbox.insert(tk.END, path)
+        message = (f"{keyword_count} 个关键字中 {keyword_count - len(unmatched)} 个有命中，"
+                   f"共 {len(found)} 个资源。")
+        self.status_var.set(f"批量搜索完成: {message}")
+        self._log(f"批量搜索结果已保存至 {output_path}: {message}")
+        preview = "\n".join(unmatched[:10]) + ("\n..." if len(unmatched) > 10 else "")
+        messagebox.showinfo("批量搜索", f"{message}\n\n结果已保存至:\n{output_path}"
+                            + (f"\n\n没有命中的关键字 ({len(unmatched)} 个):\n{preview}" if unmatched else ""))
+
+    def build_text_index(self):
+        root = filedialog.askdirectory(title="选择要索引的目录 (反编译输出或字符串提取结果)")
+        if not root: return
+        self._log(f"建立全文索引: {root}")
+        self._start_long_task(
+            task_worker=lambda: self._build_text_index_worker(root),
+            on_done_callback=self._on_text_index_done,
+            progress_title="正在建立全文索引..."
+        )
+
+    def _build_text_index_worker(self, root):
+        # 已有索引只重新处理变化的文件
+        index = TextIndex.load(root)
+        stats = index.update()
+        index.save()
+        return index, stats
+
+    def _on_text_index_done(self, result):
+        if isinstance(result, Exception):
+            self._handle_error("建立全文索引失败", result)
+            return
+        self.text_index, (reindexed, touched, removed, unchanged) = result
+        message = (f"全文索引完成: {len(self.text_index.files)} 个文件, {len(self.text_index.postings)} 个词 "
+                   f"(重新索引 {reindexed}, 仅时间变化 {touched}, 删除 {removed}, 未变化 {unchanged})")
+        self.status_var.set(message)
+        self._log(message)
+        self._update_ui_state()
+
+    def search_text(self):
+        query = self.text_search_var.get().strip()
+        if not query or self.text_index is None: return
+        self._log(f"全文搜索: '{query}'")
+        self.text_search_button.config(state='disabled')
+        index = self.text_index
+
+        def worker():
+            start = time.perf_counter()
+            hits = index.search(query)
+            elapsed = time.perf_counter() - start
+            return hits, index.read_lines(hits), elapsed
+        self._run_task(task=worker, on_done=self._on_text_search_done, name="text_search")
+
+    def _on_text_search_done(self, result):
+        self.text_search_button.config(state='normal')
+        if isinstance(result, Exception):
+            self._handle_error("全文搜索失败", result)
+            return
+        hits, texts, elapsed = result
+        self.text_hits = hits
+        self.listbox.delete(0, tk.END)
+        for hit in hits:
+            self.listbox.insert(tk.END, f"{hit[0]}:{hit[1]}: {texts.get(hit, '')}")
+        self.status_var.set(f"全文搜索找到 {len(hits)} 处 (索引查询 {elapsed * 1000:.1f} ms)。")
+        self._log(f"全文搜索找到 {len(hits)} 处。")
+
     def _analyze_categories_worker(self, db_path_override=None):
         # 允许传入路径以支持组合任务
         path_to_use = db_path_override if db_path_override else self.db_file_path
-        categories = Counter()
-        with dbm.open(path_to_use, 'r') as db:
-            for key in db.keys():
-                if key.startswith(b'__'): continue
-                category = key.decode('utf-8').split('/', 1)[0]
-                categories[category] += 1
-        return categories
+
+        def items():
+            with DatabaseBroker.for_path(path_to_use).read() as db:
+                for key in db.keys():
+                    if key.startswith(b'__'): continue
+                    yield key.decode('utf-8'), _parse_value(db[key].decode('utf-8'))[1]
+        columns = SizeColumns()
+        cube = FacetCube.from_items(items(), columns)
+        cube.sizes = SizeDistribution.from_columns(columns)
+        _count_processed(records=cube.total()[0])
+        return cube
 
     def _on_analyze_done(self, result):
         if isinstance(result, Exception):
@@ -1421,31 +5714,195 @@ class AssetAnalyzerApp:
             self.status_var.set("分类分析失败。")
         else:
             self.analysis_data = result
-            total = sum(self.analysis_data.values())
-            result_text = f"总资产数: {total}\n\n--- 各分类资产数量 (按数量降序) ---\n"
-            result_text += "\n".join([f"{cat:<25} : {num}" for cat, num in self.analysis_data.most_common()])
-            
-            self.analysis_text.config(state='normal')
-            self.analysis_text.delete('1.0', tk.END)
-            self.analysis_text.insert('1.0', result_text)
-            self.analysis_text.config(state='disabled')
-            
+            self.analysis_prefix = ''
+            self._show_facet()
+            total, total_bytes = self.analysis_data.total()
             self.status_var.set("分类统计完成，可进行可视化分析。")
-            self._log(f"分类统计完成: {len(self.analysis_data)}个分类, {total}个总资产。")
+            self._log(f"分类统计完成: {len(self.analysis_data.facet('dir'))}个分类, {total}个总资产, 共 {_format_size(total_bytes)}。")
+            # 数据库每次加载/合并后都会走到这里，顺带在后台重新读取依赖图
+            db_path = self.db_file_path
+            self._run_task(task=lambda: DependencyGraph.load(db_path), on_done=self._on_graph_loaded, name="加载依赖图")
         self._update_ui_state()
 
+    def _current_facet(self):
+        name = self.analysis_facet_var.get()
+        return next(facet for facet, label in FacetCube.FACETS if label == name)
+
+    def _show_facet(self):
+        self.analysis_tree.delete(*self.analysis_tree.get_children())
+        cube = self.analysis_data
+        if cube is None:
+            self.analysis_prefix_var.set("")
+            return
+        total, total_bytes = cube.total(self.analysis_prefix)
+        self.analysis_prefix_var.set(f"{self.analysis_prefix or '(全部)'}  共 {total} 个, {_format_size(total_bytes)}")
+        for label, count, nbytes in cube.facet(self._current_facet(), self.analysis_prefix):
+            share = f"{count / total * 100:.1f}%" if total else ""
+            self.analysis_tree.insert('', tk.END, text=label, values=(count, _format_size(nbytes), share))
+
+    def _facet_drill_down(self, event):
+        if self.analysis_data is None or self._current_facet() != 'dir':
+            return
+        item = self.analysis_tree.identify_row(event.y)
+        if not item:
+            return
+        child = self.analysis_data.child_prefix(self.analysis_prefix, self.analysis_tree.item(item, 'text'))
+        if child is not None:
+            self.analysis_prefix = child
+            self._show_facet()
+
+    def _facet_up(self):
+        if self.analysis_prefix:
+            self.analysis_prefix = self.analysis_prefix.rpartition('/')[0]
+            self._show_facet()
+
+    def _on_graph_loaded(self, result):
+        if isinstance(result, Exception):
+            self.dependency_graph = None
+            self._log(f"读取依赖图失败: {result}")
+        else:
+            self.dependency_graph = result
+            if result is not None:
+                self._log(f"依赖图已加载: {len(result)} 个节点, {result.edge_count} 条边。")
+        self._update_ui_state()
+
+    def list_dependencies(self, reverse):
+        # 把当前选中资源的依赖闭包 (或反向闭包) 放进搜索结果列表
+        path = self.detail_path_var.get()
+        graph = self.dependency_graph
+        if graph is None or path not in graph:
+            messagebox.showwarning("提示", "当前资源没有依赖信息。")
+            return
+        found = sorted(graph.closure_each([path], reverse=reverse)[path])
+        self.text_hits = None
+        self.listbox.delete(0, tk.END)
+        for item in found:
+            self.listbox.insert(tk.END, item)
+        label = "依赖" if not reverse else "依赖它的资源"
+        self.status_var.set(f"{os.path.basename(path)} 的{label}: {len(found)} 个。")
+        self._log(f"列出{label}: {path} ({len(found)} 个)")
+
+    def find_dependency_cycles(self):
+        graph = self.dependency_graph
+        if graph is None: return
+        self.find_cycles_button.config(state='disabled')
+        self._run_task(task=graph.find_cycles, on_done=self._on_cycles_found, name="检查循环依赖")
+
+    def _on_cycles_found(self, result):
+        self._update_ui_state()
+        if isinstance(result, Exception):
+            self._handle_error("检查循环依赖失败", result)
+            return
+        if not result:
+            self.status_var.set("没有发现循环依赖。")
+            messagebox.showinfo("循环依赖", "没有发现循环依赖。")
+            return
+        # 环中的资源按环依次放进搜索结果列表，方便逐个查看
+        cycles = sorted((sorted(cycle) for cycle in result), key=len, reverse=True)
+        self.text_hits = None
+        self.listbox.delete(0, tk.END)
+        for cycle in cycles:
+            for path in cycle:
+                self.listbox.insert(tk.END, path)
+        message = f"发现 {len(cycles)} 个循环依赖，涉及 {sum(map(len, cycles))} 个资源。"
+        self.status_var.set(message)
+        self._log(message)
+        preview = "\n".join(f"{len(cycle)} 个: {', '.join(os.path.basename(p) for p in cycle[:3])}"
+                             + (" ..." if len(cycle) > 3 else "") for cycle in cycles[:10])
+        messagebox.showinfo("循环依赖", f"{message}\n\n{preview}")
+
+    def export_duplicate_report(self):
+        if not self.db_file_path: return
+        file_path = filedialog.asksaveasfilename(
+            title="保存重复内容报告", defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if not file_path: return
+
+        self._start_long_task(
+            task_worker=lambda: self._duplicate_report_worker(file_path),
+            on_done_callback=self._on_duplicate_report_done,
+            progress_title="正在分析重复内容..."
+        )
+
+    def _duplicate_report_worker(self, file_path, db_path_override=None):
+        # 单次遍历按哈希分组：first_seen 只记第一次出现的路径，出现第二次才建组
+        path_to_use = db_path_override if db_path_override else self.db_file_path
+        first_seen = {}
+        groups = {}
+        with DatabaseBroker.for_path(path_to_use).read() as db:
+            for key in db.keys():
+                if key.startswith(b'__'): continue
+                hash_val, size = _parse_value(db[key].decode('utf-8'))
+                if not hash_val or hash_val == 'N/A': continue
+                entry = (key.decode('utf-8'), size)
+                group = groups.get(hash_val)
+                if group is not None:
+                    group.append(entry)
+                elif hash_val in first_seen:
+                    groups[hash_val] = [first_seen.pop(hash_val), entry]
+                else:
+                    first_seen[hash_val] = entry
+        _count_processed(records=len(first_seen) + sum(len(g) for g in groups.values()))
+        first_seen.clear()
+
+        # 每组保留一份（路径排序后的第一个），其余视为浪费，计入各自的分类
+        category_files = Counter()
+        category_wasted = Counter()
+        wasted_total, dup_files = 0, 0
+        base, ext = os.path.splitext(file_path)
+        with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['hash', 'copies', 'size', 'group_wasted_bytes', 'category', 'path', 'kept'])
+            for hash_val, entries in groups.items():
+                entries.sort()
+                group_wasted = sum(size for _, size in entries[1:])
+                wasted_total += group_wasted
+                for i, (path, size) in enumerate(entries):
+                    category = _get_category(path)
+                    if i > 0:
+                        dup_files += 1
+                        category_files[category] += 1
+                        category_wasted[category] += size
+                    writer.writerow([hash_val, len(entries), size, group_wasted, category, path, 1 if i == 0 else 0])
+
+        category_path = f"{base}_categories{ext or '.csv'}"
+        with open(category_path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['category', 'duplicate_files', 'wasted_bytes'])
+            for category, wasted in category_wasted.most_common():
+                writer.writerow([category, category_files[category], wasted])
+        return file_path, len(groups), dup_files, wasted_total, category_wasted
+
+    def _on_duplicate_report_done(self, result):
+        if isinstance(result, Exception):
+            self._handle_error("生成重复内容报告失败", result)
+            self.status_var.set("重复内容报告生成失败。")
+            return
+        file_path, group_count, dup_files, wasted_total, category_wasted = result
+        message = (f"发现 {group_count} 组重复内容, 冗余文件 {dup_files} 个, "
+                   f"浪费 {_format_size(wasted_total)}。")
+        top_lines = "\n".join(f"{cat:<25} : {_format_size(num)}" for cat, num in category_wasted.most_common(10))
+        self.status_var.set(message)
+        self._log(f"重复内容报告已保存至 {file_path}: {message}")
+        messagebox.showinfo("重复内容报告", f"{message}\n\n浪费最多的分类:\n{top_lines}\n\n报告已保存至:\n{file_path}")
+
     def on_listbox_select(self, event):
         selection = self.listbox.curselection()
         if not selection:
             self.current_selected_path = None
             return
+        if self.text_hits is not None:
+            # 全文搜索命中不是数据库记录，不能修改
+            self.current_selected_path = None
+            rel_path, line_no = self.text_hits[selection[0]]
+            self.display_text_details(f"{os.path.join(self.text_index.root, rel_path)}:{line_no}")
+            return
         selected_path = self.listbox.get(selection[0])
         self.current_selected_path = selected_path
         self.display_asset_details(selected_path)
 
     def display_asset_details(self, path):
         try:
-            with dbm.open(self.db_file_path, 'r') as db:
+            with DatabaseBroker.for_path(self.db_file_path).read() as db:
                 value_str = db[path.encode('utf-8')].decode('utf-8')
             parts = value_str.split('|')
             h = parts[0] if parts else ""
@@ -1453,16 +5910,46 @@ class AssetAnalyzerApp:
             self.detail_path_var.set(path)
             self.detail_hash_var.set(h)
             self.detail_size_var.set(s)
+            self.detail_deps_var.set("")
+            graph = self.dependency_graph
+            if graph is not None and path in graph:
+                # 依赖闭包和依赖总大小在后台计算，闭包按节点缓存
+                self.detail_deps_var.set("计算中...")
+                db_path = self.db_file_path
+                self._run_task(task=lambda: self._dependency_summary_worker(graph, db_path, path),
+                               on_done=self._on_dependency_summary_done, name="依赖统计")
             if self.detailed_log_var.get(): self._log(f"显示详情: {path}")
         except KeyError:
              self._handle_error(f"在数据库中没找到这个: {path}")
         except Exception as e:
             self._handle_error(f"没法检索详情", e)
     
+    @staticmethod
+    def _dependency_summary_worker(graph, db_path, path):
+        deps = graph.closure_each([path])[path]
+        users = graph.closure_each([path], reverse=True)[path]
+        dep_bytes = 0
+        with DatabaseBroker.for_path(db_path).read() as db:
+            for dep in deps:
+                raw = db.get(dep.encode('utf-8'))
+                if raw: dep_bytes += _parse_value(raw.decode('utf-8'))[1]
+        return path, f"需要 {len(deps)} 个 (共 {_format_size(dep_bytes)}), 被 {len(users)} 个资源依赖"
+
+    def _on_dependency_summary_done(self, result):
+        if isinstance(result, Exception):
+            self.detail_deps_var.set("")
+            self._log(f"依赖统计失败: {result}")
+            return
+        path, deps_text = result
+        # 期间已切换到别的资源时丢弃过期结果
+        if self.detail_path_var.get() == path:
+            self.detail_deps_var.set(deps_text)
+
     def display_text_details(self, text):
         self.detail_path_var.set(text)
         self.detail_hash_var.set("")
         self.detail_size_var.set("")
+        self.detail_deps_var.set("")
 
     def save_modification(self):
         if not self.current_selected_path or not self.db_file_path:
@@ -1475,8 +5962,8 @@ class AssetAnalyzerApp:
         new_value = f"{new_hash}|{new_size}"
 
         try:
-            with dbm.open(self.db_file_path, 'c') as db:
-                db[path.encode('utf-8')] = new_value.encode('utf-8')
+            with DatabaseBroker.for_path(self.db_file_path).write() as txn:
+                txn.set(path.encode('utf-8'), new_value.encode('utf-8'))
             message = f"成功修改: {os.path.basename(path)}"
             self.status_var.set(message)
             self._log(message)
@@ -1484,6 +5971,48 @@ class AssetAnalyzerApp:
         except Exception as e:
             self._handle_error("修改数据库失败", e)
 
+    def _staged_for_current_db(self, parent=None):
+        # 暂存区为空时归属当前数据库；属于别的数据库时询问是否清空，不清空则不能继续
+        if not self.staged_edits or self.staged_db_path is None:
+            self.staged_db_path = self.db_file_path
+            return True
+        if os.path.normcase(os.path.abspath(self.staged_db_path)) == os.path.normcase(os.path.abspath(self.db_file_path)):
+            return True
+        if messagebox.askyesno("暂存的修改属于其他数据库",
+                               f"已暂存的 {len(self.staged_edits)} 条修改属于数据库 {os.path.basename(self.staged_db_path)}，"
+                               f"不能写入当前数据库 {os.path.basename(self.db_file_path)}。\n\n清空这些修改？", parent=parent):
+            self.staged_edits.clear()
+            self.staged_db_path = self.db_file_path
+            self._update_batch_edit_button()
+            return True
+        return False
+
+    def stage_modification(self):
+        if not self.current_selected_path or not self.db_file_path:
+            self._handle_error("没有选中任何要修改的项。")
+            return
+        if not self._staged_for_current_db():
+            return
+        path = self.current_selected_path
+        self.staged_edits[path] = (self.detail_hash_var.get().strip(), self.detail_size_var.get().strip())
+        self.status_var.set(f"已加入批量修改: {os.path.basename(path)} (共 {len(self.staged_edits)} 条)")
+        if self.batch_edit_window is not None and self.batch_edit_window.winfo_exists():
+            self.batch_edit_window.refresh()
+        else:
+            self._update_batch_edit_button()
+
+    def _update_batch_edit_button(self):
+        count = len(self.staged_edits)
+        self.batch_edit_button.config(text=f"批量修改 ({count})..." if count else "批量修改...")
+
+    def show_batch_edit_window(self):
+        if not self.db_file_path: self._handle_error("请先加载数据库。"); return
+        if self.batch_edit_window is not None and self.batch_edit_window.winfo_exists():
+            self.batch_edit_window.lift()
+            return
+        self._log("打开批量修改窗口。")
+        self.batch_edit_window = BatchEditWindow(self.master, self)
+
     def export_to_json(self):
         if not self.db_file_path: return
         
@@ -1498,7 +6027,7 @@ class AssetAnalyzerApp:
         )
 
     def _export_to_json_worker(self, file_path):
-        with dbm.open(self.db_file_path, 'r') as db:
+        with DatabaseBroker.for_path(self.db_file_path).read() as db:
             strategy_name_bytes = db.get(b'__parsing_strategy__')
             if not strategy_name_bytes:
                 raise KeyError("数据库中未找到解析策略信息，无法确定导出格式。")
@@ -1509,13 +6038,13 @@ class AssetAnalyzerApp:
         if strategy_name == '_parse_asset_hash_list':
             json_data['assetHashList'] = [f"{path}|{value}" for path, value in items.items()]
         elif strategy_name == '_parse_unity_addressables_catalog':
-            placeholder = "{PlatformUtils.AddressableLoadPath}/"
-            json_data['m_InternalIds'] = [placeholder + path for path in items.keys()]
+            json_data['m_InternalIds'] = [_ADDRESSABLES_PLACEHOLDER + path for path in items.keys()]
         else:
             raise ValueError(f"未知的解析策略 '{strategy_name}'。")
             
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(json_data, f, ensure_ascii=False, indent=4)
+        _count_processed(records=len(items), nbytes=os.path.getsize(file_path))
         return file_path
     
     def _on_export_done(self, result):
@@ -1564,14 +6093,20 @@ class AssetAnalyzerApp:
 
         try:
             if file_path.lower().endswith('.csv'):
+                # CSV 导出整个统计立方：每个目录前缀的每个维度
                 with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
                     writer = csv.writer(f)
-                    writer.writerow(['Category', 'Count'])
-                    for cat, num in self.analysis_data.most_common():
-                        writer.writerow([cat, num])
+                    writer.writerow(['Prefix', 'Facet', 'Label', 'Count', 'Bytes'])
+                    writer.writerows(self.analysis_data.rows())
             else:
+                # 文本只保存当前显示的视图
+                total, total_bytes = self.analysis_data.total(self.analysis_prefix)
+                lines = [f"{self.analysis_prefix or '(全部)'}: {total} 个, {_format_size(total_bytes)}",
+                         f"\n--- {self.analysis_facet_var.get()} ---"]
+                for label, count, nbytes in self.analysis_data.facet(self._current_facet(), self.analysis_prefix):
+                    lines.append(f"{label:<25} : {count:>8}  {_format_size(nbytes)}")
                 with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(self.analysis_text.get('1.0', tk.END))
+                    f.write("\n".join(lines) + "\n")
             messagebox.showinfo("成功", f"结果已保存至:\n{file_path}")
         except Exception as e:
             self._handle_error("保存结果失败", e)
@@ -1579,7 +6114,7 @@ class AssetAnalyzerApp:
     def show_visualization_window(self):
         if not self.analysis_data: self._handle_error("请先加载数据库并完成分析。"); return
         self._log("打开可视化分析窗口。")
-        PlottingWindow(self.master, self.analysis_data)
+        PlottingWindow(self.master, self.analysis_data, self.analysis_prefix)
         
     def show_explorer_window(self):
         if not self.db_file_path: self._handle_error("请先加载数据库。"); return
@@ -1590,11 +6125,37 @@ class AssetAnalyzerApp:
         self._log("打开UnityFS抹除工具。")
         UnityFSStripperWindow(self.master, self)
     
+    def show_unityfs_index_window(self):
+        self._log("打开UnityFS包索引工具。")
+        UnityFSIndexWindow(self.master, self)
+
     def show_compare_db_window(self):
         if not self.db_file_path: self._handle_error("请先加载数据库。"); return
         self._log("打开对比数据库窗口。")
         CompareDBWindow(self.master, self)
 
+    def show_verify_window(self):
+        if not self.db_file_path: self._handle_error("请先加载数据库。"); return
+        self._log("打开资源目录校验窗口。")
+        AssetVerifyWindow(self.master, self)
+
+    def show_watch_window(self):
+        self._log("打开监视资源目录窗口。")
+        ManifestWatchWindow(self.master, self)
+
+    def show_version_query_window(self):
+        self._log("打开跨版本路径查询窗口。")
+        VersionQueryWindow(self.master, self)
+
+    def show_query_server_window(self):
+        if not self.db_file_path: self._handle_error("请先加载数据库。"); return
+        self._log("打开HTTP查询服务窗口。")
+        QueryServerWindow(self.master, self)
+
+    def show_batch_ingest_window(self):
+        self._log("打开批量入库窗口。")
+        BatchIngestWindow(self.master, self)
+
     def show_luajit_decompiler_window(self):
         self._log("打开LuaJIT工具。")
         LuaJITDecompilerWindow(self.master, self)
@@ -1606,7 +6167,7 @@ def main():
         if not MATPLOTLIB_AVAILABLE:
             warnings.append("没找到matplotlib库\n")
         if not LJD_AVAILABLE:
-            warnings.append("没找到ljd库\n)")
+            warnings.append("没找到ljd库，LuaJIT 工具不能完整反编译 (提取字符串常量不受影响)\n")
         
         if warnings:
             root_temp = tk.Tk()
@@ -1619,8 +6180,8 @@ def main():
         def on_closing():
             if app_instance:
                 app_instance._log("应用程序关闭。")
-                if app_instance.log_file and not app_instance.log_file.closed:
-                    app_instance.log_file.close()
+                if app_instance.logger:
+                    app_instance.logger.close()
             root.destroy()
         root.protocol("WM_DELETE_WINDOW", on_closing)
         root.mainloop()
@@ -1629,11 +6190,13 @@ def main():
         print(error_message)
         if app_instance and app_instance.logging_enabled:
             app_instance._log("="*20 + " 致命错误 " + "="*20)
-            app_instance._log(error_message)
+            app_instance._log(error_message, level='ERROR')
+            app_instance.logger.close()
         try:
             messagebox.showerror("致命错误", error_message)
         except tk.TclError: 
             pass
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包成 exe 后进程池需要
     main()